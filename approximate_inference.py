@@ -0,0 +1,137 @@
+
+from statistics import NormalDist
+from typing import Optional, Dict, List
+import networkx as nx
+import numpy as np
+
+
+class LikelihoodWeighting:
+    """Наближений інференс зваженим за правдоподібністю семплюванням
+
+    Працює з будь-якою DiscreteBayesianNetwork: вузли семплюються в
+    топологічному порядку масивами NumPy, вузли з evidence не семплюються,
+    а множать вагу зразка на свою ймовірність. CPT читаються з моделі під
+    час кожного запиту, тож заміна CPT навичок не потребує перебудови."""
+
+    def __init__(self, model, seed: Optional[int] = None, batch_size: int = 10000):
+        self.model = model
+        self.rng = np.random.default_rng(seed)
+        self.batch_size = batch_size
+
+    def _tables(self) -> List:
+        """(змінна, стани, батьки, таблиця (стани × комбінації батьків)) у топологічному порядку"""
+        tables = []
+        for cpd in (self.model.get_cpds(node) for node in nx.topological_sort(self.model)):
+            var = cpd.variable
+            tables.append((var, list(cpd.state_names[var]), list(cpd.variables[1:]),
+                           np.asarray(cpd.get_values(), dtype=np.float64)))
+        return tables
+
+    def _draw(self, tables, students: int, n: int, evidence: Dict, root_priors: Dict):
+        """Один пакет зразків: коди станів (учні × n) та ваги"""
+        table_states = {var: len(states) for var, states, _, _ in tables}
+        samples = {}
+        weights = np.ones((students, n))
+        for var, states, parents, table in tables:
+            if parents:
+                cards = [table_states[parent] for parent in parents]
+                column = np.ravel_multi_index([samples[parent] for parent in parents], cards)
+                probs = table[:, column]                       # стани × учні × n
+            elif var in root_priors:
+                probs = np.repeat(root_priors[var].T[:, :, None], n, axis=2)
+            else:
+                probs = np.broadcast_to(table[:, :1, None], (len(states), students, n))
+
+            if var in evidence:
+                code = np.broadcast_to(evidence[var][:, None], (students, n))
+                weights *= np.take_along_axis(probs, code[None], axis=0)[0]
+                samples[var] = code
+            else:
+                u = self.rng.random((students, n))
+                samples[var] = (u[None] >= np.cumsum(probs, axis=0)[:-1]).sum(axis=0)
+        return samples, weights
+
+    def query_batch(self, variables: List[str], evidence: Optional[Dict] = None,
+                    root_priors: Optional[Dict] = None, students: int = 1,
+                    n_samples: Optional[int] = None, target_error: float = 0.01,
+                    max_samples: int = 1000000, confidence: float = 0.95) -> Dict:
+        """Апостеріорні розподіли для багатьох учнів одночасно
+
+        evidence: змінна -> стан (спільний) або масив станів учнів;
+        root_priors: змінна без батьків -> масив (учні × стани), що замінює її CPT.
+        Без n_samples семплювання триває, доки половина довірчого інтервалу
+        кожної ймовірності не стане меншою за target_error (або до max_samples)."""
+        tables = self._tables()
+        all_states = {var: states for var, states, _, _ in tables}
+        root_priors = {var: np.asarray(p, dtype=np.float64)
+                       for var, p in (root_priors or {}).items()}
+        if root_priors:
+            students = next(iter(root_priors.values())).shape[0]
+
+        codes = {}
+        for var, value in (evidence or {}).items():
+            states = all_states[var]
+            values = np.broadcast_to(np.asarray(value, dtype=object), (students,))
+            codes[var] = np.array([states.index(v) for v in values])
+
+        budget = max_samples if n_samples is None else n_samples
+        if budget < 1:
+            raise ValueError(f"Кількість зразків має бути додатною, отримано {budget}")
+
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        counts = {var: np.zeros((students, len(all_states[var]))) for var in variables}
+        total = np.zeros(students)
+        total_sq = np.zeros(students)
+        drawn = 0
+
+        while drawn < budget:
+            n = min(self.batch_size, budget - drawn)
+            samples, weights = self._draw(tables, students, n, codes, root_priors)
+            drawn += n
+            total += weights.sum(axis=1)
+            total_sq += (weights ** 2).sum(axis=1)
+            for var in variables:
+                for k in range(counts[var].shape[1]):
+                    counts[var][:, k] += np.where(samples[var] == k, weights, 0.0).sum(axis=1)
+
+            probabilities, half_width, ess = self._estimate(counts, total, total_sq, z)
+            if n_samples is None and max(float(np.max(h)) for h in half_width.values()) <= target_error:
+                break
+
+        return {
+            'states': {var: all_states[var] for var in variables},
+            'probabilities': probabilities,
+            'half_width': half_width,
+            'samples': drawn,
+            'ess': ess
+        }
+
+    @staticmethod
+    def _estimate(counts: Dict, total: np.ndarray, total_sq: np.ndarray, z: float):
+        # Ефективний розмір вибірки зважених зразків: (Σw)² / Σw²
+        safe_total = np.where(total > 0, total, 1.0)
+        ess = np.where(total_sq > 0, total ** 2 / np.where(total_sq > 0, total_sq, 1.0), 0.0)
+        probabilities, half_width = {}, {}
+        for var, weighted in counts.items():
+            p = weighted / safe_total[:, None]
+            probabilities[var] = p
+            half_width[var] = z * np.sqrt(p * (1 - p) / np.maximum(ess, 1.0)[:, None])
+        return probabilities, half_width, ess
+
+    def query(self, variables: List[str], evidence: Optional[Dict] = None, **kwargs) -> Dict:
+        """Апостеріорні розподіли та довірчі інтервали для одного учня"""
+        result = self.query_batch(variables, evidence, students=1, **kwargs)
+        beliefs, intervals = {}, {}
+        for var in variables:
+            states = result['states'][var]
+            p = result['probabilities'][var][0]
+            h = result['half_width'][var][0]
+            beliefs[var] = {state: float(p[k]) for k, state in enumerate(states)}
+            intervals[var] = {state: (float(max(0.0, p[k] - h[k])), float(min(1.0, p[k] + h[k])))
+                              for k, state in enumerate(states)}
+        return {
+            'beliefs': beliefs,
+            'intervals': intervals,
+            'samples': result['samples'],
+            'ess': float(result['ess'][0])
+        }
@@ -2,34 +2,167 @@
 from pgmpy.models import DiscreteBayesianNetwork
 from pgmpy.factors.discrete import TabularCPD
 from pgmpy.inference import VariableElimination
+from datetime import datetime, timezone
+from typing import Optional
+import copy
+import threading
 import numpy as np
 
+# Відповідність тем завдань вузлам мережі
+TOPIC_TO_NODE = {
+    'algebra': 'Algebra',
+    'geometry': 'Geometry',
+    'functions': 'Functions'
+}
+
+# Апріорна P(High) кожної навички (вузли мережі)
+SKILL_PRIORS = {
+    'Algebra': 0.4,
+    'Geometry': 0.5,
+    'Functions': 0.3
+}
+SKILL_NODES = list(SKILL_PRIORS)
+
+# Ймовірність правильної відповіді за високого та низького рівня навички
+SUCCESS_GIVEN_HIGH = 0.8
+SUCCESS_GIVEN_LOW = 0.3
+
+# Рівні складності завдань (стовпець tasks.difficulty)
+DIFFICULTY_LEVELS = ['easy', 'medium', 'hard']
+
+# Зсув логіта ймовірності правильної відповіді для кожного рівня складності
+DIFFICULTY_OFFSETS = {
+    'easy': 1.0,
+    'medium': 0.0,
+    'hard': -1.0
+}
+
+# P(Correct | Algebra, Geometry, Functions) для завдань середньої складності
+RESULT_CORRECT_BASE = np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8])
+
+# Період напіврозпаду засвоєння навички без практики (днів)
+FORGETTING_HALF_LIFE_DAYS = 90.0
+
+# Режими оновлення: статична мережа або трасування знань (knowledge_tracing.py)
+MODES = ('static', 'knowledge_tracing')
+
+# Рушії інференсу: точний VariableElimination, семплювання (approximate_inference.py)
+# або скомпільоване дерево з'єднань з кешованим калібруванням (junction_tree.py)
+ENGINES = ('exact', 'sampling', 'junction_tree')
+
+def _logit(p):
+    return np.log(p) - np.log1p(-p)
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+def topic_node(topic: str) -> str:
+    """Вузол навички для теми завдання (без урахування регістру; невідома - Algebra)"""
+    return TOPIC_TO_NODE.get(str(topic).lower(), 'Algebra')
+
+def boost_skill_high(high, is_correct):
+    """P(High) CPT навички теми після відповіді: множник 1.3 / 0.7, межі 0.05 / 0.95
+    та нормалізація (скаляри або масиви - спільне правило мережі й evaluate.py)"""
+    factor = np.where(is_correct, 1.3, 0.7)
+    new_low = np.maximum(0.05, (1 - high) / factor)
+    new_high = np.minimum(0.95, high * factor)
+    return new_high / (new_low + new_high)
+
+def decay_high(high, baseline, factor):
+    """P(High) після забування: знижується лише частка понад базовий рівень"""
+    return high - np.maximum(high - baseline, 0.0) * (1.0 - factor)
+
+def success_probabilities(offset: float = 0.0):
+    """(P(успіх | High), P(успіх | Low)) із зсувом логіта складності"""
+    return (float(_sigmoid(_logit(SUCCESS_GIVEN_HIGH) + offset)),
+            float(_sigmoid(_logit(SUCCESS_GIVEN_LOW) + offset)))
+
+def _parse_timestamp(value):
+    """Час з БД (CURRENT_TIMESTAMP у UTC) або datetime -> datetime з часовою зоною"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+# Побудовані й перевірені мережі за замовчуванням: одна на процес для кожного рушія
+_PROTOTYPES = {}
+_PROTOTYPES_LOCK = threading.Lock()
+
+def _same_network(model_data, serialized) -> bool:
+    """Чи збігаються збережені структура та CPT з серіалізацією мережі
+    (після JSON кортежі стають списками, тож порівнюємо значення)"""
+    network_structure, cpt_parameters = serialized
+    stored_structure = model_data['network_structure']
+    stored_cpts = model_data['cpt_parameters']
+    if (sorted(stored_structure.get('nodes', [])) != sorted(network_structure['nodes']) or
+            sorted(map(tuple, stored_structure.get('edges', []))) != sorted(network_structure['edges']) or
+            stored_cpts.keys() != cpt_parameters.keys()):
+        return False
+    for var, params in cpt_parameters.items():
+        stored = stored_cpts[var]
+        if (list(stored.get('evidence', [])) != list(params['evidence']) or
+                stored.get('state_names') != params['state_names'] or
+                not np.array_equal(np.asarray(stored.get('values', [])), np.asarray(params['values']))):
+            return False
+    return True
+
 class SimpleBayesianNetwork:
     """Проста Байєсова мережа для задач НМТ"""
     
-    def __init__(self):
+    def __init__(self, mode: str = 'static', engine: str = 'exact',
+                 seed: Optional[int] = None, target_error: float = 0.01):
+        if mode not in MODES:
+            raise ValueError(f"Невідомий режим: {mode}")
+        if engine not in ENGINES:
+            raise ValueError(f"Невідомий рушій інференсу: {engine}")
+        self.mode = mode
+        self.tracer = None
+        # Семплювання: відтворюваність (seed), точність та інтервали останнього запиту
+        self.engine = engine
+        self.seed = seed
+        self.target_error = target_error
+        self.sampler = None
+        self.posterior_intervals = {}
+        self.junction_tree = None
+        # Модель прототипу, спільна до першої зміни CPT, та її готова серіалізація
+        self._shared_model = False
+        self._serialized = None
         self.model = None
         self.inference = None
         self.current_state = {}
         # Зберігаємо поточні CPT окремо
         self.skill_cpds = {
-            'Algebra': np.array([[0.6], [0.4]]),
-            'Geometry': np.array([[0.5], [0.5]]),
-            'Functions': np.array([[0.7], [0.3]])
+            skill: np.array([[1 - high], [high]]) for skill, high in SKILL_PRIORS.items()
+        }
+        # Рівень, до якого з часом повертається P(High) без практики
+        self.skill_baseline = {
+            skill: float(values[1, 0]) for skill, values in self.skill_cpds.items()
         }
+        self.half_life_days = FORGETTING_HALF_LIFE_DAYS
+        self.last_updated = None
+        # Зсуви складності: за рівнем та (після навчання) для окремих завдань
+        self.difficulty_offsets = dict(DIFFICULTY_OFFSETS)
+        self.task_offsets = {}
+        self._precompute_difficulty_tables()
         
     def build_network(self):
         """Побудова простої мережі з 3 темами"""
         self.model = DiscreteBayesianNetwork()
+        self._shared_model = False
+        self._serialized = None
         
         # Додаємо вузли
-        self.model.add_nodes_from(['Algebra', 'Geometry', 'Functions', 'Result'])
+        self.model.add_nodes_from(['Algebra', 'Geometry', 'Functions', 'Difficulty', 'Result'])
         
         # Додаємо зв'язки
         self.model.add_edges_from([
             ('Algebra', 'Result'),
             ('Geometry', 'Result'),
-            ('Functions', 'Result')
+            ('Functions', 'Result'),
+            ('Difficulty', 'Result')
         ])
         
         # Задаємо CPT
@@ -39,7 +172,7 @@ class SimpleBayesianNetwork:
         self.model.check_model()
         
         # Ініціалізація інференсу
-        self.inference = VariableElimination(self.model)
+        self._init_inference()
         
         # Початковий стан
         self.current_state = self.get_prior_distribution()
@@ -73,44 +206,170 @@ class SimpleBayesianNetwork:
             state_names={'Functions': ['Low', 'High']}
         )
         
-        # CPT для Result (спрощено - лише 8 комбінацій)
-        cpd_result = TabularCPD(
+        # CPT для Difficulty - рівень завдання завжди подається як evidence
+        cpd_difficulty = TabularCPD(
+            variable='Difficulty',
+            variable_card=len(DIFFICULTY_LEVELS),
+            values=[[1 / len(DIFFICULTY_LEVELS)]] * len(DIFFICULTY_LEVELS),
+            state_names={'Difficulty': DIFFICULTY_LEVELS}
+        )
+        
+        # CPT для Result обчислена заздалегідь у _precompute_difficulty_tables
+        self.model.add_cpds(cpd_algebra, cpd_geometry, cpd_functions,
+                            cpd_difficulty, self.result_cpd)
+    
+    def _precompute_difficulty_tables(self):
+        """Попереднє обчислення таблиць Result для всіх рівнів складності"""
+        # Трасувальник знань створюється заново з новими зсувами складності
+        self.tracer = None
+        offsets = np.array([self.difficulty_offsets[level] for level in DIFFICULTY_LEVELS])
+        
+        # (8 комбінацій навичок) × (рівні складності); складність змінюється найшвидше,
+        # як того вимагає порядок стовпців TabularCPD
+        correct = _sigmoid(_logit(RESULT_CORRECT_BASE)[:, None] + offsets[None, :])
+        
+        self.result_tables = {
+            level: np.vstack([1 - correct[:, i], correct[:, i]])
+            for i, level in enumerate(DIFFICULTY_LEVELS)
+        }
+        
+        # (P(успіх | High), P(успіх | Low)) для predict_success
+        self.success_tables = {
+            level: success_probabilities(offset)
+            for level, offset in self.difficulty_offsets.items()
+        }
+        self.task_success_tables = {
+            task_id: success_probabilities(offset)
+            for task_id, offset in self.task_offsets.items()
+        }
+        
+        self.result_cpd = TabularCPD(
             variable='Result',
             variable_card=2,
-            values=[
-                # P(Incorrect | Algebra, Geometry, Functions)
-                [0.9, 0.8, 0.7, 0.6, 0.5, 0.4, 0.3, 0.2],
-                # P(Correct | Algebra, Geometry, Functions)
-                [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8]
-            ],
-            evidence=['Algebra', 'Geometry', 'Functions'],
-            evidence_card=[2, 2, 2],  # 2×2×2=8 комбінацій
+            values=np.vstack([1 - correct.ravel(), correct.ravel()]),
+            evidence=['Algebra', 'Geometry', 'Functions', 'Difficulty'],
+            evidence_card=[2, 2, 2, len(DIFFICULTY_LEVELS)],
             state_names={
                 'Result': ['Incorrect', 'Correct'],
                 'Algebra': ['Low', 'High'],
                 'Geometry': ['Low', 'High'],
-                'Functions': ['Low', 'High']
+                'Functions': ['Low', 'High'],
+                'Difficulty': DIFFICULTY_LEVELS
             }
         )
+    
+    def success_given_skill(self, difficulty: str = 'medium', task_id: str = None):
+        """(P(успіх | High), P(успіх | Low)) для рівня складності або завдання"""
+        if task_id is not None and task_id in self.task_success_tables:
+            return self.task_success_tables[task_id]
+        return self.success_tables.get(difficulty, self.success_tables['medium'])
+    
+    def learn_difficulty(self, db_manager, prior_strength: float = 10.0):
+        """Навчання зсувів складності за рівнями та завданнями з таблиці answers"""
+        rows = db_manager.get_task_answer_stats()
+        total = sum(row['total'] for row in rows)
+        if total == 0:
+            return self.difficulty_offsets
+        
+        # Згладжена частка правильних відповідей відносно загальної
+        overall = (sum(row['correct'] for row in rows) + 0.5) / (total + 1)
+        
+        by_level = {}
+        for row in rows:
+            level = by_level.setdefault(row['difficulty'], [0, 0])
+            level[0] += row['correct']
+            level[1] += row['total']
+        
+        level_logit = {}
+        for level in DIFFICULTY_LEVELS:
+            correct, count = by_level.get(level, (0, 0))
+            prior = _sigmoid(_logit(overall) + DIFFICULTY_OFFSETS[level])
+            level_logit[level] = _logit((correct + prior_strength * prior) / (count + prior_strength))
+        
+        # Зсуви рівнів відраховуються від середнього рівня
+        self.difficulty_offsets = {
+            level: float(level_logit[level] - level_logit['medium'])
+            for level in DIFFICULTY_LEVELS
+        }
+        
+        # Зсуви окремих завдань стягуються до зсуву їхнього рівня
+        self.task_offsets = {}
+        for row in rows:
+            level = row['difficulty'] if row['difficulty'] in DIFFICULTY_LEVELS else 'medium'
+            prior = _sigmoid(level_logit[level])
+            accuracy = (row['correct'] + prior_strength * prior) / (row['total'] + prior_strength)
+            self.task_offsets[row['task_id']] = float(_logit(accuracy) - level_logit['medium'])
         
-        # Додаємо CPT до моделі
-        self.model.add_cpds(cpd_algebra, cpd_geometry, cpd_functions, cpd_result)
+        self._precompute_difficulty_tables()
+        
+        # Оновлюємо лише CPT Result, решта моделі лишається
+        if self.model is not None:
+            self._own_model()
+            self.model.remove_cpds('Result')
+            self.model.add_cpds(self.result_cpd)
+        
+        return self.difficulty_offsets
     
     def get_prior_distribution(self):
         """Отримання апріорних розподілів"""
         beliefs = {}
         for cpd in self.model.get_cpds():
             var = cpd.variable
-            if var != 'Result':
+            if var not in ('Result', 'Difficulty'):
                 states = cpd.state_names[var]
                 probs = cpd.values.flatten()
                 beliefs[var] = {state: float(prob) for state, prob in zip(states, probs)}
         return beliefs
     
-    def update_from_answer(self, is_correct: bool, topic: str):
+    def _decay_factor(self, now=None) -> float:
+        """Частка засвоєння понад базовий рівень, що лишилася після паузи"""
+        # У режимі трасування знань забування моделює параметр forget
+        if self.last_updated is None or not self.half_life_days or self.mode == 'knowledge_tracing':
+            return 1.0
+        now = _parse_timestamp(now) or datetime.now(timezone.utc)
+        elapsed_days = max(0.0, (now - self.last_updated).total_seconds() / 86400.0)
+        return 0.5 ** (elapsed_days / self.half_life_days)
+    
+    def _decay_high(self, skill: str, high: float, factor: float) -> float:
+        return float(decay_high(high, self.skill_baseline.get(skill, 0.5), factor))
+    
+    def decayed_state(self, now=None):
+        """Поточний стан з урахуванням забування (обчислюється ліниво, в закритій формі)"""
+        factor = self._decay_factor(now)
+        if factor == 1.0:
+            return self.current_state
+        
+        state = {}
+        for skill, dist in self.current_state.items():
+            high = self._decay_high(skill, dist.get('High', 0), factor)
+            state[skill] = {'Low': 1 - high, 'High': high}
+        return state
+    
+    def _apply_decay(self, now=None):
+        """Фіксація забування у стані та CPT навичок перед новим оновленням"""
+        factor = self._decay_factor(now)
+        if factor == 1.0:
+            return
+        self.current_state = self.decayed_state(now)
+        for skill, values in self.skill_cpds.items():
+            high = self._decay_high(skill, float(values[1, 0]), factor)
+            self.skill_cpds[skill] = np.array([[1 - high], [high]])
+    
+    def update_from_answer(self, is_correct: bool, topic: str, difficulty: str = 'medium'):
         """Оновлення на основі відповіді - СПРАВДІ ПРАЦЮЄ"""
+        if difficulty not in DIFFICULTY_LEVELS:
+            difficulty = 'medium'
+        
+        if self.mode == 'knowledge_tracing':
+            return self._trace_answer(is_correct, topic, difficulty)
+        
+        # 0. ВРАХОВУЄМО ЗАБУВАННЯ З МОМЕНТУ ОСТАННЬОГО ОНОВЛЕННЯ
+        now = datetime.now(timezone.utc)
+        self._apply_decay(now)
+        self.last_updated = now
+        
         print(f"\n{'='*60}")
-        print(f"ОНОВЛЕННЯ: тема='{topic}', правильна={is_correct}")
+        print(f"ОНОВЛЕННЯ: тема='{topic}', складність='{difficulty}', правильна={is_correct}")
         print(f"{'='*60}")
         
         # 1. ОНОВЛЮЄМО CPT
@@ -120,46 +379,154 @@ class SimpleBayesianNetwork:
         self._rebuild_network()
         
         # 3. ВИКОНУЄМО ЗАПИТ
-        evidence = {'Result': 'Correct' if is_correct else 'Incorrect'}
+        evidence = {
+            'Result': 'Correct' if is_correct else 'Incorrect',
+            'Difficulty': difficulty
+        }
         
+        posteriors = self._query_skills(evidence)
         for var in ['Algebra', 'Geometry', 'Functions']:
+            self.current_state[var] = posteriors[var]
+            
+            print(f"{var}: Low={self.current_state[var]['Low']:.3f}, High={self.current_state[var]['High']:.3f}")
+        
+        print(f"{'='*60}")
+        return self.current_state
+    
+    @classmethod
+    def from_prototype(cls, mode: str = 'static', engine: str = 'exact',
+                       seed: Optional[int] = None, target_error: float = 0.01):
+        """Нова мережа за замовчуванням без побудови: модель, інференс і апріорний
+        стан прототипу (будується один раз на процес) спільні до першої зміни CPT"""
+        if mode not in MODES:
+            raise ValueError(f"Невідомий режим: {mode}")
+        prototype = cls._prototype(engine)
+        
+        # Поверхнева копія: словники, що змінюються на місці, копіюємо окремо
+        bn = copy.copy(prototype)
+        bn.mode = mode
+        bn.seed = seed
+        bn.target_error = target_error
+        bn.skill_cpds = dict(prototype.skill_cpds)
+        bn.difficulty_offsets = dict(prototype.difficulty_offsets)
+        bn.task_offsets = {}
+        bn.current_state = {skill: dict(dist) for skill, dist in prototype.current_state.items()}
+        bn.posterior_intervals = {}
+        bn.sampler = None
+        bn.tracer = None
+        bn.last_updated = None
+        bn._shared_model = True
+        if engine == 'junction_tree':
+            # Кешоване калібрування залежить від evidence учня - у кожного своє
+            bn._init_inference()
+        return bn
+    
+    @classmethod
+    def _prototype(cls, engine: str):
+        """Мережа за замовчуванням для рушія (будується один раз на процес)"""
+        with _PROTOTYPES_LOCK:
+            prototype = _PROTOTYPES.get(engine)
+            if prototype is None:
+                prototype = cls(engine=engine)
+                prototype.build_network()
+                prototype._serialized = prototype._serialize_model()
+                _PROTOTYPES[engine] = prototype
+            return prototype
+    
+    def _share_prototype_model(self, prototype):
+        """Модель та інференс прототипу замість побудови власних (до першої зміни CPT)"""
+        self.model = prototype.model
+        self._shared_model = True
+        self._serialized = prototype._serialized
+        self.skill_cpds = dict(prototype.skill_cpds)
+        if self.engine == 'exact':
+            self.inference = prototype.inference
+            self.sampler = None
+            self.junction_tree = None
+        else:
+            self._init_inference()
+    
+    def _own_model(self):
+        """Копія спільної моделі прототипу перед першою зміною (copy-on-write)"""
+        if self._shared_model:
+            self.model = self.model.copy()
+            self._shared_model = False
+            self._serialized = None
+            self._init_inference()
+    
+    def _init_inference(self):
+        """Рушій інференсу для щойно побудованої чи завантаженої моделі"""
+        self.inference = None
+        self.sampler = None
+        self.junction_tree = None
+        if self.engine == 'exact':
+            self.inference = VariableElimination(self.model)
+        elif self.engine == 'junction_tree':
+            from junction_tree import JunctionTreeInference
+            # Структура компілюється один раз на процес і спільна для всіх учнів
+            self.junction_tree = JunctionTreeInference(self.model)
+    
+    def _query_skills(self, evidence):
+        """Апостеріорні розподіли навичок обраним рушієм інференсу"""
+        skills = ['Algebra', 'Geometry', 'Functions']
+        if self.engine == 'sampling':
+            if self.sampler is None or self.sampler.model is not self.model:
+                from approximate_inference import LikelihoodWeighting
+                self.sampler = LikelihoodWeighting(self.model, seed=self.seed)
+            result = self.sampler.query(skills, evidence, target_error=self.target_error)
+            self.posterior_intervals = result['intervals']
+            print(f"Семплювання: {result['samples']} зразків, ефективних {result['ess']:.0f}")
+            return result['beliefs']
+        
+        if self.engine == 'junction_tree':
+            return self.junction_tree.query(skills, evidence)
+        
+        posteriors = {}
+        for var in skills:
             result = self.inference.query(variables=[var], evidence=evidence)
             states = result.state_names[var]
             probs = result.values.flatten()
-            
-            self.current_state[var] = {
-                state: float(prob) for state, prob in zip(states, probs)
+            posteriors[var] = {state: float(prob) for state, prob in zip(states, probs)}
+        return posteriors
+    
+    def knowledge_tracer(self):
+        """Трасувальник знань з поточними зсувами складності"""
+        if self.tracer is None:
+            from knowledge_tracing import KnowledgeTracer
+            self.tracer = KnowledgeTracer(difficulty_offsets=self.difficulty_offsets)
+        return self.tracer
+    
+    def _trace_answer(self, is_correct: bool, topic: str, difficulty: str):
+        """Один крок фільтрації вперед для навички теми (режим knowledge_tracing)"""
+        self.last_updated = datetime.now(timezone.utc)
+        if not self.current_state:
+            self.current_state = {
+                skill: {'Low': 1 - high, 'High': high} for skill, high in SKILL_PRIORS.items()
             }
-            
-            print(f"{var}: Low={self.current_state[var]['Low']:.3f}, High={self.current_state[var]['High']:.3f}")
         
-        print(f"{'='*60}")
+        tracer = self.knowledge_tracer()
+        target = topic_node(topic)
+        old_high = self.current_state[target]['High']
+        high = float(tracer.step(old_high, tracer.skills.index(target), is_correct,
+                                 DIFFICULTY_LEVELS.index(difficulty)))
+        self.current_state[target] = {'Low': 1 - high, 'High': high}
+        
+        print(f"ТРАСУВАННЯ: тема='{topic}', складність='{difficulty}', правильна={is_correct}")
+        print(f"  {target}: High {old_high:.3f} -> {high:.3f}")
         return self.current_state
     
     def _update_skills(self, topic: str, is_correct: bool):
         """Оновлення навичок"""
-        topic_to_node = {
-            'algebra': 'Algebra',
-            'geometry': 'Geometry',
-            'functions': 'Functions'
-        }
-        
-        target = topic_to_node.get(topic.lower(), 'Algebra')
+        target = topic_node(topic)
         
         print("Оновлення CPT навичок:")
         for skill in ['Algebra', 'Geometry', 'Functions']:
             old_values = self.skill_cpds[skill].copy()
             
-            # Коефіцієнт
+            # Коефіцієнт 1.3 / 0.7 для навички теми
             if skill == target:
-                factor = 1.3 if is_correct else 0.7  
-                new_low = max(0.05, old_values[0, 0] / factor)
-                new_high = min(0.95, old_values[1, 0] * factor)
-            
-                # Нормалізуємо
-                total = new_low + new_high
-                new_low /= total
-                new_high /= total  
+                new_high = float(boost_skill_high(old_values[1, 0], is_correct))
+                new_low = 1 - new_high
             else:
                new_low =  old_values[0, 0] 
                new_high = old_values[1, 0]
@@ -169,8 +536,9 @@ class SimpleBayesianNetwork:
     
     def _rebuild_network(self):
         """Перебудова мережі з новими CPT"""
-        # Видаляємо старі CPT
-        for var in ['Algebra', 'Geometry', 'Functions', 'Result']:
+        self._own_model()
+        # Видаляємо старі CPT навичок
+        for var in ['Algebra', 'Geometry', 'Functions']:
             try:
                 self.model.remove_cpds(var)
             except:
@@ -198,47 +566,31 @@ class SimpleBayesianNetwork:
             state_names={'Functions': ['Low', 'High']}
         )
         
-        # Result CPT залишається незмінною
-        cpd_result = TabularCPD(
-            variable='Result',
-            variable_card=2,
-            values=[
-                [0.9, 0.8, 0.7, 0.6, 0.5, 0.4, 0.3, 0.2],
-                [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8]
-            ],
-            evidence=['Algebra', 'Geometry', 'Functions'],
-            evidence_card=[2, 2, 2],
-            state_names={
-                'Result': ['Incorrect', 'Correct'],
-                'Algebra': ['Low', 'High'],
-                'Geometry': ['Low', 'High'],
-                'Functions': ['Low', 'High']
-            }
-        )
-        
-        self.model.add_cpds(cpd_algebra, cpd_geometry, cpd_functions, cpd_result)
+        # CPT Result і Difficulty залишаються незмінними
+        self.model.add_cpds(cpd_algebra, cpd_geometry, cpd_functions)
         #self.inference = VariableElimination(self.model)
 
     
-    def predict_success(self, task_topic: str) -> float:
+    def predict_success(self, task_topic: str, difficulty: str = 'medium',
+                        task_id: str = None) -> float:
         """Прогнозування успішності для теми"""
 
         if not self.current_state:
             self.current_state = self.get_prior_distribution()
         
         # Визначаємо, який вузол відповідає темі
-        topic_to_node = {
-            'algebra': 'Algebra',
-            'geometry': 'Geometry',
-            'functions': 'Functions'
-        }
-        
-        node = topic_to_node.get(task_topic, 'Algebra')
-        
-        if node in self.current_state:
+        node = topic_node(task_topic)
+        
+        state = self.decayed_state()
+        if node in state and self.mode == 'knowledge_tracing':
+            tracer = self.knowledge_tracer()
+            level = DIFFICULTY_LEVELS.index(difficulty) if difficulty in DIFFICULTY_LEVELS else 1
+            return float(tracer.predict(state[node].get('High', 0), tracer.skills.index(node), level))
+        if node in state:
             # Ймовірність успіху ≈ ймовірність високого рівня
-            high_prob = self.current_state[node].get('High', 0)
-            return high_prob * 0.8 + (1 - high_prob) * 0.3
+            high_prob = state[node].get('High', 0)
+            p_high, p_low = self.success_given_skill(difficulty, task_id)
+            return high_prob * p_high + (1 - high_prob) * p_low
         else:
             return 0.5
     
@@ -247,33 +599,59 @@ class SimpleBayesianNetwork:
         if not self.current_state:
             return 'algebra'
         
+        state = self.decayed_state()
         topics = {
-            'Algebra': self.current_state.get('Algebra', {}).get('High', 0),
-            'Geometry': self.current_state.get('Geometry', {}).get('High', 0),
-            'Functions': self.current_state.get('Functions', {}).get('High', 0)
+            'Algebra': state.get('Algebra', {}).get('High', 0),
+            'Geometry': state.get('Geometry', {}).get('High', 0),
+            'Functions': state.get('Functions', {}).get('High', 0)
         }
         
         # Знаходимо тему з найменшою ймовірністю високого рівня
         weakest = min(topics.items(), key=lambda x: x[1])
         return weakest[0].lower()
     
-    def save_to_database(self, db_manager, user_id: str):
-        """Збереження моделі в БД - ГАРАНТУЄ ЗБЕРЕЖЕННЯ 2D СТРУКТУРИ"""
-        if self.model is None:
-            print("Модель не ініціалізована")
-            return
-        
-        print(f"\n=== ЗБЕРЕЖЕННЯ МОДЕЛІ ДЛЯ {user_id} ===")
+    def forecast_score(self, blueprint=None, n_simulations: int = 10000,
+                       seed: Optional[int] = None) -> dict:
+        """Розподіл балів тесту (специфікація NMT_BLUEPRINT) за поточним станом"""
+        from score_forecast import forecast_scores
+        if not self.current_state:
+            self.current_state = self.get_prior_distribution()
         
+        state = self.decayed_state()
+        posterior = [[state.get(skill, {}).get('High', 0) for skill in SKILL_NODES]]
+        if self.mode == 'knowledge_tracing':
+            # Ймовірності успіху трасування залежать і від навички, і від складності
+            tracer = self.knowledge_tracer()
+            success_tables = {
+                (topic, level): (tracer.p_correct_known[tracer.skills.index(node), i],
+                                 tracer.p_correct_unknown[tracer.skills.index(node), i])
+                for topic, node in TOPIC_TO_NODE.items()
+                for i, level in enumerate(DIFFICULTY_LEVELS)
+            }
+        else:
+            success_tables = self.success_tables
+        
+        forecast = forecast_scores(posterior, blueprint, n_simulations, success_tables, seed=seed)
+        return {
+            'max_score': forecast['max_score'],
+            'mean': float(forecast['mean'][0]),
+            'std': float(forecast['std'][0]),
+            'percentiles': {q: int(values[0]) for q, values in forecast['percentiles'].items()},
+            'distribution': forecast['distribution'][0]
+        }
+    
+    def _serialize_model(self):
+        """Структура мережі та CPT у форматі для БД (ГАРАНТУЄ 2D СТРУКТУРУ)"""
         network_structure = {
             'nodes': list(self.model.nodes()),
-            'edges': list(self.model.edges())
+            'edges': list(self.model.edges()),
+            'mode': self.mode
         }
         
         cpt_parameters = {}
         for cpd in self.model.get_cpds():
-            # ГАРАНТУЄМО 2D СТРУКТУРУ
-            values_array = cpd.values
+            # ГАРАНТУЄМО 2D СТРУКТУРУ: get_values() повертає (variable_card, кількість стовпців)
+            values_array = cpd.get_values()
             
             print(f"\nCPT {cpd.variable}:")
             print(f"  Початкова форма: {values_array.shape}")
@@ -295,18 +673,41 @@ class SimpleBayesianNetwork:
             print(f"  Збережена форма: список з {len(values_list)} елементів")
             print(f"  Перший елемент: {values_list[0] if values_list else 'пусто'}")
             
-            # Отримуємо evidence коректно
-            evidence = []
-            if hasattr(cpd, 'evidence') and cpd.evidence:
-                evidence = list(cpd.evidence)
+            # Отримуємо evidence коректно: variables = [змінна, *evidence у порядку стовпців]
+            evidence = list(cpd.variables[1:])
             
             cpt_parameters[cpd.variable] = {
                 'values': values_list,  # ГАРАНТОВАНО 2D список!
                 'evidence': evidence,
                 'state_names': cpd.state_names,
-                'original_shape': values_array.shape  # Зберігаємо оригінальну форму
+                'original_shape': cpd.values.shape  # Зберігаємо оригінальну форму
             }
         
+        return network_structure, cpt_parameters
+    
+    def save_to_database(self, db_manager, user_id: str):
+        """Збереження моделі в БД - ГАРАНТУЄ ЗБЕРЕЖЕННЯ 2D СТРУКТУРИ
+        
+        db_manager - будь-яка реалізація storage.StorageBackend"""
+        if self.model is None:
+            print("Модель не ініціалізована")
+            return
+        
+        print(f"\n=== ЗБЕРЕЖЕННЯ МОДЕЛІ ДЛЯ {user_id} ===")
+        
+        if self._serialized is not None:
+            # Модель прототипу не змінювалась - беремо готову серіалізацію
+            network_structure, cpt_parameters = self._serialized
+            network_structure = dict(network_structure, mode=self.mode)
+        else:
+            network_structure, cpt_parameters = self._serialize_model()
+        
+        # Сховище позначає запис поточним часом, і при завантаженні забування
+        # відлічується від нього - тож фіксуємо забування з останнього оновлення
+        now = datetime.now(timezone.utc)
+        self._apply_decay(now)
+        self.last_updated = now
+        
         print(f"\nПоточний стан: {self.current_state}")
         
         # Перевіряємо, чи існує вже модель
@@ -330,7 +731,7 @@ class SimpleBayesianNetwork:
             print(f"✓ Модель створена")
     
     def load_from_database(self, db_manager, user_id: str):
-        """Завантаження моделі з БД"""
+        """Завантаження моделі з БД (будь-яка реалізація storage.StorageBackend)"""
         print(f"\n=== ЗАВАНТАЖЕННЯ МОДЕЛІ ДЛЯ {user_id} ===")
         
         model_data = db_manager.get_bayesian_model(user_id)
@@ -343,14 +744,37 @@ class SimpleBayesianNetwork:
             print(f"✓ Дані отримано")
             
             self.current_state = model_data.get('current_state', {})
+            # Режим, у якому накопичено стан (моделі без нього - статичні)
+            self.mode = (model_data.get('network_structure') or {}).get('mode', self.mode)
+            # created_at оновлюється при кожному update_bayesian_model
+            self.last_updated = _parse_timestamp(model_data.get('created_at'))
             
             if 'network_structure' not in model_data or 'cpt_parameters' not in model_data:
                 print("⚠ Немає структури мережі, будую стандартну")
                 self.build_network()
                 return True
             
+            if 'Difficulty' not in model_data['network_structure'].get('nodes', []):
+                print("⚠ Структура без вузла Difficulty, будую стандартну")
+                current_state = self.current_state
+                self.build_network()
+                if current_state:
+                    self.current_state = current_state
+                return True
+            
+            prototype = self._prototype(self.engine)
+            if _same_network(model_data, prototype._serialized):
+                # CPT не відрізняються від мережі за замовчуванням - без побудови й перевірки
+                self._share_prototype_model(prototype)
+                if not self.current_state:
+                    self.current_state = self.get_prior_distribution()
+                print(f"✓ Мережа за замовчуванням (спільна модель)")
+                return True
+            
             # Будуємо нову модель
             self.model = DiscreteBayesianNetwork()
+            self._shared_model = False
+            self._serialized = None
             
             # Додаємо вузли та зв'язки
             nodes = model_data['network_structure'].get('nodes', [])
@@ -437,8 +861,12 @@ class SimpleBayesianNetwork:
             self.model.check_model()
             print("✓ Модель перевірено")
             
+            # Синхронізуємо окремо збережені CPT навичок із завантаженими
+            for skill in self.skill_cpds:
+                self.skill_cpds[skill] = self.model.get_cpds(skill).get_values()
+            
             # Ініціалізація інференсу
-            self.inference = VariableElimination(self.model)
+            self._init_inference()
             
             # Якщо current_state порожній
             if not self.current_state:
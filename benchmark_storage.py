@@ -0,0 +1,105 @@
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from database import DatabaseManager
+from sharded_database import ShardedDatabaseManager
+from storage import InMemoryStorage
+from bayesian_network import SimpleBayesianNetwork
+
+TOPICS = ['algebra', 'geometry', 'functions']
+
+def run_simulation(storage, num_students: int = 20, answers_per_student: int = 10):
+    """Симуляція відповідей з окремим обліком часу сховища та інференсу"""
+    for topic in TOPICS:
+        for difficulty in ['easy', 'medium', 'hard']:
+            storage.create_task(topic, difficulty, "short_answer", "умова", "питання",
+                                "1", ["крок"])
+
+    storage_time = 0.0
+    inference_time = 0.0
+
+    for s in range(num_students):
+        user_id = storage.create_user(f"student_{s}", f"student_{s}@bench.demo")
+        # Мережа багато друкує - вимикаємо вивід, щоб не міряти термінал
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            bn = SimpleBayesianNetwork.from_prototype()
+            t1 = time.perf_counter()
+            bn.save_to_database(storage, user_id)
+            t2 = time.perf_counter()
+            inference_time += t1 - t0
+            storage_time += t2 - t1
+
+            for i in range(answers_per_student):
+                topic = TOPICS[i % len(TOPICS)]
+                is_correct = (s + i) % 3 != 0
+
+                t0 = time.perf_counter()
+                task = storage.get_tasks_by_topic(topic, limit=1)[0]
+                t1 = time.perf_counter()
+                bn.update_from_answer(is_correct, topic, task['difficulty'])
+                t2 = time.perf_counter()
+                bn.save_to_database(storage, user_id)
+                storage.create_answer(user_id, task['id'], "1", is_correct, 60)
+                t3 = time.perf_counter()
+
+                inference_time += t2 - t1
+                storage_time += (t1 - t0) + (t3 - t2)
+
+    return storage_time, inference_time
+
+def shard_throughput(num_shards: int, writers: int = 8, answers_per_writer: int = 200) -> float:
+    """Відповідей за секунду, коли writers потоків одночасно записують відповіді
+    своїх учнів (кожна відповідь - окрема транзакція)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = ShardedDatabaseManager(os.path.join(tmp, "shards"), num_shards)
+        task_id = storage.create_task("algebra", "easy", "short_answer", "умова", "питання",
+                                      "1", ["крок"])
+        students = [[storage.create_user(f"student_{w}_{s}", f"student_{w}_{s}@bench.demo")
+                     for s in range(4)] for w in range(writers)]
+
+        def write(user_ids):
+            for i in range(answers_per_writer):
+                storage.create_answer(user_ids[i % len(user_ids)], task_id, "1", True, 60)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=writers) as pool:
+            list(pool.map(write, students))
+        elapsed = time.perf_counter() - t0
+        storage.close()
+    return writers * answers_per_writer / elapsed
+
+def main(num_students: int = 20, answers_per_student: int = 10):
+    print("=" * 50)
+    print("ЧАС СХОВИЩА ПРОТИ ЧАСУ ІНФЕРЕНСУ")
+    print("=" * 50)
+
+    total_answers = num_students * answers_per_student
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [
+            ("SQLite", DatabaseManager(os.path.join(tmp, "bench.db"))),
+            ("Пам'ять", InMemoryStorage())
+        ]
+        for name, storage in backends:
+            storage_time, inference_time = run_simulation(storage, num_students, answers_per_student)
+            storage.close()
+            total = storage_time + inference_time
+            print(f"\n{name}:")
+            print(f"   Сховище:  {storage_time:.3f} с ({storage_time / total:.0%})")
+            print(f"   Інференс: {inference_time:.3f} с ({inference_time / total:.0%})")
+            print(f"   На відповідь: {total / total_answers * 1000:.2f} мс")
+
+    print("\n" + "=" * 50)
+    print("ПРОПУСКНА ЗДАТНІСТЬ ЗАПИСУ ЗА КІЛЬКІСТЮ ШАРДІВ")
+    print("=" * 50)
+    for num_shards in (1, 2, 4, 8):
+        print(f"   {num_shards} шард(и): {shard_throughput(num_shards):.0f} відповідей/с")
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,33 @@
+
+import argparse
+from datetime import datetime, timedelta, timezone
+from database import DatabaseManager
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Згортання старих відповідей у підсумки (учень, завдання) з архівуванням сирих рядків")
+    parser.add_argument("--db", default="adaptive_learning.db")
+    parser.add_argument("--archive-dir", default="answers_archive")
+    parser.add_argument("--before", default=None,
+                        help="згорнути відповіді, надіслані до цього моменту (YYYY-MM-DD HH:MM:SS, UTC)")
+    parser.add_argument("--days", type=int, default=180,
+                        help="без --before: згорнути відповіді, старші за стільки днів")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="одноразово перевести наявну БД у режим auto_vacuum = INCREMENTAL")
+    args = parser.parse_args()
+
+    before = args.before or datetime.now(timezone.utc) - timedelta(days=args.days)
+
+    db = DatabaseManager(args.db)
+    if args.enable_incremental_vacuum:
+        print("Повний VACUUM для переходу в режим INCREMENTAL...")
+        db.enable_incremental_vacuum()
+    report = db.compact_answers(before, args.archive_dir, args.chunk_size)
+    db.close()
+
+    print(f"Згорнуто відповідей: {report['archived']}")
+    if report['archive']:
+        print(f"Архів: {report['archive']}")
+    print(f"Звільнено сторінок БД: {report['freed_pages']}")
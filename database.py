@@ -1,20 +1,75 @@
 
 import sqlite3
 import json
-from datetime import datetime
+import gzip
+import hashlib
+import heapq
+import os
+import random
+from datetime import datetime, timezone
 import uuid
 from typing import Optional, Dict, Any, List
 import logging
+from storage import StorageBackend, _search_terms
+from task_cache import TaskBankCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class DatabaseManager:
+# Кожні CHECKPOINT_INTERVAL подій історії моделі зберігається повний стан
+CHECKPOINT_INTERVAL = 50
+
+# Стовпці рядків архіву відповідей (перший рядок кожного файлу архіву)
+ARCHIVE_COLUMNS = ['rowid', 'id', 'user_id', 'task_id', 'topic', 'difficulty',
+                   'user_response', 'is_correct', 'time_spent', 'submitted_at']
+
+def _compact_state(current_state: Dict) -> Dict[str, float]:
+    """Компактний стан моделі: лише P(High) для кожної навички"""
+    return {skill: round(float(dist.get('High', 0)), 6) for skill, dist in current_state.items()}
+
+def _expand_state(compact: Dict[str, float]) -> Dict:
+    """Компактний стан -> формат current_state"""
+    return {skill: {'Low': round(1 - high, 6), 'High': high} for skill, high in compact.items()}
+
+def _format_timestamp(value) -> str:
+    """datetime або рядок -> формат CURRENT_TIMESTAMP SQLite (UTC)"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+def _chunked(rows, chunk_size: int):
+    """Рядки потоку порціями по chunk_size"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _normalize_json(value):
+    """Вигляд значення після збереження в JSON (кортежі стають списками)"""
+    return json.loads(json.dumps(value, ensure_ascii=False))
+
+class DatabaseManager(StorageBackend):
     """Менеджер бази даних SQLite для системи адаптивного навчання"""
     
     def __init__(self, db_path: str = "adaptive_learning.db"):
         self.db_path = db_path
         self.connection = None
+        # Розібрані шаблони моделей: незмінні, тож кешуються на весь час роботи
+        self._templates = {}
+        # Чи доступний повнотекстовий індекс завдань (SQLite зібрано з FTS5)
+        self._fts = False
+        # Кеш банку завдань; покоління банку веде БД (див. task_bank_generation)
+        self._task_cache = TaskBankCache()
+        # PRAGMA data_version, за якого покоління востаннє читалось із БД
+        # (None - перечитати: нове з'єднання або власний запис у tasks)
+        self._data_version = None
+        self._generation = None
         self._init_db()
     
     def _get_connection(self):
@@ -22,6 +77,9 @@ class DatabaseManager:
         if self.connection is None:
             self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
             self.connection.row_factory = sqlite3.Row
+            # LOWER/LIKE SQLite зводять регістр лише для ASCII
+            self.connection.create_function('casefold', 1, str.casefold, deterministic=True)
+            self._data_version = None
         return self.connection
     
     def _init_db(self):
@@ -30,7 +88,105 @@ class DatabaseManager:
         cursor = conn.cursor()
         
         cursor.execute("PRAGMA foreign_keys = ON")
+        # Діє лише для нової БД: місце після компактації звільняється поступово
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        
+        self._create_task_tables(cursor)
+        self._create_user_tables(cursor)
+        self._migrate_user_tables(cursor)
+        
+        conn.commit()
+        logger.info("База даних ініціалізована")
+    
+    def _create_task_tables(self, cursor):
+        """Таблиці спільного банку завдань"""
+        # Завдання
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY,
+            topic TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            task_type TEXT NOT NULL,
+            condition TEXT NOT NULL,
+            question TEXT NOT NULL,
+            correct_answer TEXT NOT NULL,
+            solution_steps TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_topic ON tasks(topic)")
+        
+        # Покоління банку: тригери збільшують його за будь-якої зміни tasks
+        # (з будь-якого з'єднання чи процесу), кеші завдань порівнюють його зі своїм
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS task_bank_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO task_bank_version (id, generation) VALUES (1, 0)")
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS tasks_generation_{event.lower()} AFTER {event} ON tasks BEGIN
+                UPDATE task_bank_version SET generation = generation + 1;
+            END
+            ''')
+        
+        self._fts = self._create_task_search(cursor)
+    
+    def _create_task_search(self, cursor) -> bool:
+        """Повнотекстовий індекс умов і запитань, синхронізований тригерами
+        
+        Індекс із зовнішнім вмістом: тексти лежать лише в tasks, рядки
+        індексу адресуються rowid завдання."""
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'tasks_fts'")
+        row = cursor.fetchone()
+        if row is not None and 'content_rowid' not in row[0]:
+            # Індекс попереднього формату з копією текстів і task_id - перебудовуємо
+            for trigger in ('tasks_fts_insert', 'tasks_fts_delete', 'tasks_fts_update'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute("DROP TABLE tasks_fts")
+            row = None
+        try:
+            cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+                condition, question, tokenize = 'unicode61',
+                content = 'tasks', content_rowid = 'rowid'
+            )
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 недоступний, пошук завдань без індексу: {e}")
+            return False
+        
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, condition, question)
+            VALUES (new.rowid, new.condition, new.question);
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, condition, question)
+            VALUES ('delete', old.rowid, old.condition, old.question);
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF condition, question ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, condition, question)
+            VALUES ('delete', old.rowid, old.condition, old.question);
+            INSERT INTO tasks_fts (rowid, condition, question)
+            VALUES (new.rowid, new.condition, new.question);
+        END
+        ''')
         
+        if row is None:
+            # Індекс щойно створено для наявного банку - заповнюємо один раз
+            cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+        return True
+    
+    def _create_user_tables(self, cursor, task_foreign_key: bool = True):
+        """Таблиці, прив'язані до користувача"""
         # Користувачі
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -42,35 +198,35 @@ class DatabaseManager:
         )
         ''')
         
-        # Байєсові моделі
+        # Шаблони моделей: структура та CPT, спільні для всіх моделей з такою структурою
         cursor.execute('''
-        CREATE TABLE IF NOT EXISTS bayesian_models (
+        CREATE TABLE IF NOT EXISTS model_templates (
             id TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
             network_structure TEXT NOT NULL,
             cpt_parameters TEXT NOT NULL,
-            current_state TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         ''')
         
-        # Завдання
+        # Байєсові моделі (для моделей з шаблоном cpt_parameters містить лише
+        # CPT, що відрізняються від шаблону, а network_structure порожня)
         cursor.execute('''
-        CREATE TABLE IF NOT EXISTS tasks (
+        CREATE TABLE IF NOT EXISTS bayesian_models (
             id TEXT PRIMARY KEY,
-            topic TEXT NOT NULL,
-            difficulty TEXT NOT NULL,
-            task_type TEXT NOT NULL,
-            condition TEXT NOT NULL,
-            question TEXT NOT NULL,
-            correct_answer TEXT NOT NULL,
-            solution_steps TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            user_id TEXT NOT NULL,
+            network_structure TEXT NOT NULL,
+            cpt_parameters TEXT NOT NULL,
+            current_state TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            template_id TEXT REFERENCES model_templates(id),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
         )
         ''')
         
-        # Відповіді
+        # Відповіді (зовнішній ключ на tasks лише коли банк завдань у тій самій БД)
+        task_fk = ""
+        if task_foreign_key:
+            task_fk = ",\n            FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE"
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS answers (
             id TEXT PRIMARY KEY,
@@ -80,24 +236,152 @@ class DatabaseManager:
             is_correct BOOLEAN,
             time_spent INTEGER,
             submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-            FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE{task_fk}
+        )
+        '''.format(task_fk=task_fk))
+        
+        # Історія моделей: компактні зміни стану (лише додавання)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS model_events (
+            user_id TEXT NOT NULL,
+            event_no INTEGER NOT NULL,
+            changes TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, event_no),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        ''')
+        
+        # Повні знімки стану кожні CHECKPOINT_INTERVAL подій
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS model_checkpoints (
+            user_id TEXT NOT NULL,
+            event_no INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, event_no),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        ''')
+        
+        # P(High) кожної навички окремими числовими рядками для запитів по когортах
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS skill_mastery (
+            user_id TEXT NOT NULL,
+            skill TEXT NOT NULL,
+            p_high REAL NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, skill),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        ''')
+        
+        # Лічильники відповідей учня за темами (оновлюються разом із записом відповіді)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_topic_stats (
+            user_id TEXT NOT NULL,
+            topic TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            time_spent INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, topic),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        ''')
+        
+        # Підсумки відповідей, згорнутих компактацією: один рядок на (учень, завдання)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS answer_summaries (
+            user_id TEXT NOT NULL,
+            task_id TEXT NOT NULL,
+            attempts INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            time_spent INTEGER NOT NULL,
+            first_submitted_at TIMESTAMP,
+            last_submitted_at TIMESTAMP,
+            PRIMARY KEY (user_id, task_id),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        ''')
+        
+        # Файли архіву сирих відповідей (читаються лише зареєстровані)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS answer_archives (
+            path TEXT PRIMARY KEY,
+            first_rowid INTEGER NOT NULL,
+            last_rowid INTEGER NOT NULL,
+            answers INTEGER NOT NULL,
+            submitted_before TIMESTAMP NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         ''')
         
         # Індекси
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_answers_user ON answers(user_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_answers_task ON answers(task_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_topic ON tasks(topic)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_bayesian_models_user ON bayesian_models(user_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_model_events_time ON model_events(user_id, created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_skill_mastery_skill ON skill_mastery(skill, p_high)")
+    
+    def _migrate_user_tables(self, cursor):
+        """Доповнення даних, створених попередніми версіями схеми"""
+        # Посилання на шаблон і дедуплікація структури та CPT наявних моделей
+        cursor.execute("PRAGMA table_info(bayesian_models)")
+        if 'template_id' not in [row['name'] for row in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE bayesian_models ADD COLUMN template_id TEXT "
+                           "REFERENCES model_templates(id)")
+        cursor.execute('''
+        SELECT id, network_structure, cpt_parameters FROM bayesian_models
+        WHERE template_id IS NULL
+        ''')
+        for row in cursor.fetchall():
+            template_id, overrides = self._split_by_template(
+                cursor, json.loads(row['network_structure']), json.loads(row['cpt_parameters']))
+            cursor.execute('''
+            UPDATE bayesian_models
+            SET template_id = ?, network_structure = '{}', cpt_parameters = ?
+            WHERE id = ?
+            ''', (template_id, json.dumps(overrides, ensure_ascii=False), row['id']))
         
-        conn.commit()
-        logger.info("База даних ініціалізована")
+        # Початкові знімки для моделей, створених до появи історії
+        cursor.execute('''
+        SELECT m.user_id, m.current_state, m.created_at FROM bayesian_models m
+        WHERE NOT EXISTS (SELECT 1 FROM model_checkpoints c WHERE c.user_id = m.user_id)
+        ''')
+        for row in cursor.fetchall():
+            cursor.execute('''
+            INSERT INTO model_checkpoints (user_id, event_no, state, created_at)
+            VALUES (?, 0, ?, ?)
+            ''', (row['user_id'], json.dumps(_compact_state(json.loads(row['current_state']))),
+                  row['created_at']))
+        
+        # Числові стовпці засвоєння для моделей, створених до їх появи
+        cursor.execute('''
+        SELECT m.user_id, m.current_state FROM bayesian_models m
+        WHERE NOT EXISTS (SELECT 1 FROM skill_mastery s WHERE s.user_id = m.user_id)
+        ''')
+        for row in cursor.fetchall():
+            self._write_mastery(cursor, row['user_id'], json.loads(row['current_state']))
+        
+        # Лічильники за темами для відповідей, записаних до появи user_topic_stats
+        cursor.execute("SELECT 1 FROM user_topic_stats LIMIT 1")
+        if cursor.fetchone() is None:
+            cursor.execute('''
+            INSERT INTO user_topic_stats (user_id, topic, total, correct, time_spent)
+            SELECT a.user_id, t.topic, COUNT(*),
+                   SUM(CASE WHEN a.is_correct = 1 THEN 1 ELSE 0 END),
+                   COALESCE(SUM(a.time_spent), 0)
+            FROM answers a
+            JOIN tasks t ON a.task_id = t.id
+            GROUP BY a.user_id, t.topic
+            ''')
     
     # ========== КОРИСТУВАЧІ ==========
     
-    def create_user(self, username: str, email: str, role: str = "student") -> str:
+    def create_user(self, username: str, email: str, role: str = "student",
+                    user_id: Optional[str] = None) -> str:
         """Створення нового користувача"""
-        user_id = str(uuid.uuid4())
+        user_id = user_id or str(uuid.uuid4())
         conn = self._get_connection()
         cursor = conn.cursor()
         
@@ -121,20 +405,63 @@ class DatabaseManager:
     
     # ========== БАЙЄСОВІ МОДЕЛІ ==========
     
+    def _get_template(self, cursor, template_id: str):
+        """(network_structure, cpt_parameters) шаблону з кешу процесу або з БД"""
+        template = self._templates.get(template_id)
+        if template is None:
+            cursor.execute('''
+            SELECT network_structure, cpt_parameters FROM model_templates WHERE id = ?
+            ''', (template_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            template = (json.loads(row['network_structure']), json.loads(row['cpt_parameters']))
+            self._templates[template_id] = template
+        return template
+    
+    def _split_by_template(self, cursor, network_structure: Dict, cpt_parameters: Dict):
+        """Шаблон для структури (створюється за потреби) та CPT, що від нього відрізняються"""
+        structure_json = json.dumps(network_structure, ensure_ascii=False, sort_keys=True)
+        template_id = hashlib.sha1(structure_json.encode('utf-8')).hexdigest()
+        cpt_parameters = _normalize_json(cpt_parameters)
+        
+        template = self._get_template(cursor, template_id)
+        if template is None:
+            # Перша модель з такою структурою стає шаблоном
+            cursor.execute('''
+            INSERT INTO model_templates (id, network_structure, cpt_parameters)
+            VALUES (?, ?, ?)
+            ''', (template_id, structure_json, json.dumps(cpt_parameters, ensure_ascii=False)))
+            return template_id, {}
+        
+        template_cpts = template[1]
+        overrides = {var: params for var, params in cpt_parameters.items()
+                     if template_cpts.get(var) != params}
+        return template_id, overrides
+    
     def create_bayesian_model(self, user_id: str, network_structure: Dict, 
                               cpt_parameters: Dict, current_state: Dict) -> str:
-        """Створення Байєсової моделі"""
+        """Створення Байєсової моделі (зберігаються лише відмінності від шаблону)"""
         model_id = str(uuid.uuid4())
         conn = self._get_connection()
         cursor = conn.cursor()
         
+        template_id, overrides = self._split_by_template(cursor, network_structure, cpt_parameters)
+        cursor.execute('''
+        INSERT INTO bayesian_models (id, user_id, network_structure, cpt_parameters,
+                                     current_state, template_id)
+        VALUES (?, ?, '{}', ?, ?, ?)
+        ''', (model_id, user_id,
+              json.dumps(overrides, ensure_ascii=False),
+              json.dumps(current_state, ensure_ascii=False),
+              template_id))
+        
+        # Початковий знімок історії
         cursor.execute('''
-        INSERT INTO bayesian_models (id, user_id, network_structure, cpt_parameters, current_state)
-        VALUES (?, ?, ?, ?, ?)
-        ''', (model_id, user_id, 
-              json.dumps(network_structure, ensure_ascii=False),
-              json.dumps(cpt_parameters, ensure_ascii=False),
-              json.dumps(current_state, ensure_ascii=False)))
+        INSERT OR REPLACE INTO model_checkpoints (user_id, event_no, state)
+        VALUES (?, 0, ?)
+        ''', (user_id, json.dumps(_compact_state(current_state))))
+        self._write_mastery(cursor, user_id, current_state)
         
         conn.commit()
         return model_id
@@ -143,6 +470,17 @@ class DatabaseManager:
         """Оновлення стану Байєсової моделі"""
         conn = self._get_connection()
         cursor = conn.cursor()
+        updated = self._update_model_state(cursor, user_id, current_state)
+        conn.commit()
+        return updated
+    
+    def _update_model_state(self, cursor, user_id: str, current_state: Dict) -> bool:
+        """Новий стан моделі, подія історії та засвоєння (без commit);
+        False, якщо моделі користувача немає"""
+        cursor.execute("SELECT current_state FROM bayesian_models WHERE user_id = ?", (user_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return False
         
         cursor.execute('''
         UPDATE bayesian_models 
@@ -150,8 +488,149 @@ class DatabaseManager:
         WHERE user_id = ?
         ''', (json.dumps(current_state, ensure_ascii=False), user_id))
         
-        conn.commit()
-        return cursor.rowcount > 0
+        self._record_model_event(cursor, user_id, json.loads(row['current_state']), current_state)
+        self._write_mastery(cursor, user_id, current_state)
+        return True
+    
+    def _record_model_event(self, cursor, user_id: str, previous_state: Dict,
+                            current_state: Dict):
+        """Додавання події історії (без commit): лише навички, змінені відносно
+        попереднього current_state (він збігається зі станом після останньої події)"""
+        cursor.execute('''
+        SELECT COALESCE(MAX(event_no), 0) FROM model_events WHERE user_id = ?
+        ''', (user_id,))
+        event_no = cursor.fetchone()[0] + 1
+        
+        state = _compact_state(current_state)
+        previous = _compact_state(previous_state)
+        changes = {skill: high for skill, high in state.items() if previous.get(skill) != high}
+        
+        cursor.execute('''
+        INSERT INTO model_events (user_id, event_no, changes)
+        VALUES (?, ?, ?)
+        ''', (user_id, event_no, json.dumps(changes)))
+        
+        if event_no % CHECKPOINT_INTERVAL == 0:
+            cursor.execute('''
+            INSERT OR REPLACE INTO model_checkpoints (user_id, event_no, state)
+            VALUES (?, ?, ?)
+            ''', (user_id, event_no, json.dumps(state)))
+    
+    def _write_mastery(self, cursor, user_id: str, current_state: Dict):
+        """Синхронізація skill_mastery з current_state (без commit)"""
+        cursor.executemany('''
+        INSERT INTO skill_mastery (user_id, skill, p_high, updated_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (user_id, skill) DO UPDATE SET
+            p_high = excluded.p_high,
+            updated_at = excluded.updated_at
+        ''', [(user_id, skill, float(dist.get('High', 0)))
+              for skill, dist in current_state.items()])
+    
+    def get_students_by_mastery(self, skill: str, max_p_high: Optional[float] = None,
+                                min_p_high: Optional[float] = None,
+                                limit: Optional[int] = None,
+                                ascending: bool = True) -> List[Dict]:
+        """Учні, відфільтровані й відсортовані за P(High) навички (через індекс)"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        query = "SELECT user_id, p_high, updated_at FROM skill_mastery WHERE skill = ?"
+        params = [skill]
+        if max_p_high is not None:
+            query += " AND p_high < ?"
+            params.append(max_p_high)
+        if min_p_high is not None:
+            query += " AND p_high >= ?"
+            params.append(min_p_high)
+        query += " ORDER BY p_high " + ("ASC" if ascending else "DESC")
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def get_top_at_risk(self, skill: str, k: int = 10) -> List[Dict]:
+        """k учнів з найменшою P(High) навички"""
+        return self.get_students_by_mastery(skill, limit=k)
+    
+    def _state_at_event(self, cursor, user_id: str, event_no: int) -> Dict[str, float]:
+        """Компактний стан після події event_no: знімок + не більше CHECKPOINT_INTERVAL подій"""
+        cursor.execute('''
+        SELECT event_no, state FROM model_checkpoints
+        WHERE user_id = ? AND event_no <= ?
+        ORDER BY event_no DESC LIMIT 1
+        ''', (user_id, event_no))
+        checkpoint = cursor.fetchone()
+        if checkpoint is None:
+            return {}
+        
+        state = json.loads(checkpoint['state'])
+        cursor.execute('''
+        SELECT changes FROM model_events
+        WHERE user_id = ? AND event_no > ? AND event_no <= ?
+        ORDER BY event_no
+        ''', (user_id, checkpoint['event_no'], event_no))
+        for row in cursor.fetchall():
+            state.update(json.loads(row['changes']))
+        return state
+    
+    def get_model_state_at(self, user_id: str, timestamp) -> Optional[Dict]:
+        """Відновлення стану моделі на момент часу з найближчого знімка"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        timestamp = _format_timestamp(timestamp)
+        
+        cursor.execute('''
+        SELECT MAX(event_no) FROM model_events
+        WHERE user_id = ? AND created_at <= ?
+        ''', (user_id, timestamp))
+        event_no = cursor.fetchone()[0]
+        
+        if event_no is None:
+            # Подій до цього моменту не було - лише початковий знімок
+            cursor.execute('''
+            SELECT 1 FROM model_checkpoints
+            WHERE user_id = ? AND event_no = 0 AND created_at <= ?
+            ''', (user_id, timestamp))
+            if cursor.fetchone() is None:
+                return None
+            event_no = 0
+        
+        return _expand_state(self._state_at_event(cursor, user_id, event_no))
+    
+    def get_model_trajectory(self, user_id: str, start=None, end=None) -> List[Dict]:
+        """Траєкторія засвоєння за проміжок часу (сканування діапазону подій)"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        query = "SELECT event_no, changes, created_at FROM model_events WHERE user_id = ?"
+        params = [user_id]
+        if start is not None:
+            query += " AND created_at >= ?"
+            params.append(_format_timestamp(start))
+        if end is not None:
+            query += " AND created_at <= ?"
+            params.append(_format_timestamp(end))
+        query += " ORDER BY event_no"
+        
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        if not rows:
+            return []
+        
+        # Стан перед першою подією діапазону, далі накопичуємо зміни
+        state = self._state_at_event(cursor, user_id, rows[0]['event_no'] - 1)
+        trajectory = []
+        for row in rows:
+            state.update(json.loads(row['changes']))
+            trajectory.append({
+                'event_no': row['event_no'],
+                'created_at': row['created_at'],
+                'state': dict(state)
+            })
+        return trajectory
     
     def get_bayesian_model(self, user_id: str) -> Optional[Dict]:
         """Отримання Байєсової моделі користувача"""
@@ -167,6 +646,15 @@ class DatabaseManager:
             data['network_structure'] = json.loads(data['network_structure'])
             data['cpt_parameters'] = json.loads(data['cpt_parameters'])
             data['current_state'] = json.loads(data['current_state'])
+            
+            template = self._get_template(cursor, data['template_id']) if data['template_id'] else None
+            if template is not None:
+                # Структура та CPT з шаблону (списки значень спільні з кешем - лише читання)
+                structure, template_cpts = template
+                cpt_parameters = {var: dict(params) for var, params in template_cpts.items()}
+                cpt_parameters.update(data['cpt_parameters'])
+                data['network_structure'] = dict(structure)
+                data['cpt_parameters'] = cpt_parameters
             return data
         return None
     
@@ -176,8 +664,12 @@ class DatabaseManager:
         cursor = conn.cursor()
         
         cursor.execute("DELETE FROM bayesian_models WHERE user_id = ?", (user_id,))
+        deleted = cursor.rowcount > 0
+        cursor.execute("DELETE FROM model_events WHERE user_id = ?", (user_id,))
+        cursor.execute("DELETE FROM model_checkpoints WHERE user_id = ?", (user_id,))
+        cursor.execute("DELETE FROM skill_mastery WHERE user_id = ?", (user_id,))
         conn.commit()
-        return cursor.rowcount > 0
+        return deleted
     
     # ========== ЗАВДАННЯ ==========
     
@@ -196,41 +688,141 @@ class DatabaseManager:
               correct_answer, json.dumps(solution_steps, ensure_ascii=False)))
         
         conn.commit()
+        self._data_version = None
         return task_id
     
-    def get_task(self, task_id: str) -> Optional[Dict]:
-        """Отримання завдання за ID"""
+    def create_tasks_bulk(self, tasks: List[Dict]) -> List[str]:
+        """Імпорт пакета завдань одним commit (індекс пошуку оновлюють тригери)"""
+        rows = [(str(uuid.uuid4()), task['topic'], task['difficulty'], task['task_type'],
+                 task['condition'], task['question'], task['correct_answer'],
+                 json.dumps(task['solution_steps'], ensure_ascii=False))
+                for task in tasks]
         conn = self._get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("SELECT * FROM tasks WHERE id = ?", (task_id,))
-        row = cursor.fetchone()
+        try:
+            cursor.executemany('''
+            INSERT INTO tasks (id, topic, difficulty, task_type, condition, question, correct_answer, solution_steps)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        except Exception:
+            conn.rollback()
+            raise
         
-        if row:
-            data = dict(row)
-            data['solution_steps'] = json.loads(data['solution_steps'])
-            return data
-        return None
+        conn.commit()
+        self._data_version = None
+        return [row[0] for row in rows]
+    
+    def task_bank_generation(self) -> int:
+        """Поточне покоління банку завдань у БД
+        
+        PRAGMA data_version змінюється лише після комітів інших з'єднань, тож
+        таблиця поколінь перечитується тільки тоді або після власних записів
+        у tasks через методи менеджера. Прямий SQL до tasks через це ж
+        з'єднання кеш не помічає."""
+        conn = self._get_connection()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._generation = conn.execute("SELECT generation FROM task_bank_version").fetchone()[0]
+            self._data_version = data_version
+        return self._generation
     
-    def get_tasks_by_topic(self, topic: str, limit: int = 10) -> List[Dict]:
-        """Отримання завдань за темою"""
+    def _cached_topic(self, topic: str) -> Dict:
+        """Завдання теми з кешу, згруповані за складністю (None - усі)"""
+        self._task_cache.sync(self.task_bank_generation())
+        groups = self._task_cache.topic(topic)
+        if groups is None:
+            cursor = self._get_connection().cursor()
+            cursor.execute("SELECT * FROM tasks WHERE topic = ?", (topic,))
+            groups = self._task_cache.put_topic(topic, cursor.fetchall())
+        return groups
+    
+    def get_task(self, task_id: str) -> Optional[Dict]:
+        """Отримання завдання за ID (з кешу банку, лише для читання)"""
+        self._task_cache.sync(self.task_bank_generation())
+        task = self._task_cache.get(task_id)
+        if task is None:
+            cursor = self._get_connection().cursor()
+            cursor.execute("SELECT * FROM tasks WHERE id = ?", (task_id,))
+            row = cursor.fetchone()
+            if row:
+                task = self._task_cache.add(row)
+        return task
+    
+    def get_tasks_by_topic(self, topic: str, limit: int = 10,
+                           difficulty: Optional[str] = None) -> List[Dict]:
+        """Випадкові завдання теми (з кешу банку, лише для читання)"""
+        tasks = self._cached_topic(topic).get(difficulty, [])
+        return random.sample(tasks, min(limit, len(tasks)))
+    
+    def get_task_candidates(self, topic: Optional[str] = None,
+                            exclude_user_id: Optional[str] = None,
+                            limit: int = 500) -> List[Dict]:
+        """Легкі записи завдань-кандидатів (без розбору solution_steps)"""
+        if topic is not None and exclude_user_id is None:
+            return self._cached_topic(topic)[None][:limit]
+        
         conn = self._get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-        SELECT * FROM tasks 
-        WHERE topic = ? 
-        ORDER BY RANDOM() 
-        LIMIT ?
-        ''', (topic, limit))
+        query = "SELECT t.id, t.topic, t.difficulty FROM tasks t WHERE 1 = 1"
+        params = []
+        if topic is not None:
+            query += " AND t.topic = ?"
+            params.append(topic)
+        if exclude_user_id is not None:
+            # Пропускаємо завдання, на які учень уже відповідав (зокрема згорнуті)
+            query += '''
+            AND NOT EXISTS (
+                SELECT 1 FROM answers a
+                WHERE a.task_id = t.id AND a.user_id = ?
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM answer_summaries s
+                WHERE s.task_id = t.id AND s.user_id = ?
+            )'''
+            params += [exclude_user_id, exclude_user_id]
+        query += " LIMIT ?"
+        params.append(limit)
         
-        tasks = []
-        for row in cursor.fetchall():
-            task = dict(row)
-            task['solution_steps'] = json.loads(task['solution_steps'])
-            tasks.append(task)
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def search_tasks(self, text: str, topic: Optional[str] = None,
+                     difficulty: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """Ранжований (BM25) пошук завдань за словами умови та запитання"""
+        terms = _search_terms(text)
+        if not terms:
+            return []
+        conn = self._get_connection()
+        cursor = conn.cursor()
         
-        return tasks
+        columns = "t.id, t.topic, t.difficulty, t.task_type, t.condition, t.question, t.correct_answer"
+        if self._fts:
+            # Кожне слово - префіксний запит: "рівнян" знаходить "рівняння", "рівнянь"
+            query = f'''
+            SELECT {columns}, -bm25(tasks_fts) AS score
+            FROM tasks_fts JOIN tasks t ON t.rowid = tasks_fts.rowid
+            WHERE tasks_fts MATCH ?'''
+            params = [' '.join(f'"{term}"*' for term in terms)]
+        else:
+            # Слова запиту вже зведені casefold, тексти зводимо так само
+            query = f"SELECT {columns}, 0.0 AS score FROM tasks t WHERE 1 = 1"
+            params = []
+            for term in terms:
+                query += " AND instr(casefold(t.condition || ' ' || t.question), ?) > 0"
+                params.append(term)
+        if topic is not None:
+            query += " AND t.topic = ?"
+            params.append(topic)
+        if difficulty is not None:
+            query += " AND t.difficulty = ?"
+            params.append(difficulty)
+        query += " ORDER BY score DESC LIMIT ?"
+        params.append(limit)
+        
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
     
     # ========== ВІДПОВІДІ ==========
     
@@ -245,12 +837,71 @@ class DatabaseManager:
         INSERT INTO answers (id, user_id, task_id, user_response, is_correct, time_spent)
         VALUES (?, ?, ?, ?, ?, ?)
         ''', (answer_id, user_id, task_id, user_response, is_correct, time_spent))
+        self._bump_topic_stats(cursor, user_id, task_id, is_correct, time_spent)
+        
+        conn.commit()
+        return answer_id
+    
+    def create_answers(self, answers: List[tuple]) -> List[str]:
+        """Запис пакета відповідей (user_id, task_id, user_response, is_correct, time_spent)
+        одним commit"""
+        rows = [(str(uuid.uuid4()), user_id, task_id, user_response, is_correct, time_spent)
+                for user_id, task_id, user_response, is_correct, time_spent in answers]
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.executemany('''
+            INSERT INTO answers (id, user_id, task_id, user_response, is_correct, time_spent)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            for _, user_id, task_id, _, is_correct, time_spent in rows:
+                self._bump_topic_stats(cursor, user_id, task_id, is_correct, time_spent)
+        except Exception:
+            conn.rollback()
+            raise
+        
+        conn.commit()
+        return [row[0] for row in rows]
+    
+    def _bump_topic_stats(self, cursor, user_id: str, task_id: str,
+                          is_correct: bool, time_spent: int):
+        """Збільшення лічильників теми завдання (без commit)"""
+        cursor.execute('''
+        INSERT INTO user_topic_stats (user_id, topic, total, correct, time_spent)
+        SELECT ?, topic, 1, ?, ? FROM tasks WHERE id = ?
+        ON CONFLICT (user_id, topic) DO UPDATE SET
+            total = total + 1,
+            correct = correct + excluded.correct,
+            time_spent = time_spent + excluded.time_spent
+        ''', (user_id, 1 if is_correct else 0, time_spent or 0, task_id))
+    
+    def submit_answer(self, user_id: str, task_id: str, user_response: str,
+                      is_correct: bool, time_spent: int, current_state: Dict) -> str:
+        """Відповідь, новий стан моделі, історія, засвоєння та статистика - одним commit"""
+        answer_id = str(uuid.uuid4())
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            if not self._update_model_state(cursor, user_id, current_state):
+                raise ValueError(f"Модель користувача {user_id} не знайдена")
+            
+            cursor.execute('''
+            INSERT INTO answers (id, user_id, task_id, user_response, is_correct, time_spent)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', (answer_id, user_id, task_id, user_response, is_correct, time_spent))
+            
+            self._bump_topic_stats(cursor, user_id, task_id, is_correct, time_spent)
+        except Exception:
+            conn.rollback()
+            raise
         
         conn.commit()
         return answer_id
     
     def get_user_answers(self, user_id: str) -> List[Dict]:
-        """Отримання всіх відповідей користувача"""
+        """Отримання всіх відповідей користувача (крім згорнутих компактацією)"""
         conn = self._get_connection()
         cursor = conn.cursor()
         
@@ -273,34 +924,25 @@ class DatabaseManager:
         conn = self._get_connection()
         cursor = conn.cursor()
         
-        # Загальна статистика
+        # Статистика по темах з лічильників (без сканування answers)
         cursor.execute('''
-        SELECT 
-            COUNT(*) as total_answers,
-            SUM(CASE WHEN is_correct = 1 THEN 1 ELSE 0 END) as correct_answers,
-            AVG(time_spent) as avg_time_spent
-        FROM answers 
+        SELECT topic, total, correct, time_spent
+        FROM user_topic_stats
         WHERE user_id = ?
         ''', (user_id,))
+        rows = [dict(row) for row in cursor.fetchall()]
         
-        stats_row = cursor.fetchone()
-        stats = dict(stats_row) if stats_row else {}
-        
-        # Статистика по темах
-        cursor.execute('''
-        SELECT 
-            t.topic,
-            COUNT(*) as total,
-            SUM(CASE WHEN a.is_correct = 1 THEN 1 ELSE 0 END) as correct
-        FROM answers a
-        JOIN tasks t ON a.task_id = t.id
-        WHERE a.user_id = ?
-        GROUP BY t.topic
-        ''', (user_id,))
+        # Загальна статистика
+        total = sum(row['total'] for row in rows)
+        stats = {
+            'total_answers': total,
+            'correct_answers': sum(row['correct'] for row in rows) if total else None,
+            'avg_time_spent': sum(row['time_spent'] for row in rows) / total if total else None
+        }
         
         stats['by_topic'] = []
-        for row in cursor.fetchall():
-            topic_stats = dict(row)
+        for row in rows:
+            topic_stats = {'topic': row['topic'], 'total': row['total'], 'correct': row['correct']}
             if topic_stats['total'] > 0:
                 topic_stats['accuracy'] = topic_stats['correct'] / topic_stats['total']
             else:
@@ -309,6 +951,205 @@ class DatabaseManager:
         
         return stats
     
+    def get_task_answer_stats(self) -> List[Dict]:
+        """Кількість відповідей та правильних відповідей для кожного завдання
+        (разом із підсумками відповідей, згорнутих компактацією)"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        SELECT 
+            t.id as task_id,
+            t.topic,
+            t.difficulty,
+            SUM(s.total) as total,
+            SUM(s.correct) as correct
+        FROM (
+            SELECT task_id, COUNT(*) as total,
+                   SUM(CASE WHEN is_correct = 1 THEN 1 ELSE 0 END) as correct
+            FROM answers
+            GROUP BY task_id
+            UNION ALL
+            SELECT task_id, SUM(attempts), SUM(correct)
+            FROM answer_summaries
+            GROUP BY task_id
+        ) s
+        JOIN tasks t ON s.task_id = t.id
+        GROUP BY t.id
+        ''')
+        
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def iter_answer_chunks(self, after_rowid: int = 0, chunk_size: int = 10000,
+                           by_time: bool = False):
+        """Потокове читання журналу відповідей (з темою та складністю) порціями
+        за rowid або (by_time) за часом відповіді"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        order = "a.submitted_at, a.rowid" if by_time else "a.rowid"
+        cursor.execute(f'''
+        SELECT a.rowid as rowid, a.user_id, a.task_id, t.topic, t.difficulty,
+               a.is_correct, a.time_spent, a.submitted_at
+        FROM answers a
+        JOIN tasks t ON a.task_id = t.id
+        WHERE a.rowid > ?
+        ORDER BY {order}
+        ''', (after_rowid,))
+        
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    
+    # ========== КОМПАКТАЦІЯ ВІДПОВІДЕЙ ==========
+    
+    def compact_answers(self, before, archive_dir: str, chunk_size: int = 10000) -> Dict:
+        """Згортання відповідей, надісланих до before, у підсумки (учень, завдання)
+        з перенесенням сирих рядків у стиснений архів; повертає звіт"""
+        before = _format_timestamp(before)
+        os.makedirs(archive_dir, exist_ok=True)
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        # Рядок з найбільшим rowid лишається: інакше SQLite видав би його rowid повторно,
+        # а export_answers дописує нові відповіді саме за rowid
+        selection = '''
+        FROM answers a
+        WHERE a.submitted_at < ? AND a.rowid < (SELECT MAX(rowid) FROM answers)'''
+        
+        if conn.in_transaction:
+            conn.commit()
+        cursor.execute("BEGIN IMMEDIATE")
+        path = None
+        try:
+            cursor.execute(f"SELECT COUNT(*), MIN(a.rowid), MAX(a.rowid) {selection}", (before,))
+            count, first_rowid, last_rowid = cursor.fetchone()
+            if count == 0:
+                conn.rollback()
+                return {'archived': 0, 'archive': None, 'freed_pages': 0}
+            
+            # Архів пишеться до видалення рядків; файл без запису в answer_archives ігнорується
+            stem = os.path.splitext(os.path.basename(self.db_path))[0]
+            path = os.path.abspath(os.path.join(
+                archive_dir, f"{stem}_answers_{first_rowid}-{last_rowid}.jsonl.gz"))
+            tmp_path = path + ".tmp"
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+                f.write(json.dumps(ARCHIVE_COLUMNS) + "\n")
+                cursor.execute(f'''
+                SELECT a.rowid, a.id, a.user_id, a.task_id, t.topic, t.difficulty,
+                       a.user_response, a.is_correct, a.time_spent, a.submitted_at
+                FROM answers a
+                LEFT JOIN tasks t ON a.task_id = t.id
+                WHERE a.rowid IN (SELECT a.rowid {selection})
+                ORDER BY a.submitted_at, a.rowid
+                ''', (before,))
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    f.writelines(json.dumps(list(row), ensure_ascii=False) + "\n" for row in rows)
+            os.replace(tmp_path, path)
+            
+            cursor.execute(f'''
+            INSERT INTO answer_summaries (user_id, task_id, attempts, correct, time_spent,
+                                          first_submitted_at, last_submitted_at)
+            SELECT a.user_id, a.task_id, COUNT(*),
+                   SUM(CASE WHEN a.is_correct = 1 THEN 1 ELSE 0 END),
+                   COALESCE(SUM(a.time_spent), 0), MIN(a.submitted_at), MAX(a.submitted_at)
+            {selection}
+            GROUP BY a.user_id, a.task_id
+            ON CONFLICT (user_id, task_id) DO UPDATE SET
+                attempts = attempts + excluded.attempts,
+                correct = correct + excluded.correct,
+                time_spent = time_spent + excluded.time_spent,
+                first_submitted_at = MIN(first_submitted_at, excluded.first_submitted_at),
+                last_submitted_at = MAX(last_submitted_at, excluded.last_submitted_at)
+            ''', (before,))
+            cursor.execute(f"DELETE FROM answers WHERE rowid IN (SELECT a.rowid {selection})",
+                           (before,))
+            cursor.execute('''
+            INSERT INTO answer_archives (path, first_rowid, last_rowid, answers, submitted_before)
+            VALUES (?, ?, ?, ?, ?)
+            ''', (path, first_rowid, last_rowid, count, before))
+        except Exception:
+            conn.rollback()
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+            raise
+        
+        conn.commit()
+        logger.info(f"Компактація: {count} відповідей до {before} -> {path}")
+        return {'archived': count, 'archive': path, 'freed_pages': self.incremental_vacuum()}
+    
+    def incremental_vacuum(self, pages: int = 0) -> int:
+        """Повернення вільних сторінок файлу БД (усіх, якщо pages = 0);
+        повертає кількість звільнених сторінок"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("PRAGMA auto_vacuum")
+        if cursor.fetchone()[0] != 2:
+            # БД створена без auto_vacuum = INCREMENTAL: потрібен одноразовий enable_incremental_vacuum
+            return 0
+        cursor.execute("PRAGMA freelist_count")
+        free_before = cursor.fetchone()[0]
+        # execute() робить лише один крок прагми (одну сторінку); executescript - до кінця
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        cursor.execute("PRAGMA freelist_count")
+        return free_before - cursor.fetchone()[0]
+    
+    def enable_incremental_vacuum(self):
+        """Переведення наявної БД у режим auto_vacuum = INCREMENTAL (повний VACUUM)
+        
+        VACUUM може змінити rowid відповідей - після нього експорт варто виконати з --full"""
+        conn = self._get_connection()
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        if self._fts:
+            # Рядки повнотекстового індексу адресуються rowid завдань, які VACUUM міг змінити
+            conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+            conn.commit()
+    
+    def _archive_paths(self) -> List[str]:
+        cursor = self._get_connection().cursor()
+        cursor.execute("SELECT path FROM answer_archives ORDER BY rowid")
+        return [row['path'] for row in cursor.fetchall()]
+    
+    @staticmethod
+    def _iter_archive_rows(path: str):
+        """Рядки одного архіву у форматі iter_answer_chunks (за часом, потім rowid)"""
+        fields = ['rowid', 'user_id', 'task_id', 'topic', 'difficulty',
+                  'is_correct', 'time_spent', 'submitted_at']
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            columns = json.loads(next(f))
+            index = [columns.index(field) for field in fields]
+            for line in f:
+                row = json.loads(line)
+                yield tuple(row[i] for i in index)
+    
+    def iter_archived_answer_chunks(self, chunk_size: int = 10000):
+        """Відповіді з архівів компактації порціями у форматі iter_answer_chunks
+        (архів за архівом; кожен архів - у порядку часу)"""
+        for path in self._archive_paths():
+            yield from _chunked(self._iter_archive_rows(path), chunk_size)
+    
+    def iter_answer_history_chunks(self, chunk_size: int = 10000):
+        """Увесь журнал - архіви компактації та таблиця answers - порціями
+        у форматі iter_answer_chunks в порядку часу відповіді
+        
+        Джерела зливаються за часом, а не дописуються одне за одним: компактація
+        лишає в таблиці рядок з найбільшим rowid, навіть старий, і наступна
+        компактація архівує його разом із новішими за вміст попередніх архівів."""
+        streams = [self._iter_archive_rows(path) for path in self._archive_paths()]
+        streams.append(row for chunk in self.iter_answer_chunks(chunk_size=chunk_size, by_time=True)
+                       for row in chunk)
+        merged = heapq.merge(*streams, key=lambda row: (row[7] or '', row[0]))
+        yield from _chunked(merged, chunk_size)
+    
     def close(self):
         """Закриття з'єднання"""
         if self.connection:
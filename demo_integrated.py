@@ -1,44 +1,127 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import matplotlib.pyplot as plt
+from matplotlib import colormaps
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from database import DatabaseManager
 from bayesian_network import SimpleBayesianNetwork
+from task_selector import TaskSelector
 import json
+import queue
+import threading
 
 class NMTBayesianDemo:
-    def __init__(self, root):
+    # Період опитування черги результатів фонового потоку, мс
+    POLL_INTERVAL_MS = 50
+    
+    def __init__(self, root, storage=None):
         self.root = root
         self.root.title("Байєсова мережа для НМТ - Демо")
         self.root.geometry("900x700")
         
-        # Ініціалізація
-        self.db = DatabaseManager("adaptive_learning.db")
+        # Ініціалізація: будь-яка реалізація StorageBackend, типово SQLite
+        self.db = storage or DatabaseManager("adaptive_learning.db")
         self.bn = SimpleBayesianNetwork()
-        
-        # ID демо-користувача
-        self.user_id = self.get_demo_user()
-        
-        # Завантаження або створення моделі
-        self.load_or_create_model()
+        self.selector = TaskSelector(self.db)
+        self.user_id = None
+        
+        # БД і мережею володіє лише фоновий потік: головний потік Tk
+        # ставить завдання в чергу й отримує готові результати
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._refresh_pending = False
+        self._rendered = {}
+        # Кнопки дій доступні лише після завантаження моделі у фоновому потоці
+        self._action_buttons = []
+        
+        # Вікно графа мережі створюється один раз і далі лише оновлюється
+        self.graph_window = None
+        self._graph_key = None
+        self._graph_artists = {}
+        self._graph_cmap = colormaps['RdYlGn']
+        
+        self._worker = threading.Thread(target=self._worker_loop, daemon=True)
+        self._worker.start()
         
         # Налаштування GUI
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(self.POLL_INTERVAL_MS, self._poll_results)
         
-        # Оновлення відображення
-        self.update_display()
+        # ID демо-користувача, завантаження або створення моделі
+        self._submit(self._startup_job, self._on_startup, self._on_startup_error)
+    
+    # ========== ФОНОВИЙ ПОТІК ==========
+    
+    def _submit(self, job, on_done=None, on_error=None):
+        """Постановка завдання у чергу фонового потоку"""
+        self._jobs.put((job, on_done, on_error))
+    
+    def _worker_loop(self):
+        """Цикл фонового потоку: виконує завдання по черзі"""
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                break
+            job, on_done, on_error = item
+            try:
+                self._results.put((on_done, job(), None))
+            except Exception as e:
+                self._results.put((on_error, None, e))
+        self.db.close()
+    
+    def _poll_results(self):
+        """Обробка готових результатів у головному потоці"""
+        try:
+            while True:
+                callback, result, error = self._results.get_nowait()
+                if error is not None:
+                    if callback:
+                        callback(error)
+                    else:
+                        messagebox.showerror("Помилка", f"{error}")
+                elif callback:
+                    callback(result)
+        except queue.Empty:
+            pass
+        self.root.after(self.POLL_INTERVAL_MS, self._poll_results)
+    
+    def on_close(self):
+        """Зупинка фонового потоку та закриття вікна"""
+        self._jobs.put(None)
+        self.root.destroy()
+    
+    def _startup_job(self):
+        """Пошук демо-користувача та завантаження моделі (фоновий потік)"""
+        self.user_id = self.get_demo_user()
+        self.load_or_create_model()
+        return self._display_snapshot()
+    
+    def _on_startup(self, snapshot):
+        # user_id записано фоновим потоком до цього результату
+        self._enable_actions()
+        if not self.user_id:
+            messagebox.showwarning("Увага", 
+                "Демо-користувач не знайдений.\n"
+                "Запустіть populate_database.py для створення даних.")
+        self._render_snapshot(snapshot)
+    
+    def _on_startup_error(self, error):
+        self._enable_actions()
+        messagebox.showerror("Помилка", f"Не вдалося завантажити модель: {error}")
+    
+    def _enable_actions(self):
+        for button in self._action_buttons:
+            button.config(state=tk.NORMAL)
     
     def get_demo_user(self):
         """Отримання ID демо-користувача"""
         user = self.db.get_user_by_email("student@nmt.demo")
         if user:
             return user['id']
-        else:
-            messagebox.showwarning("Увага", 
-                "Демо-користувач не знайдений.\n"
-                "Запустіть populate_database.py для створення даних.")
-            return None
+        return None
     
     def load_or_create_model(self):
         """Завантаження або створення моделі"""
@@ -51,9 +134,16 @@ class NMTBayesianDemo:
         if not loaded:
             # Якщо моделі немає, створюємо нову
             print("Створення нової Байєсової мережі...")
-            self.bn.build_network()
+            self.bn = SimpleBayesianNetwork.from_prototype(
+                self.bn.mode, self.bn.engine, self.bn.seed, self.bn.target_error)
             self.bn.save_to_database(self.db, self.user_id)
     
+    def _action_button(self, parent, **options):
+        """Кнопка дії, недоступна до завершення завантаження"""
+        button = tk.Button(parent, state=tk.DISABLED, **options)
+        self._action_buttons.append(button)
+        return button
+    
     def setup_ui(self):
         """Налаштування графічного інтерфейсу"""
         # Заголовок
@@ -102,26 +192,26 @@ class NMTBayesianDemo:
         button_frame = tk.Frame(right_panel)
         button_frame.pack(pady=10)
         
-        tk.Button(button_frame, text="✅ Правильна відповідь",
-                 command=lambda: self.simulate_answer(True),
-                 bg="lightgreen", width=20).pack(side=tk.LEFT, padx=5)
+        self._action_button(button_frame, text="✅ Правильна відповідь",
+                           command=lambda: self.simulate_answer(True),
+                           bg="lightgreen", width=20).pack(side=tk.LEFT, padx=5)
         
-        tk.Button(button_frame, text="❌ Неправильна відповідь",
-                 command=lambda: self.simulate_answer(False),
-                 bg="lightcoral", width=20).pack(side=tk.LEFT, padx=5)
+        self._action_button(button_frame, text="❌ Неправильна відповідь",
+                           command=lambda: self.simulate_answer(False),
+                           bg="lightcoral", width=20).pack(side=tk.LEFT, padx=5)
         
         # Прогнозування
         predict_frame = tk.Frame(right_panel)
         predict_frame.pack(fill=tk.X, pady=20)
         
-        tk.Button(predict_frame, text="🔮 Прогнозувати успішність",
-                 command=self.predict_success,
-                 bg="lightblue", width=25).pack()
+        self._action_button(predict_frame, text="🔮 Прогнозувати успішність",
+                           command=self.predict_success,
+                           bg="lightblue", width=25).pack()
         
         # Рекомендації
-        tk.Button(predict_frame, text="💡 Отримати рекомендацію",
-                 command=self.get_recommendation,
-                 bg="gold", width=25).pack(pady=5)
+        self._action_button(predict_frame, text="💡 Отримати рекомендацію",
+                           command=self.get_recommendation,
+                           bg="gold", width=25).pack(pady=5)
         
         # Результати
         result_frame = tk.LabelFrame(right_panel, text="📝 Результати", font=("Arial", 10, "bold"))
@@ -141,33 +231,67 @@ class NMTBayesianDemo:
         control_frame = tk.Frame(self.root)
         control_frame.pack(pady=10)
         
-        tk.Button(control_frame, text="🔄 Оновити",
-                 command=self.update_display).pack(side=tk.LEFT, padx=5)
+        self._action_button(control_frame, text="🔄 Оновити",
+                           command=self.update_display).pack(side=tk.LEFT, padx=5)
         
-        tk.Button(control_frame, text="💾 Зберегти модель",
-                 command=self.save_model).pack(side=tk.LEFT, padx=5)
+        self._action_button(control_frame, text="💾 Зберегти модель",
+                           command=self.save_model).pack(side=tk.LEFT, padx=5)
         
-        tk.Button(control_frame, text="📊 Граф мережі",
-                 command=self.show_network_graph).pack(side=tk.LEFT, padx=5)
+        self._action_button(control_frame, text="📊 Граф мережі",
+                           command=self.show_network_graph).pack(side=tk.LEFT, padx=5)
     
     def update_display(self):
         """Оновлення всіх відображень"""
-        self.update_knowledge_display()
-        self.update_statistics_display()
-        self.result_text.delete(1.0, tk.END)
+        self.request_refresh()
     
-    def update_knowledge_display(self):
-        """Оновлення відображення стану знань"""
-        self.knowledge_text.delete(1.0, tk.END)
-        
-        if not self.bn.current_state:
-            self.knowledge_text.insert(tk.END, "Модель не завантажена\n")
+    def request_refresh(self):
+        """Запит на оновлення; повторні запити до виконання об'єднуються"""
+        if self._refresh_pending:
             return
+        self._refresh_pending = True
+        self._submit(self._display_snapshot, self._on_refresh, self._on_refresh_error)
+    
+    def _on_refresh(self, snapshot):
+        self._refresh_pending = False
+        self._render_snapshot(snapshot)
+    
+    def _on_refresh_error(self, error):
+        # Інакше всі наступні запити на оновлення ігноруватимуться
+        self._refresh_pending = False
+        messagebox.showerror("Помилка", f"Не вдалося оновити відображення: {error}")
+    
+    def _display_snapshot(self):
+        """Підготовка текстів усіх панелей (фоновий потік)"""
+        return {
+            'knowledge': self.format_knowledge(),
+            'stats': self.format_statistics(),
+            'result': "",
+            'graph': self._graph_snapshot()
+        }
+    
+    def _render_snapshot(self, snapshot):
+        """Відображення знімка: перемальовуються лише змінені віджети"""
+        self._render_text(self.knowledge_text, snapshot['knowledge'])
+        self._render_text(self.stats_text, snapshot['stats'])
+        self._render_text(self.result_text, snapshot['result'])
+        self._update_network_graph(snapshot['graph'])
+    
+    def _render_text(self, widget, text):
+        """Заміна тексту віджета, якщо він відрізняється від показаного"""
+        if self._rendered.get(widget) == text:
+            return
+        widget.delete(1.0, tk.END)
+        widget.insert(tk.END, text)
+        self._rendered[widget] = text
+    
+    def format_knowledge(self):
+        """Текст відображення стану знань"""
+        if not self.bn.current_state:
+            return "Модель не завантажена\n"
         
-        self.knowledge_text.insert(tk.END, "РІВНІ ЗНАНЬ:\n")
-        self.knowledge_text.insert(tk.END, "="*30 + "\n\n")
+        lines = ["РІВНІ ЗНАНЬ:\n", "="*30 + "\n\n"]
         
-        for topic, dist in self.bn.current_state.items():
+        for topic, dist in self.bn.decayed_state().items():
             topic_name = {
                 'Algebra': 'Алгебра',
                 'Geometry': 'Геометрія',
@@ -181,37 +305,33 @@ class NMTBayesianDemo:
             progress = int(high_prob * 100)
             bar = "█" * (progress // 5) + "░" * (20 - progress // 5)
             
-            self.knowledge_text.insert(tk.END, 
-                f"{topic_name:10} {bar} {progress:3}%\n")
-            self.knowledge_text.insert(tk.END,
-                f"   Низький: {low_prob:.1%}, Високий: {high_prob:.1%}\n\n")
-    
-    def update_statistics_display(self):
-        """Оновлення статистики"""
-        self.stats_text.delete(1.0, tk.END)
+            lines.append(f"{topic_name:10} {bar} {progress:3}%\n")
+            lines.append(f"   Низький: {low_prob:.1%}, Високий: {high_prob:.1%}\n\n")
         
+        return "".join(lines)
+    
+    def format_statistics(self):
+        """Текст статистики"""
         if not self.user_id:
-            self.stats_text.insert(tk.END, "Користувач не знайдений\n")
-            return
+            return "Користувач не знайдений\n"
         
         stats = self.db.get_user_statistics(self.user_id)
         
-        self.stats_text.insert(tk.END, "СТАТИСТИКА ВІДПОВІДЕЙ:\n")
-        self.stats_text.insert(tk.END, "="*40 + "\n\n")
+        lines = ["СТАТИСТИКА ВІДПОВІДЕЙ:\n", "="*40 + "\n\n"]
         
         total = stats.get('total_answers', 0)
         correct = stats.get('correct_answers', 0)
         
-        self.stats_text.insert(tk.END, f"Всього відповідей: {total}\n")
+        lines.append(f"Всього відповідей: {total}\n")
         
         if total > 0:
             accuracy = correct / total
-            self.stats_text.insert(tk.END, f"Правильних: {correct}\n")
-            self.stats_text.insert(tk.END, f"Точність: {accuracy:.1%}\n")
+            lines.append(f"Правильних: {correct}\n")
+            lines.append(f"Точність: {accuracy:.1%}\n")
         
         # Статистика по темах
         if 'by_topic' in stats:
-            self.stats_text.insert(tk.END, "\nПО ТЕМАХ:\n")
+            lines.append("\nПО ТЕМАХ:\n")
             for topic_stat in stats['by_topic']:
                 topic = topic_stat['topic']
                 total_t = topic_stat['total']
@@ -225,8 +345,9 @@ class NMTBayesianDemo:
                         'functions': 'Функції'
                     }.get(topic, topic)
                     
-                    self.stats_text.insert(tk.END, 
-                        f"  {topic_name:10} {accuracy_t:.0%} ({correct_t}/{total_t})\n")
+                    lines.append(f"  {topic_name:10} {accuracy_t:.0%} ({correct_t}/{total_t})\n")
+        
+        return "".join(lines)
     
     def simulate_answer(self, is_correct):
         """Симуляція відповіді учня"""
@@ -234,59 +355,76 @@ class NMTBayesianDemo:
             messagebox.showerror("Помилка", "Користувач не знайдений")
             return
         
+        # Значення віджетів читаємо в головному потоці
         topic = self.topic_var.get()
         
-        try:
-            # Оновлюємо Байєсову мережу
-            p = self.bn.update_from_answer(is_correct, topic)
+        self._submit(lambda: self._simulate_answer_job(is_correct, topic),
+                     self._on_answer_simulated,
+                     lambda e: messagebox.showerror("Помилка", f"Помилка симуляції: {e}"))
+    
+    def _simulate_answer_job(self, is_correct, topic):
+        """Оновлення мережі та запис відповіді (фоновий потік)"""
+        # Знаходимо задачу з відповідною темою
+        tasks = self.db.get_tasks_by_topic(topic, limit=1)
+        task = tasks[0] if tasks else None
+        
+        # Оновлюємо Байєсову мережу з урахуванням складності задачі
+        difficulty = task['difficulty'] if task else 'medium'
+        self.bn.update_from_answer(is_correct, topic, difficulty)
+        
+        if task:
+            # Відповідь і оновлена модель записуються однією транзакцією
+            response = "симульована_відповідь"
+            if is_correct:
+                response = task['correct_answer']
             
+            self.db.submit_answer(
+                user_id=self.user_id,
+                task_id=task['id'],
+                user_response=response,
+                is_correct=is_correct,
+                time_spent=60,  # фіксований час для демо
+                current_state=self.bn.current_state
+            )
+        else:
             # Зберігаємо оновлену модель
             self.bn.save_to_database(self.db, self.user_id)
-            
-            # Створюємо запис у БД
-            # Знаходимо задачу з відповідною темою
-            tasks = self.db.get_tasks_by_topic(topic, limit=1)
-            
-            if tasks:
-                task = tasks[0]
-                # Створюємо відповідь
-                response = "симульована_відповідь"
-                if is_correct:
-                    response = task['correct_answer']
-                
-                self.db.create_answer(
-                    user_id=self.user_id,
-                    task_id=task['id'],
-                    user_response=response,
-                    is_correct=is_correct,
-                    time_spent=60  # фіксований час для демо
-                )
-            
-            # Оновлюємо відображення
-            self.update_display()
-            
-            status = "ПРАВИЛЬНА" if is_correct else "НЕПРАВИЛЬНА"
-            messagebox.showinfo("Симуляція",
-                f"ЗАДАЧА {str(tasks[0]['condition'])}\n"
-                f"{str(tasks[0]['question'])}\n"            
-                f"ВІДПОВІДЬ {str(tasks[0]['correct_answer'])}\n"
-                f"Відповідь зареєстрована як {status}!\n"
-                f"Тема: {topic}\n"
-                f"Байєсова мережа оновлена.")
-            
-        except Exception as e:
-            messagebox.showerror("Помилка", f"Помилка симуляції: {e}")
+        
+        return {
+            'is_correct': is_correct,
+            'topic': topic,
+            'task': task,
+            'snapshot': self._display_snapshot()
+        }
+    
+    def _on_answer_simulated(self, outcome):
+        # Оновлюємо відображення
+        self._render_snapshot(outcome['snapshot'])
+        
+        task = outcome['task']
+        status = "ПРАВИЛЬНА" if outcome['is_correct'] else "НЕПРАВИЛЬНА"
+        task_info = ""
+        if task:
+            task_info = (f"ЗАДАЧА {str(task['condition'])}\n"
+                         f"{str(task['question'])}\n"
+                         f"ВІДПОВІДЬ {str(task['correct_answer'])}\n")
+        messagebox.showinfo("Симуляція",
+            f"{task_info}"
+            f"Відповідь зареєстрована як {status}!\n"
+            f"Тема: {outcome['topic']}\n"
+            f"Байєсова мережа оновлена.")
     
     def predict_success(self):
         """Прогнозування успішності"""
-        self.result_text.delete(1.0, tk.END)
-        
+        self._submit(self.format_prediction,
+                     lambda text: self._render_text(self.result_text, text))
+    
+    def format_prediction(self):
+        """Текст прогнозу успішності"""
         if not self.bn.current_state:
-            self.result_text.insert(tk.END, "Модель не завантажена\n")
-            return
+            return "Модель не завантажена\n"
         
-        self.result_text.insert(tk.END, "ПРОГНОЗ УСПІШНОСТІ:\n")
-        self.result_text.insert(tk.END, "="*30 + "\n\n")
+        lines = ["ПРОГНОЗ УСПІШНОСТІ:\n", "="*30 + "\n\n"]
         
         # Прогноз для кожної теми
         topics = ['algebra', 'geometry', 'functions']
@@ -301,16 +439,21 @@ class NMTBayesianDemo:
             progress = int(success_prob * 100)
             bar = "█" * (progress // 5) + "░" * (20 - progress // 5)
             
-            self.result_text.insert(tk.END, 
-                f"{topic_names[topic]:10} {bar} {progress:3}%\n")
-            self.result_text.insert(tk.END,
-                f"   Ймовірність успіху: {success_prob:.1%}\n\n")
+            lines.append(f"{topic_names[topic]:10} {bar} {progress:3}%\n")
+            lines.append(f"   Ймовірність успіху: {success_prob:.1%}\n\n")
         
         # Загальний прогноз
         avg_success = sum([self.bn.predict_success(t) for t in topics]) / 3
         
-        self.result_text.insert(tk.END, "="*30 + "\n")
-        self.result_text.insert(tk.END, f"\n📊 ЗАГАЛЬНИЙ ПРОГНОЗ: {avg_success:.1%}\n")
+        lines.append("="*30 + "\n")
+        lines.append(f"\n📊 ЗАГАЛЬНИЙ ПРОГНОЗ: {avg_success:.1%}\n")
+        
+        # Розподіл балів за симуляцією повного тесту; фіксоване зерно -
+        # за незмінного стану прогноз не змінюється між натисканнями
+        forecast = self.bn.forecast_score(seed=0)
+        percentiles = forecast['percentiles']
+        lines.append(f"\n📝 Бали тесту: медіана {percentiles[50]} з {forecast['max_score']} "
+                     f"(90%: {percentiles[5]}–{percentiles[95]})\n")
         
         # Інтерпретація
         if avg_success > 0.7:
@@ -320,15 +463,18 @@ class NMTBayesianDemo:
         else:
             interpretation = "🔴 Низький рівень"
         
-        self.result_text.insert(tk.END, f"\n{interpretation}\n")
+        lines.append(f"\n{interpretation}\n")
+        return "".join(lines)
     
     def get_recommendation(self):
         """Отримання рекомендації"""
-        self.result_text.delete(1.0, tk.END)
-        
+        self._submit(self.format_recommendation,
+                     lambda text: self._render_text(self.result_text, text))
+    
+    def format_recommendation(self):
+        """Текст рекомендації"""
         if not self.bn.current_state:
-            self.result_text.insert(tk.END, "Модель не завантажена\n")
-            return
+            return "Модель не завантажена\n"
         
         weakest = self.bn.get_weakest_topic()
         
@@ -340,29 +486,35 @@ class NMTBayesianDemo:
         
         weakest_name = topic_names.get(weakest, weakest)
         
-        self.result_text.insert(tk.END, "💡 РЕКОМЕНДАЦІЯ СИСТЕМИ\n")
-        self.result_text.insert(tk.END, "="*30 + "\n\n")
+        lines = ["💡 РЕКОМЕНДАЦІЯ СИСТЕМИ\n", "="*30 + "\n\n"]
         
-        self.result_text.insert(tk.END, f"Найслабша тема: {weakest_name}\n\n")
+        lines.append(f"Найслабша тема: {weakest_name}\n\n")
         
         # Конкретні рекомендації
+        lines.append("Рекомендовані вправи:\n")
         if weakest == 'algebra':
-            self.result_text.insert(tk.END, "Рекомендовані вправи:\n")
-            self.result_text.insert(tk.END, "• Розв'язування лінійних рівнянь\n")
-            self.result_text.insert(tk.END, "• Робота з алгебраїчними виразами\n")
-            self.result_text.insert(tk.END, "• Системи рівнянь\n")
+            lines.append("• Розв'язування лінійних рівнянь\n")
+            lines.append("• Робота з алгебраїчними виразами\n")
+            lines.append("• Системи рівнянь\n")
         elif weakest == 'geometry':
-            self.result_text.insert(tk.END, "Рекомендовані вправи:\n")
-            self.result_text.insert(tk.END, "• Теорема Піфагора\n")
-            self.result_text.insert(tk.END, "• Властивості трикутників\n")
-            self.result_text.insert(tk.END, "• Обчислення площ та об'ємів\n")
+            lines.append("• Теорема Піфагора\n")
+            lines.append("• Властивості трикутників\n")
+            lines.append("• Обчислення площ та об'ємів\n")
         else:  # functions
-            self.result_text.insert(tk.END, "Рекомендовані вправи:\n")
-            self.result_text.insert(tk.END, "• Властивості функцій\n")
-            self.result_text.insert(tk.END, "• Побудова графіків\n")
-            self.result_text.insert(tk.END, "• Похідні функцій\n")
-        
-        self.result_text.insert(tk.END, "\n💡 Порада: Практикуйте цю тему 20 хвилин щодня")
+            lines.append("• Властивості функцій\n")
+            lines.append("• Побудова графіків\n")
+            lines.append("• Похідні функцій\n")
+        
+        # Наступне завдання з найбільшим очікуваним приростом інформації
+        next_tasks = self.selector.select_next_tasks(self.bn, user_id=self.user_id, k=1)
+        if next_tasks:
+            task = next_tasks[0]
+            lines.append(f"\nНаступне завдання ({topic_names.get(task['topic'], task['topic'])}):\n")
+            lines.append(f"{task['condition']}\n")
+            lines.append(f"Ймовірність успіху: {task['success_probability']:.1%}\n")
+        
+        lines.append("\n💡 Порада: Практикуйте цю тему 20 хвилин щодня")
+        return "".join(lines)
     
     def save_model(self):
         """Збереження моделі в БД"""
@@ -370,53 +522,120 @@ class NMTBayesianDemo:
             messagebox.showerror("Помилка", "Користувач не знайдений")
             return
         
-        self.bn.save_to_database(self.db, self.user_id)
-        messagebox.showinfo("Збереження", "Модель успішно збережена в базі даних")
+        self._submit(lambda: self.bn.save_to_database(self.db, self.user_id),
+                     lambda _: messagebox.showinfo("Збереження", "Модель успішно збережена в базі даних"))
     
     def show_network_graph(self):
         """Відображення графа мережі"""
         try:
-            fig, ax = plt.subplots(figsize=(8, 6))
-            
-            # Простий граф
-            nodes = ['Algebra', 'Geometry', 'Functions', 'Result']
-            edges = [('Algebra', 'Result'), ('Geometry', 'Result'), ('Functions', 'Result')]
-            
-            # Позиції
-            pos = {
-                'Algebra': (0, 1),
-                'Geometry': (0, 0),
-                'Functions': (0, -1),
-                'Result': (2, 0)
-            }
-            
-            # Малюємо ребра
-            for src, dst in edges:
-                xs, ys = pos[src]
-                xd, yd = pos[dst]
-                ax.plot([xs, xd], [ys, yd], 'k-', alpha=0.5, linewidth=2)
-                # Стрілка
-                ax.annotate('', xy=(xd, yd), xytext=(xs, ys),
-                           arrowprops=dict(arrowstyle='->', color='gray', lw=1))
-            
-            # Малюємо вузли
-            for node, (x, y) in pos.items():
-                color = 'lightblue' if node != 'Result' else 'lightgreen'
-                circle = plt.Circle((x, y), 0.3, color=color, ec='black', lw=2)
-                ax.add_patch(circle)
-                ax.text(x, y, node, ha='center', va='center', fontsize=10, fontweight='bold')
-            
-            ax.set_xlim(-1, 3)
-            ax.set_ylim(-2, 2)
-            ax.set_aspect('equal')
-            ax.axis('off')
-            ax.set_title("Структура Байєсової мережі для НМТ", fontsize=12, fontweight='bold')
-            
-            plt.tight_layout()
-            plt.show()
-            
+            if self.graph_window is None:
+                self._build_network_graph()
+            self.graph_window.deiconify()
+            self.graph_window.lift()
+            self.request_refresh()
         except Exception as e:
             messagebox.showerror("Помилка", f"Не вдалося побудувати граф: {e}")
+    
+    def _build_network_graph(self):
+        """Створення вікна з вбудованим полотном (лише один раз)"""
+        self.graph_window = tk.Toplevel(self.root)
+        self.graph_window.title("Структура Байєсової мережі для НМТ")
+        # Закриття лише ховає вікно, полотно використовується повторно
+        self.graph_window.protocol("WM_DELETE_WINDOW", self.graph_window.withdraw)
+        
+        self.graph_figure = Figure(figsize=(8, 6))
+        self.graph_ax = self.graph_figure.add_subplot(111)
+        self.graph_canvas = FigureCanvasTkAgg(self.graph_figure, master=self.graph_window)
+        self.graph_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    
+    def _graph_snapshot(self):
+        """Структура мережі та маргінали навичок (фоновий потік)"""
+        if self.bn.model is None:
+            return None
+        return {
+            'nodes': list(self.bn.model.nodes()),
+            'edges': list(self.bn.model.edges()),
+            'marginals': {
+                node: dist.get('High', 0)
+                for node, dist in self.bn.decayed_state().items()
+            }
+        }
+    
+    @staticmethod
+    def network_layout(nodes, edges):
+        """Шарове розміщення вузлів: корені зліва, нащадки правіше"""
+        parents = {node: [] for node in nodes}
+        for src, dst in edges:
+            parents[dst].append(src)
+        
+        depth = {}
+        def node_depth(node):
+            if node not in depth:
+                depth[node] = 0
+                depth[node] = max((node_depth(p) + 1 for p in parents[node]), default=0)
+            return depth[node]
+        
+        layers = {}
+        for node in nodes:
+            layers.setdefault(node_depth(node), []).append(node)
+        
+        pos = {}
+        for level, layer in layers.items():
+            for i, node in enumerate(layer):
+                pos[node] = (level * 2, (len(layer) - 1) / 2 - i)
+        return pos
+    
+    def _update_network_graph(self, graph):
+        """Оновлення кольорів та підписів вузлів без перебудови фігури"""
+        if self.graph_window is None or graph is None:
+            return
+        if self.graph_window.state() == 'withdrawn':
+            return
+        
+        key = (tuple(graph['nodes']), tuple(graph['edges']))
+        if key != self._graph_key:
+            self._draw_network_structure(graph['nodes'], graph['edges'])
+            self._graph_key = key
+        
+        for node, (circle, label) in self._graph_artists.items():
+            if node in graph['marginals']:
+                high_prob = graph['marginals'][node]
+                circle.set_facecolor(self._graph_cmap(high_prob))
+                label.set_text(f"{node}\nHigh {high_prob:.0%}")
+        
+        self.graph_canvas.draw_idle()
+    
+    def _draw_network_structure(self, nodes, edges):
+        """Побудова артистів графа для нової структури мережі"""
+        ax = self.graph_ax
+        ax.clear()
+        pos = self.network_layout(nodes, edges)
+        
+        # Малюємо ребра
+        for src, dst in edges:
+            xs, ys = pos[src]
+            xd, yd = pos[dst]
+            ax.plot([xs, xd], [ys, yd], 'k-', alpha=0.5, linewidth=2)
+            # Стрілка
+            ax.annotate('', xy=(xd, yd), xytext=(xs, ys),
+                       arrowprops=dict(arrowstyle='->', color='gray', lw=1))
+        
+        # Малюємо вузли
+        self._graph_artists = {}
+        for node, (x, y) in pos.items():
+            circle = Circle((x, y), 0.45, color='lightgreen', ec='black', lw=2, zorder=3)
+            ax.add_patch(circle)
+            label = ax.text(x, y, node, ha='center', va='center', fontsize=8,
+                            fontweight='bold', zorder=4)
+            self._graph_artists[node] = (circle, label)
+        
+        xs = [x for x, _ in pos.values()]
+        ys = [y for _, y in pos.values()]
+        ax.set_xlim(min(xs) - 1, max(xs) + 1)
+        ax.set_ylim(min(ys) - 1, max(ys) + 1)
+        ax.set_aspect('equal')
+        ax.axis('off')
+        ax.set_title("Структура Байєсової мережі для НМТ", fontsize=12, fontweight='bold')
 
 if __name__ == "__main__":
     print("Запуск демонстрації Байєсової мережі для НМТ...")
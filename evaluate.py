@@ -0,0 +1,228 @@
+
+import argparse
+import sys
+from typing import Optional, Dict
+import numpy as np
+from database import DatabaseManager
+from bayesian_network import (TOPIC_TO_NODE, DIFFICULTY_LEVELS, MODES, SimpleBayesianNetwork,
+                              topic_node, boost_skill_high, decay_high)
+from student_state_store import StudentStateStore
+
+# Конфігурації навичок у порядку стовпців CPT Result (Algebra змінюється найповільніше)
+SKILL_CONFIGS = np.array([[(k >> 2) & 1, (k >> 1) & 1, k & 1] for k in range(8)],
+                         dtype=np.float64)
+
+# Кількість кошиків для потокового AUC та для калібрування
+AUC_BINS = 10000
+CALIBRATION_BINS = 10
+
+EPS = 1e-12
+
+
+class _Metrics:
+    """Потокові метрики прогнозів однієї теми"""
+
+    def __init__(self):
+        self.count = 0
+        self.log_loss = 0.0
+        self.brier = 0.0
+        self.positives = np.zeros(AUC_BINS, dtype=np.int64)
+        self.negatives = np.zeros(AUC_BINS, dtype=np.int64)
+        self.calibration = np.zeros((CALIBRATION_BINS, 3))  # кількість, Σ прогнозів, Σ відповідей
+
+    def update(self, p: np.ndarray, y: np.ndarray):
+        p = np.clip(p, EPS, 1 - EPS)
+        self.count += len(p)
+        self.log_loss -= float(np.sum(y * np.log(p) + (1 - y) * np.log(1 - p)))
+        self.brier += float(np.sum((p - y) ** 2))
+
+        bins = np.minimum((p * AUC_BINS).astype(np.int64), AUC_BINS - 1)
+        self.positives += np.bincount(bins[y == 1], minlength=AUC_BINS)
+        self.negatives += np.bincount(bins[y == 0], minlength=AUC_BINS)
+
+        bins = np.minimum((p * CALIBRATION_BINS).astype(np.int64), CALIBRATION_BINS - 1)
+        self.calibration[:, 0] += np.bincount(bins, minlength=CALIBRATION_BINS)
+        self.calibration[:, 1] += np.bincount(bins, weights=p, minlength=CALIBRATION_BINS)
+        self.calibration[:, 2] += np.bincount(bins, weights=y, minlength=CALIBRATION_BINS)
+
+    def auc(self) -> Optional[float]:
+        # Пари (позитив, негатив) з позитивом у вищому кошику; однаковий кошик - половина
+        positives, negatives = self.positives.sum(), self.negatives.sum()
+        if positives == 0 or negatives == 0:
+            return None
+        negatives_below = np.cumsum(self.negatives) - self.negatives
+        wins = np.sum(self.positives * (negatives_below + 0.5 * self.negatives))
+        return float(wins / (positives * negatives))
+
+    def summary(self) -> Dict:
+        count = self.count
+        calibration = [
+            {'bin': f"{i / CALIBRATION_BINS:.1f}-{(i + 1) / CALIBRATION_BINS:.1f}",
+             'count': int(n), 'mean_predicted': s_p / n, 'observed': s_y / n}
+            for i, (n, s_p, s_y) in enumerate(self.calibration) if n
+        ]
+        return {
+            'count': count,
+            'log_loss': self.log_loss / count if count else None,
+            'brier': self.brier / count if count else None,
+            'auc': self.auc(),
+            'calibration': calibration
+        }
+
+
+def _replay_wave(store: StudentStateStore, rows: np.ndarray, columns: np.ndarray,
+                 levels: np.ndarray, correct: np.ndarray, times: np.ndarray,
+                 success: np.ndarray, result_correct: np.ndarray) -> np.ndarray:
+    """Прогноз і оновлення для хвилі відповідей різних учнів: забування та зміна
+    CPT - спільні функції SimpleBayesianNetwork.update_from_answer, апостеріорна
+    P(High) - точний інференс мережі в закритій формі"""
+    n = len(rows)
+    index = np.arange(n)
+
+    # Забування з моменту останнього оновлення
+    last = store.last_updated[rows]
+    elapsed_days = np.maximum(0.0, (times - last) / 86400.0)
+    factor = np.where(np.isnan(last), 1.0,
+                      0.5 ** (np.nan_to_num(elapsed_days) / store.half_life_days))[:, None]
+
+    posterior = decay_high(store.posterior_high[rows], store.baseline, factor)
+    skill_high = decay_high(store.skill_high[rows], store.baseline, factor)
+
+    # 1. Прогноз до того, як відповідь стала відома
+    high = posterior[index, columns]
+    predicted = high * success[levels, 0] + (1 - high) * success[levels, 1]
+
+    # 2. Множник 1.3 / 0.7 для CPT навички теми завдання
+    skill_high[index, columns] = boost_skill_high(skill_high[index, columns], correct == 1)
+
+    # 3. Точна апостеріорна P(High) при evidence Result та Difficulty
+    joint = np.prod(np.where(SKILL_CONFIGS[None, :, :] == 1,
+                             skill_high[:, None, :], 1 - skill_high[:, None, :]), axis=2)
+    likelihood = result_correct[levels]
+    likelihood = np.where(correct[:, None] == 1, likelihood, 1 - likelihood)
+    weighted = joint * likelihood
+    posterior = (weighted @ SKILL_CONFIGS) / weighted.sum(axis=1, keepdims=True)
+
+    store.skill_high[rows] = skill_high
+    store.posterior_high[rows] = posterior
+    store.last_updated[rows] = times
+    return predicted
+
+
+def _trace_wave(store: StudentStateStore, tracer, rows: np.ndarray, columns: np.ndarray,
+                levels: np.ndarray, correct: np.ndarray) -> np.ndarray:
+    """Прогноз і крок фільтрації трасування знань для хвилі відповідей різних учнів"""
+    high = store.posterior_high[rows, columns]
+    predicted = tracer.predict(high, columns, levels)
+    store.posterior_high[rows, columns] = tracer.step(high, columns, correct, levels)
+    return predicted
+
+
+def evaluate(db: DatabaseManager, chunk_size: int = 100000,
+             bn: Optional[SimpleBayesianNetwork] = None) -> Dict:
+    """Відтворення журналу відповідей у порядку часу з оцінкою кожного прогнозу
+    до відповіді; повертає метрики загалом і за темами"""
+    bn = bn or SimpleBayesianNetwork()
+    store = StudentStateStore(capacity=chunk_size)
+    store.half_life_days = bn.half_life_days or np.inf
+
+    success = np.array([bn.success_given_skill(level) for level in DIFFICULTY_LEVELS])
+    result_correct = np.array([bn.result_tables[level][1] for level in DIFFICULTY_LEVELS])
+    level_codes = {level: i for i, level in enumerate(DIFFICULTY_LEVELS)}
+    topics = sorted(TOPIC_TO_NODE)
+    topic_index = {topic: i for i, topic in enumerate(topics)}
+    metrics = {topic: _Metrics() for topic in topics}
+    overall = _Metrics()
+    tracer = bn.knowledge_tracer() if bn.mode == 'knowledge_tracing' else None
+
+    # Архіви компактації та таблиця answers, злиті за часом відповіді
+    for chunk in db.iter_answer_history_chunks(chunk_size):
+        # Відповіді без позначки правильності не оцінюються і не оновлюють модель
+        chunk = [row for row in chunk if row[5] is not None]
+        if not chunk:
+            continue
+        _, user_ids, _, chunk_topics, difficulties, is_correct, _, submitted_at = zip(*chunk)
+
+        rows = np.array([store.add(user_id) for user_id in user_ids])
+        topic_codes = np.array([topic_index.get(str(t).lower(), -1) for t in chunk_topics])
+        columns = np.array([store.skill_columns[topic_node(t)] for t in chunk_topics])
+        levels = np.array([level_codes.get(d, level_codes['medium']) for d in difficulties])
+        correct = np.array(is_correct, dtype=np.int64)
+        times = np.array(submitted_at, dtype='datetime64[s]').astype(np.int64).astype(np.float64)
+
+        # Хвиля k містить k-ту відповідь кожного учня в порції: учні в хвилі різні,
+        # а хвилі йдуть по черзі, тож порядок відповідей кожного учня зберігається
+        order = np.argsort(rows, kind='stable')
+        sorted_rows = rows[order]
+        starts = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+        group_start = np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+        waves = np.empty(len(rows), dtype=np.int64)
+        waves[order] = np.arange(len(rows)) - group_start
+
+        by_wave = np.argsort(waves, kind='stable')
+        bounds = np.flatnonzero(np.diff(waves[by_wave])) + 1
+
+        predicted = np.empty(len(rows))
+        for part in np.split(by_wave, bounds):
+            if tracer is not None:
+                predicted[part] = _trace_wave(store, tracer, rows[part], columns[part],
+                                              levels[part], correct[part])
+                continue
+            predicted[part] = _replay_wave(store, rows[part], columns[part], levels[part],
+                                           correct[part], times[part], success, result_correct)
+
+        overall.update(predicted, correct)
+        for code, topic in enumerate(topics):
+            mask = topic_codes == code
+            if mask.any():
+                metrics[topic].update(predicted[mask], correct[mask])
+
+    return {
+        'overall': overall.summary(),
+        'by_topic': {topic: m.summary() for topic, m in metrics.items()},
+        'students': len(store)
+    }
+
+
+def _format(value) -> str:
+    return "—" if value is None else f"{value:.4f}"
+
+
+def print_report(report: Dict):
+    """Друк звіту оцінювання"""
+    print("=" * 60)
+    print("ОЦІНКА ТОЧНОСТІ ПРОГНОЗІВ predict_success")
+    print("=" * 60)
+    print(f"Учнів: {report['students']}, відповідей: {report['overall']['count']}")
+    print(f"\n{'Тема':<12}{'N':>9}{'Log-loss':>11}{'Brier':>9}{'AUC':>9}")
+    for topic, summary in list(report['by_topic'].items()) + [('РАЗОМ', report['overall'])]:
+        print(f"{topic:<12}{summary['count']:>9}{_format(summary['log_loss']):>11}"
+              f"{_format(summary['brier']):>9}{_format(summary['auc']):>9}")
+
+    for topic, summary in report['by_topic'].items():
+        if not summary['calibration']:
+            continue
+        print(f"\nКалібрування ({topic}): прогноз -> спостережено")
+        for row in summary['calibration']:
+            print(f"   {row['bin']}: {row['mean_predicted']:.3f} -> {row['observed']:.3f}"
+                  f" ({row['count']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Потокова оцінка прогнозів на журналі відповідей")
+    parser.add_argument("--db", default="adaptive_learning.db")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--mode", choices=MODES, default='static')
+    parser.add_argument("--max-log-loss", type=float, default=None,
+                        help="код виходу 1, якщо загальний log-loss більший")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    report = evaluate(db, args.chunk_size, SimpleBayesianNetwork(mode=args.mode))
+    db.close()
+    print_report(report)
+
+    log_loss = report['overall']['log_loss']
+    if args.max_log_loss is not None and log_loss is not None and log_loss > args.max_log_loss:
+        print(f"\n✗ Log-loss {log_loss:.4f} перевищує поріг {args.max_log_loss}")
+        sys.exit(1)
@@ -0,0 +1,149 @@
+
+import argparse
+import json
+import os
+from typing import Dict, List
+import numpy as np
+from database import DatabaseManager
+
+# Стовпці експорту: ім'я -> тип даних (little-endian, для np.memmap)
+COLUMNS = {
+    'user_idx': '<i4',
+    'task_idx': '<i4',
+    'topic_code': '<i2',
+    'difficulty_code': '<i2',
+    'is_correct': '<i1',
+    'time_spent': '<i4',
+    'timestamp': '<i8'
+}
+
+# Словники для перекодування ідентифікаторів у індекси
+DICTIONARIES = ['users', 'tasks', 'topics', 'difficulties']
+
+META_FILE = "meta.json"
+
+
+class _Dictionary:
+    """Відображення значень у щільні індекси (лише додавання)"""
+
+    def __init__(self, values: List[str]):
+        self.values = list(values)
+        self.index = {value: i for i, value in enumerate(self.values)}
+
+    def encode(self, values) -> np.ndarray:
+        codes = np.empty(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            code = self.index.get(value)
+            if code is None:
+                code = self.index[value] = len(self.values)
+                self.values.append(value)
+            codes[i] = code
+        return codes
+
+
+def _write_json(path: str, data):
+    # Запис через тимчасовий файл, щоб не лишити пошкоджений JSON
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def export_answers(db: DatabaseManager, out_dir: str, chunk_size: int = 10000,
+                   full: bool = False) -> int:
+    """Експорт (або дописування нових) відповідей у стовпчикові файли; повертає кількість нових рядків"""
+    os.makedirs(out_dir, exist_ok=True)
+    meta_path = os.path.join(out_dir, META_FILE)
+
+    meta = {'count': 0, 'last_rowid': 0, 'columns': COLUMNS}
+    if not full:
+        meta = _read_json(meta_path, meta)
+    dictionaries = {
+        name: _Dictionary([] if full else _read_json(os.path.join(out_dir, f"{name}.json"), []))
+        for name in DICTIONARIES
+    }
+
+    files = {}
+    for column, dtype in COLUMNS.items():
+        path = os.path.join(out_dir, f"{column}.bin")
+        # Відкидаємо хвіст, дописаний перерваним експортом після останнього meta.json
+        with open(path, 'ab') as f:
+            f.truncate(meta['count'] * np.dtype(dtype).itemsize)
+        files[column] = open(path, 'ab')
+
+    exported = 0
+    try:
+        for rows in db.iter_answer_chunks(meta['last_rowid'], chunk_size):
+            rowid, user_id, task_id, topic, difficulty, is_correct, time_spent, submitted_at = zip(*rows)
+
+            columns = {
+                'user_idx': dictionaries['users'].encode(user_id),
+                'task_idx': dictionaries['tasks'].encode(task_id),
+                'topic_code': dictionaries['topics'].encode(topic),
+                'difficulty_code': dictionaries['difficulties'].encode(difficulty),
+                # -1 - правильність не вказана
+                'is_correct': np.array([-1 if c is None else int(c) for c in is_correct]),
+                'time_spent': np.array([t or 0 for t in time_spent]),
+                'timestamp': np.array(submitted_at, dtype='datetime64[s]').astype(np.int64)
+            }
+            for column, dtype in COLUMNS.items():
+                columns[column].astype(dtype).tofile(files[column])
+
+            exported += len(rows)
+            meta['last_rowid'] = rowid[-1]
+    finally:
+        for f in files.values():
+            f.close()
+
+    # Словники пишемо до meta.json: meta - ознака завершеного експорту
+    for name, dictionary in dictionaries.items():
+        _write_json(os.path.join(out_dir, f"{name}.json"), dictionary.values)
+    meta['count'] += exported
+    meta['columns'] = COLUMNS
+    _write_json(meta_path, meta)
+
+    return exported
+
+
+def load_answers(out_dir: str) -> Dict:
+    """Відкриття експорту: стовпці як np.memmap (лише читання) та словники"""
+    meta = _read_json(os.path.join(out_dir, META_FILE), None)
+    if meta is None:
+        raise FileNotFoundError(f"Експорт не знайдено в {out_dir}")
+
+    data = {}
+    for column, dtype in meta['columns'].items():
+        if meta['count'] == 0:
+            data[column] = np.empty(0, dtype=dtype)
+        else:
+            data[column] = np.memmap(os.path.join(out_dir, f"{column}.bin"), dtype=dtype,
+                                     mode='r', shape=(meta['count'],))
+    for name in DICTIONARIES:
+        data[name] = _read_json(os.path.join(out_dir, f"{name}.json"), [])
+    data['count'] = meta['count']
+    return data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Експорт журналу відповідей у стовпчикові файли NumPy")
+    parser.add_argument("out_dir", nargs="?", default="answers_export")
+    parser.add_argument("--db", default="adaptive_learning.db")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--full", action="store_true", help="перезаписати експорт з нуля")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    exported = export_answers(db, args.out_dir, args.chunk_size, args.full)
+    db.close()
+
+    data = load_answers(args.out_dir)
+    print(f"Експортовано нових відповідей: {exported}")
+    print(f"Всього у {args.out_dir}: {data['count']} відповідей, "
+          f"{len(data['users'])} учнів, {len(data['tasks'])} завдань")
@@ -0,0 +1,183 @@
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple, FrozenSet, Iterable
+from storage import StorageBackend
+
+# Одиниця -> (базова одиниця, множник); відповідь "100 мм" дорівнює "10 см"
+UNITS = {
+    'мм': ('см', 0.1), 'см': ('см', 1.0), 'дм': ('см', 10.0), 'м': ('см', 100.0), 'км': ('см', 1e5),
+    'mm': ('см', 0.1), 'cm': ('см', 1.0), 'dm': ('см', 10.0), 'm': ('см', 100.0), 'km': ('см', 1e5),
+    'мм2': ('см2', 0.01), 'см2': ('см2', 1.0), 'дм2': ('см2', 100.0), 'м2': ('см2', 1e4),
+    'мм3': ('см3', 0.001), 'см3': ('см3', 1.0), 'дм3': ('см3', 1000.0), 'м3': ('см3', 1e6),
+    'л': ('см3', 1000.0),
+    'г': ('г', 1.0), 'кг': ('г', 1000.0),
+    'с': ('с', 1.0), 'хв': ('с', 60.0), 'год': ('с', 3600.0),
+    '°': ('°', 1.0), 'град': ('°', 1.0),
+    '%': ('%', 1.0), 'грн': ('грн', 1.0)
+}
+
+# Синоніми текстових відповідей
+TEXT_ALIASES = {'yes': 'так', 'да': 'так', 'no': 'ні', 'нет': 'ні'}
+
+# Значущі цифри числа в ключі: похибки перерахунку одиниць не впливають на рівність
+SIGNIFICANT_DIGITS = 12
+
+_NUMBER = r'[-+]?\d+(?:[.,]\d+)?(?:/\d+(?:[.,]\d+)?)?'
+_VALUE_RE = re.compile(rf'(?P<number>{_NUMBER})\s*(?P<unit>°|%|[^\W\d_]+\.?(?:\^?[23])?)?')
+# Кома чи крапка з комою перед наступним "ім'я =" розділяє присвоєння
+_ASSIGNMENT_SPLIT_RE = re.compile(r'\s*(?:;|,|\s(?:і|й|та|и|and))\s*(?=[^\W\d_][\w\']*\s*=)')
+_LIST_SPLIT_RE = re.compile(r'\s*;\s*|,\s+')
+
+
+def _number(text: str) -> float:
+    text = text.replace(',', '.')
+    if '/' in text:
+        numerator, denominator = text.split('/')
+        value = float(numerator) / float(denominator)
+    else:
+        value = float(text)
+    return float(f"{value:.{SIGNIFICANT_DIGITS}g}")
+
+
+def _match_value(text: str):
+    # Пробіли всередині числа не важливі: "1 000", "- 3", "1, 5" (десяткова кома)
+    return _VALUE_RE.fullmatch(text) or _VALUE_RE.fullmatch(re.sub(r'\s+', '', text))
+
+
+def _parse_value(text: str, keep_unit: bool = True) -> Tuple:
+    """Одне значення: ('number', значення в базовій одиниці, одиниця) або ('text', рядок)"""
+    match = _match_value(text)
+    if match is None:
+        return ('text', TEXT_ALIASES.get(text, text))
+    try:
+        value = _number(match.group('number'))
+    except ZeroDivisionError:
+        return ('text', text)
+    unit = match.group('unit')
+    if unit is None or not keep_unit:
+        return ('number', value, None)
+    unit = unit.replace('.', '').replace('^', '')
+    base, factor = UNITS.get(unit, (unit, 1.0))
+    return ('number', float(f"{value * factor:.{SIGNIFICANT_DIGITS}g}"), base)
+
+
+def _clean(text) -> str:
+    # NFKC: "²" -> "2", повноширинні символи -> звичайні; "−" -> "-"
+    text = unicodedata.normalize('NFKC', str(text)).casefold().replace('−', '-')
+    return ' '.join(text.split()).strip(' .;')
+
+
+@lru_cache(maxsize=65536)
+def normalize_answer(text) -> Tuple:
+    """Нормалізований ключ відповіді; рівні ключі - рівноцінні відповіді
+
+    Підтримує числа (дроби, десяткова кома, пробіли між розрядами), одиниці
+    з перерахунком, кортежі "(2, -1)" та невпорядковані присвоєння "x=6, y=4".
+    Без дужок текст, що без пробілів є одним числом ("1, 5"), - число, а не список."""
+    text = _clean(text) if text is not None else ''
+
+    if '=' in text:
+        pairs = []
+        for part in _ASSIGNMENT_SPLIT_RE.split(text):
+            name, sep, value = part.partition('=')
+            name = name.replace(' ', '')
+            if not sep or not name or '=' in value:
+                return ('text', text)
+            pairs.append((name, _parse_value(value.strip())))
+        return ('assignments', frozenset(pairs))
+
+    if len(text) >= 2 and text[0] in '([' and text[-1] in ')]':
+        inner = text[1:-1].strip()
+        parts = re.split(r'\s*;\s*', inner) if ';' in inner else re.split(r'\s*,\s*', inner)
+        return ('tuple', tuple(_parse_value(part) for part in parts))
+
+    if _match_value(text):
+        return _parse_value(text)
+
+    parts = _LIST_SPLIT_RE.split(text)
+    if len(parts) > 1 and all(_match_value(part) for part in parts):
+        return ('tuple', tuple(_parse_value(part) for part in parts))
+
+    return _parse_value(text)
+
+
+def answer_keys(correct_answer) -> FrozenSet[Tuple]:
+    """Усі ключі, що зараховуються для правильної відповіді завдання"""
+    key = normalize_answer(correct_answer)
+    keys = {key}
+    if key[0] == 'assignments' and len(key[1]) == 1:
+        # "x=5" зараховує і просто "5"
+        (_, value_key), = key[1]
+        keys.add(value_key)
+        key = value_key
+    if key[0] == 'number' and key[2] is not None:
+        # Число без одиниці зараховується, якщо значення збігається з записаним у ключі
+        value = _clean(correct_answer).rpartition('=')[2].strip()
+        keys.add(_parse_value(value, keep_unit=False))
+    return frozenset(keys)
+
+
+class AnswerGrader:
+    """Перевірка відповідей учнів за нормалізованими ключами завдань
+
+    Правильна відповідь кожного завдання розбирається один раз і кешується
+    за task_id до зміни покоління банку завдань; розбір відповідей учнів
+    кешується normalize_answer, тож однакові відповіді в масовому пакеті
+    розбираються лише раз."""
+
+    def __init__(self, storage: StorageBackend):
+        self.storage = storage
+        self._keys: Dict[str, FrozenSet[Tuple]] = {}
+        self._generation = None
+
+    def _sync(self):
+        # Будь-яка зміна банку (і з інших процесів) скидає розібрані ключі
+        generation = self.storage.task_bank_generation()
+        if generation != self._generation:
+            self._keys.clear()
+            self._generation = generation
+
+    def keys_for(self, task_id: str) -> FrozenSet[Tuple]:
+        self._sync()
+        return self._task_keys(task_id)
+
+    def _task_keys(self, task_id: str) -> FrozenSet[Tuple]:
+        keys = self._keys.get(task_id)
+        if keys is None:
+            task = self.storage.get_task(task_id)
+            if task is None:
+                raise ValueError(f"Завдання {task_id} не знайдене")
+            keys = self._keys[task_id] = answer_keys(task['correct_answer'])
+        return keys
+
+    def invalidate(self, task_id: Optional[str] = None):
+        """Скидання кешованих ключів (після зміни правильної відповіді)"""
+        if task_id is None:
+            self._keys.clear()
+        else:
+            self._keys.pop(task_id, None)
+
+    def grade(self, task_id: str, user_response) -> bool:
+        """Чи правильна відповідь учня"""
+        return normalize_answer(user_response) in self.keys_for(task_id)
+
+    def grade_batch(self, task_ids: Iterable[str], user_responses: Iterable) -> List[bool]:
+        """Перевірка пакета відповідей (task_ids[i] - завдання відповіді user_responses[i])"""
+        self._sync()
+        keys_for = self._task_keys
+        return [normalize_answer(response) in keys_for(task_id)
+                for task_id, response in zip(task_ids, user_responses)]
+
+    def grade_and_record(self, submissions: Iterable[Tuple]) -> List[Dict]:
+        """Перевірка та запис пакета (user_id, task_id, user_response, time_spent)
+        одним викликом create_answers"""
+        submissions = list(submissions)
+        grades = self.grade_batch((s[1] for s in submissions), (s[2] for s in submissions))
+        answers = [(user_id, task_id, user_response, is_correct, time_spent)
+                   for (user_id, task_id, user_response, time_spent), is_correct
+                   in zip(submissions, grades)]
+        answer_ids = self.storage.create_answers(answers)
+        return [{'answer_id': answer_id, 'is_correct': is_correct}
+                for answer_id, is_correct in zip(answer_ids, grades)]
@@ -0,0 +1,187 @@
+
+import threading
+from typing import Optional, Dict, List
+import numpy as np
+
+# Скомпільовані дерева, спільні для всіх мереж з однаковою структурою
+_COMPILED = {}
+_COMPILED_LOCK = threading.Lock()
+
+
+def structure_key(model):
+    """Ключ структури мережі: вузли, ребра та стани змінних (без значень CPT)"""
+    return (
+        tuple(sorted(model.nodes())),
+        tuple(sorted(model.edges())),
+        tuple(sorted((cpd.variable, tuple(cpd.state_names[cpd.variable]))
+                     for cpd in model.get_cpds()))
+    )
+
+
+def compile_junction_tree(model) -> 'CompiledJunctionTree':
+    """Скомпільоване дерево для структури моделі (компілюється один раз на процес)"""
+    key = structure_key(model)
+    with _COMPILED_LOCK:
+        compiled = _COMPILED.get(key)
+        if compiled is None:
+            compiled = _COMPILED[key] = CompiledJunctionTree(model)
+        return compiled
+
+
+class CompiledJunctionTree:
+    """Структура дерева з'єднань: кліки, сепаратори, порядок обходу та
+    закріплення CPT за кліками. Не містить значень CPT, тож спільна для учнів"""
+
+    def __init__(self, model):
+        tree = model.to_junction_tree()
+        self.cliques = [tuple(sorted(clique)) for clique in tree.nodes()]
+        index = {frozenset(clique): i for i, clique in enumerate(self.cliques)}
+
+        self.states = {cpd.variable: list(cpd.state_names[cpd.variable])
+                       for cpd in model.get_cpds()}
+        self.cards = {var: len(states) for var, states in self.states.items()}
+        # Цілі мітки осей для np.einsum
+        self.labels = {var: i for i, var in enumerate(sorted(self.states))}
+
+        # Корінь - кліка 0; обхід у ширину задає батьків і дітей
+        neighbours = {i: [] for i in range(len(self.cliques))}
+        for a, b in tree.edges():
+            neighbours[index[frozenset(a)]].append(index[frozenset(b)])
+            neighbours[index[frozenset(b)]].append(index[frozenset(a)])
+        self.parent = {0: None}
+        self.children = {i: [] for i in range(len(self.cliques))}
+        queue = [0]
+        for clique in queue:
+            for other in neighbours[clique]:
+                if other not in self.parent:
+                    self.parent[other] = clique
+                    self.children[clique].append(other)
+                    queue.append(other)
+        self.separators = {
+            c: tuple(sorted(set(self.cliques[c]) & set(self.cliques[p])))
+            for c, p in self.parent.items() if p is not None
+        }
+
+        # Кожна CPT (та evidence її змінної) закріплюється за першою клікою з її родиною
+        self.home = {}
+        for cpd in model.get_cpds():
+            family = set(cpd.variables)
+            self.home[cpd.variable] = next(i for i, clique in enumerate(self.cliques)
+                                           if family <= set(clique))
+
+    def axes(self, variables) -> List[int]:
+        return [self.labels[var] for var in variables]
+
+
+class JunctionTreeInference:
+    """Точний інференс на скомпільованому дереві з кешованим калібруванням
+
+    Потенціали клік і повідомлення кешуються між запитами. Заміна CPT
+    (нова TabularCPD у моделі) або зміна evidence робить брудними лише
+    кліки, за якими вони закріплені, та повідомлення на шляху до кореня."""
+
+    def __init__(self, model, compiled: Optional[CompiledJunctionTree] = None):
+        self.model = model
+        self.compiled = compiled or compile_junction_tree(model)
+        self._cpds = {}
+        self._evidence = {}
+        self._potentials = {}
+        self._up = {}
+        self._down = {}
+        # Кількість клік, перерахованих під час останнього запиту
+        self.last_recalibrated = 0
+
+    def _factor(self, cpd):
+        # (стани змінної × комбінації батьків) -> тензор з віссю на кожну змінну родини
+        shape = [self.compiled.cards[var] for var in cpd.variables]
+        return np.asarray(cpd.get_values(), dtype=np.float64).reshape(shape)
+
+    def _build_potential(self, c: int) -> np.ndarray:
+        compiled = self.compiled
+        clique = compiled.cliques[c]
+        operands = []
+        for var in clique:
+            # Одиничні множники гарантують наявність усіх осей кліки
+            operands += [np.ones(compiled.cards[var]), [compiled.labels[var]]]
+        for var, home in compiled.home.items():
+            if home != c:
+                continue
+            cpd = self._cpds[var]
+            operands += [self._factor(cpd), compiled.axes(cpd.variables)]
+            if var in self._evidence:
+                indicator = np.zeros(compiled.cards[var])
+                indicator[compiled.states[var].index(self._evidence[var])] = 1.0
+                operands += [indicator, [compiled.labels[var]]]
+        return np.einsum(*operands, compiled.axes(clique))
+
+    def _refresh(self, evidence: Dict):
+        """Позначення брудних клік після зміни CPT або evidence"""
+        compiled = self.compiled
+        # Перший запит будує всі кліки, зокрема без закріплених CPT
+        dirty = set() if self._potentials else set(range(len(compiled.cliques)))
+        for cpd in self.model.get_cpds():
+            if self._cpds.get(cpd.variable) is not cpd:
+                self._cpds[cpd.variable] = cpd
+                dirty.add(compiled.home[cpd.variable])
+        for var in set(evidence) | set(self._evidence):
+            if evidence.get(var) != self._evidence.get(var):
+                dirty.add(compiled.home[var])
+        self._evidence = dict(evidence)
+
+        for c in dirty:
+            self._potentials[c] = self._build_potential(c)
+            # Повідомлення вгору застаріли на шляху від кліки до кореня
+            while c is not None:
+                self._up.pop(c, None)
+                c = compiled.parent[c]
+        if dirty:
+            self._down.clear()
+        self.last_recalibrated = len(dirty)
+
+    @staticmethod
+    def _normalize(message: np.ndarray) -> np.ndarray:
+        total = message.sum()
+        return message / total if total > 0 else message
+
+    def _message_up(self, c: int) -> np.ndarray:
+        """Повідомлення від кліки c до її батька"""
+        if c not in self._up:
+            compiled = self.compiled
+            operands = [self._potentials[c], compiled.axes(compiled.cliques[c])]
+            for child in compiled.children[c]:
+                operands += [self._message_up(child), compiled.axes(compiled.separators[child])]
+            self._up[c] = self._normalize(
+                np.einsum(*operands, compiled.axes(compiled.separators[c])))
+        return self._up[c]
+
+    def _message_down(self, c: int) -> np.ndarray:
+        """Повідомлення від батька до кліки c"""
+        if c not in self._down:
+            compiled = self.compiled
+            p = compiled.parent[c]
+            operands = [self._potentials[p], compiled.axes(compiled.cliques[p])]
+            if compiled.parent[p] is not None:
+                operands += [self._message_down(p), compiled.axes(compiled.separators[p])]
+            for sibling in compiled.children[p]:
+                if sibling != c:
+                    operands += [self._message_up(sibling),
+                                 compiled.axes(compiled.separators[sibling])]
+            self._down[c] = self._normalize(
+                np.einsum(*operands, compiled.axes(compiled.separators[c])))
+        return self._down[c]
+
+    def query(self, variables: List[str], evidence: Optional[Dict] = None) -> Dict:
+        """Маргінальні апостеріорні розподіли змінних"""
+        self._refresh(evidence or {})
+        compiled = self.compiled
+        beliefs = {}
+        for var in variables:
+            c = compiled.home[var]
+            operands = [self._potentials[c], compiled.axes(compiled.cliques[c])]
+            if compiled.parent[c] is not None:
+                operands += [self._message_down(c), compiled.axes(compiled.separators[c])]
+            for child in compiled.children[c]:
+                operands += [self._message_up(child), compiled.axes(compiled.separators[child])]
+            marginal = self._normalize(np.einsum(*operands, [compiled.labels[var]]))
+            beliefs[var] = {state: float(p) for state, p in zip(compiled.states[var], marginal)}
+        return beliefs
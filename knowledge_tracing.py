@@ -0,0 +1,96 @@
+
+from typing import Optional, Dict
+import numpy as np
+from bayesian_network import (SKILL_PRIORS, SKILL_NODES, DIFFICULTY_LEVELS, DIFFICULTY_OFFSETS,
+                              _logit, _sigmoid)
+
+# Параметри трасування знань для кожної навички:
+# learn - P(Low -> High) за одну спробу, forget - P(High -> Low),
+# slip - помилка при засвоєній навичці, guess - вгадування без неї (для середньої складності)
+KT_PARAMETERS = {
+    skill: {'learn': 0.15, 'forget': 0.02, 'slip': 0.1, 'guess': 0.2}
+    for skill in SKILL_NODES
+}
+
+
+class KnowledgeTracer:
+    """Байєсове трасування знань (динамічна мережа з двома станами на навичку)
+
+    Кожна відповідь - один крок фільтрації вперед за O(1): умовлення на
+    результат (slip/guess зі зсувом складності), потім перехід learn/forget.
+    Усі методи векторизовано: p_known, skills, correct, levels - масиви однакової форми."""
+
+    def __init__(self, parameters: Optional[Dict] = None,
+                 difficulty_offsets: Optional[Dict] = None):
+        parameters = parameters or KT_PARAMETERS
+        self.skills = list(SKILL_NODES)
+        self.learn = np.array([parameters[skill]['learn'] for skill in self.skills])
+        self.forget = np.array([parameters[skill]['forget'] for skill in self.skills])
+        self.initial = np.array([SKILL_PRIORS[skill] for skill in self.skills])
+
+        # P(успіх | High) = 1 - slip та P(успіх | Low) = guess для кожного рівня (навички × рівні)
+        offsets = difficulty_offsets or DIFFICULTY_OFFSETS
+        shift = np.array([offsets.get(level, 0.0) for level in DIFFICULTY_LEVELS])
+        slip = np.array([parameters[skill]['slip'] for skill in self.skills])
+        guess = np.array([parameters[skill]['guess'] for skill in self.skills])
+        self.p_correct_known = _sigmoid(_logit(1 - slip)[:, None] + shift[None, :])
+        self.p_correct_unknown = _sigmoid(_logit(guess)[:, None] + shift[None, :])
+
+    def parameters(self) -> Dict:
+        """Параметри у форматі KT_PARAMETERS (slip/guess - для середньої складності)"""
+        medium = DIFFICULTY_LEVELS.index('medium')
+        return {
+            skill: {'learn': float(self.learn[j]), 'forget': float(self.forget[j]),
+                    'slip': float(1 - self.p_correct_known[j, medium]),
+                    'guess': float(self.p_correct_unknown[j, medium])}
+            for j, skill in enumerate(self.skills)
+        }
+
+    def predict(self, p_known, skills, levels=1) -> np.ndarray:
+        """P(правильна відповідь) до спостереження"""
+        p_known = np.asarray(p_known, dtype=np.float64)
+        known = self.p_correct_known[skills, levels]
+        unknown = self.p_correct_unknown[skills, levels]
+        return p_known * known + (1 - p_known) * unknown
+
+    def step(self, p_known, skills, correct, levels=1) -> np.ndarray:
+        """P(High) після відповіді та переходу до наступної спроби"""
+        p_known = np.asarray(p_known, dtype=np.float64)
+        correct = np.asarray(correct).astype(bool)
+        known = self.p_correct_known[skills, levels]
+        unknown = self.p_correct_unknown[skills, levels]
+
+        # Умовлення на результат
+        likelihood_known = np.where(correct, known, 1 - known)
+        likelihood_unknown = np.where(correct, unknown, 1 - unknown)
+        joint = p_known * likelihood_known
+        posterior = joint / (joint + (1 - p_known) * likelihood_unknown)
+
+        # Перехід: навчання та забування
+        return posterior * (1 - self.forget[skills]) + (1 - posterior) * self.learn[skills]
+
+    def filter(self, skills: np.ndarray, correct: np.ndarray, levels: Optional[np.ndarray] = None,
+               mask: Optional[np.ndarray] = None, p_known: Optional[np.ndarray] = None):
+        """Фільтрація вперед історій багатьох учнів (учні × кроки)
+
+        mask позначає справжні кроки коротших історій; p_known - початковий
+        стан (учні × навички). Повертає прогнози до кожної відповіді та стан після історії."""
+        skills = np.asarray(skills)
+        correct = np.asarray(correct)
+        students, steps = skills.shape
+        levels = np.ones_like(skills) if levels is None else np.asarray(levels)
+        mask = np.ones(skills.shape, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        state = (np.tile(self.initial, (students, 1)) if p_known is None
+                 else np.array(p_known, dtype=np.float64))
+
+        rows = np.arange(students)
+        predictions = np.full(skills.shape, np.nan)
+        # Залежність лише в часі: цикл по кроках, усі учні - одним векторним кроком
+        for t in range(steps):
+            active = rows[mask[:, t]]
+            columns = skills[active, t]
+            current = state[active, columns]
+            predictions[active, t] = self.predict(current, columns, levels[active, t])
+            state[active, columns] = self.step(current, columns, correct[active, t],
+                                               levels[active, t])
+        return predictions, state
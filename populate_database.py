@@ -85,18 +85,20 @@ def populate_database():
     
     all_tasks = algebra_tasks + geometry_tasks + functions_tasks
     
-    task_ids = []
+    # Один пакетний імпорт; повнотекстовий індекс оновлюється разом із таблицею
+    task_ids = db.create_tasks_bulk([
+        {
+            "topic": task["topic"],
+            "difficulty": task["difficulty"],
+            "task_type": "short_answer",
+            "condition": task["condition"],
+            "question": task["question"],
+            "correct_answer": task["answer"],
+            "solution_steps": task["solution"]
+        }
+        for task in all_tasks
+    ])
     for task in all_tasks:
-        task_id = db.create_task(
-            topic=task["topic"],
-            difficulty=task["difficulty"],
-            task_type="short_answer",
-            condition=task["condition"],
-            question=task["question"],
-            correct_answer=task["answer"],
-            solution_steps=task["solution"]
-        )
-        task_ids.append(task_id)
         print(f"   Створено задачу: {task['topic']} ({task['difficulty']})")
     
     print(f"   Всього створено задач: {len(task_ids)}")
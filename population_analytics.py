@@ -0,0 +1,52 @@
+
+from typing import Optional, Dict, List, Sequence
+import numpy as np
+from bayesian_network import (TOPIC_TO_NODE, SKILL_NODES, DIFFICULTY_OFFSETS,
+                              success_probabilities)
+
+# Тема для кожного стовпця матриці P(High) (порядок SKILL_NODES)
+NODE_TO_TOPIC = {node: topic for topic, node in TOPIC_TO_NODE.items()}
+SKILL_TOPICS = [NODE_TO_TOPIC[skill] for skill in SKILL_NODES]
+
+
+def posteriors_from_states(states: Sequence[Dict]) -> np.ndarray:
+    """Список current_state учнів -> матриця P(High) (учні × навички)"""
+    return np.array([[state.get(skill, {}).get('High', 0) for skill in SKILL_NODES]
+                     for state in states], dtype=np.float64).reshape(-1, len(SKILL_NODES))
+
+
+def predict_success_batch(posterior_high: np.ndarray, difficulty: str = 'medium',
+                          success_tables: Optional[Dict] = None) -> np.ndarray:
+    """Ймовірність успіху кожного учня з кожної теми (учні × навички)"""
+    if success_tables is None:
+        offset = DIFFICULTY_OFFSETS.get(difficulty, 0.0)
+        p_high, p_low = success_probabilities(offset)
+    else:
+        p_high, p_low = success_tables.get(difficulty, success_tables['medium'])
+    return posterior_high * p_high + (1 - posterior_high) * p_low
+
+
+def weakest_topic_batch(posterior_high: np.ndarray) -> np.ndarray:
+    """Найслабша тема кожного учня (як get_weakest_topic, при рівності - перша)"""
+    return np.array(SKILL_TOPICS)[np.argmin(posterior_high, axis=1)]
+
+
+def top_k_at_risk(posterior_high: np.ndarray, user_ids: Sequence[str],
+                  k: int = 10) -> Dict[str, List[Dict]]:
+    """k учнів з найменшою P(High) для кожної теми (за зростанням P(High))"""
+    n = posterior_high.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return {topic: [] for topic in SKILL_TOPICS}
+
+    # argpartition по всіх стовпцях одразу, сортуємо лише відібрані k рядків
+    candidates = np.argpartition(posterior_high, k - 1, axis=0)[:k]
+    values = np.take_along_axis(posterior_high, candidates, axis=0)
+    order = np.argsort(values, axis=0, kind='stable')
+    rows = np.take_along_axis(candidates, order, axis=0)
+
+    return {
+        topic: [{'user_id': user_ids[i], 'p_high': float(posterior_high[i, j])}
+                for i in rows[:, j]]
+        for j, topic in enumerate(SKILL_TOPICS)
+    }
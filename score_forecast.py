@@ -0,0 +1,91 @@
+
+import itertools
+from typing import Optional, Dict, List, Tuple
+import numpy as np
+from bayesian_network import (TOPIC_TO_NODE, SKILL_NODES, DIFFICULTY_OFFSETS,
+                              success_probabilities)
+
+# Спрощена специфікація тесту: (тема, складність, кількість завдань, бали за завдання)
+NMT_BLUEPRINT = [
+    ('algebra', 'easy', 4, 1), ('algebra', 'medium', 3, 1), ('algebra', 'hard', 1, 2),
+    ('geometry', 'easy', 3, 1), ('geometry', 'medium', 3, 1), ('geometry', 'hard', 1, 2),
+    ('functions', 'easy', 3, 1), ('functions', 'medium', 3, 1), ('functions', 'hard', 1, 2)
+]
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Усі комбінації рівнів навичок (1 - High) у порядку SKILL_NODES
+SKILL_CONFIGS = np.array(list(itertools.product([0, 1], repeat=len(SKILL_NODES))), dtype=bool)
+
+
+def _group_success(blueprint: List[Tuple], success_tables: Optional[Dict]) -> np.ndarray:
+    """(P(успіх | High), P(успіх | Low)) для кожної групи специфікації (групи × 2)
+
+    success_tables: складність -> пара ймовірностей або (тема, складність) -> пара"""
+    success = []
+    for topic, difficulty, _, _ in blueprint:
+        if success_tables is None:
+            success.append(success_probabilities(DIFFICULTY_OFFSETS.get(difficulty, 0.0)))
+        else:
+            success.append(success_tables.get((topic, difficulty)) or
+                           success_tables.get(difficulty, success_tables.get('medium')))
+    return np.array(success, dtype=np.float64)
+
+
+def simulate_config_scores(blueprint: Optional[List[Tuple]] = None, n_simulations: int = 10000,
+                           success_tables: Optional[Dict] = None,
+                           seed: Optional[int] = None) -> np.ndarray:
+    """Гістограми балів тесту для кожної комбінації рівнів навичок (комбінації × бали)
+
+    Тест складається n_simulations разів за кожної з 2^навичок комбінацій;
+    завдання групи (тема, складність) за фіксованого рівня навички незалежні,
+    тож кількість розв'язаних у групі - одне біноміальне значення."""
+    blueprint = blueprint or NMT_BLUEPRINT
+    rng = np.random.default_rng(seed)
+    columns = np.array([SKILL_NODES.index(TOPIC_TO_NODE.get(topic, 'Algebra'))
+                        for topic, _, _, _ in blueprint])
+    counts = np.array([count for _, _, count, _ in blueprint])
+    points = np.array([value for _, _, _, value in blueprint])
+    success = _group_success(blueprint, success_tables)
+
+    # Ймовірність успіху в кожній групі за кожної комбінації (комбінації × групи)
+    p = np.where(SKILL_CONFIGS[:, columns], success[:, 0], success[:, 1])
+    solved = rng.binomial(counts, p[:, None, :], size=(len(SKILL_CONFIGS), n_simulations, len(counts)))
+    scores = solved @ points                                    # комбінації × симуляції
+
+    max_score = int(counts @ points)
+    offsets = np.arange(len(SKILL_CONFIGS))[:, None] * (max_score + 1)
+    return np.bincount((scores + offsets).ravel(),
+                       minlength=len(SKILL_CONFIGS) * (max_score + 1)
+                       ).reshape(len(SKILL_CONFIGS), max_score + 1)
+
+
+def forecast_scores(posterior_high: np.ndarray, blueprint: Optional[List[Tuple]] = None,
+                    n_simulations: int = 10000, success_tables: Optional[Dict] = None,
+                    percentiles=PERCENTILES, seed: Optional[int] = None) -> Dict:
+    """Розподіл балів тесту для кожного учня (posterior_high: учні × навички)
+
+    Симуляції спільні для всього класу: розподіл учня - суміш гістограм
+    комбінацій навичок з вагами за його апостеріорними P(High), тож час
+    майже не залежить від кількості учнів."""
+    posterior_high = np.atleast_2d(np.asarray(posterior_high, dtype=np.float64))
+    histograms = simulate_config_scores(blueprint, n_simulations, success_tables, seed)
+
+    # Вага комбінації - добуток маргінальних P(High) / P(Low) навичок (учні × комбінації)
+    weights = np.prod(np.where(SKILL_CONFIGS[None, :, :], posterior_high[:, None, :],
+                               1 - posterior_high[:, None, :]), axis=2)
+    distribution = weights @ (histograms / n_simulations)       # учні × бали
+
+    values = np.arange(distribution.shape[1])
+    mean = distribution @ values
+    std = np.sqrt(np.maximum(distribution @ values ** 2 - mean ** 2, 0.0))
+    cdf = np.cumsum(distribution, axis=1)
+    return {
+        'max_score': int(values[-1]),
+        'mean': mean,
+        'std': std,
+        # Найменший бал k з P(бал ≤ k) ≥ q%
+        'percentiles': {q: (cdf < q / 100 - 1e-12).sum(axis=1) for q in percentiles},
+        'distribution': distribution,
+        'simulations': n_simulations
+    }
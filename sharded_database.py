@@ -0,0 +1,318 @@
+
+import heapq
+import os
+import threading
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List
+import logging
+from database import DatabaseManager
+from storage import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+class TaskBankManager(DatabaseManager):
+    """Окрема БД зі спільним банком завдань і каталогом email користувачів"""
+
+    def _init_db(self):
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA journal_mode = WAL")
+        self._create_task_tables(cursor)
+        # email -> користувач: первинний ключ гарантує унікальність email у всіх шардах
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_emails (
+            email TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL
+        ) WITHOUT ROWID
+        ''')
+        conn.commit()
+
+    def register_email(self, email: str, user_id: str):
+        """Запис email у каталог (sqlite3.IntegrityError, якщо його вже зайнято)"""
+        conn = self._get_connection()
+        try:
+            conn.execute("INSERT INTO user_emails (email, user_id) VALUES (?, ?)", (email, user_id))
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def unregister_email(self, email: str):
+        conn = self._get_connection()
+        conn.execute("DELETE FROM user_emails WHERE email = ?", (email,))
+        conn.commit()
+
+    def get_user_id_by_email(self, email: str) -> Optional[str]:
+        cursor = self._get_connection().cursor()
+        cursor.execute("SELECT user_id FROM user_emails WHERE email = ?", (email,))
+        row = cursor.fetchone()
+        return row['user_id'] if row else None
+
+
+class ShardManager(DatabaseManager):
+    """Шард з таблицями користувачів; банк завдань під'єднано як 'bank'"""
+
+    def __init__(self, db_path: str, tasks_db_path: str):
+        self.tasks_db_path = tasks_db_path
+        super().__init__(db_path)
+
+    def _get_connection(self):
+        if self.connection is None:
+            conn = super()._get_connection()
+            # Неуточнене ім'я tasks розв'язується в bank.tasks, бо в main його немає
+            conn.execute("ATTACH DATABASE ? AS bank", (self.tasks_db_path,))
+        return self.connection
+
+    def _init_db(self):
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON")
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cursor.execute("PRAGMA journal_mode = WAL")
+        # Зовнішній ключ між різними файлами SQLite неможливий
+        self._create_user_tables(cursor, task_foreign_key=False)
+        self._migrate_user_tables(cursor)
+        conn.commit()
+
+
+class ShardedDatabaseManager(StorageBackend):
+    """Менеджер БД, що розподіляє дані користувачів між N файлами SQLite
+
+    Шарди розводять лише блокування запису SQLite; розбір JSON і виклики
+    sqlite3 тримають GIL, тож запис масштабується слабко. Виміряно
+    benchmark_storage.py (8 потоків-записувачів): 1 шард - 4.1k відповідей/с,
+    2 - 5.4k/с, 4 - 5.9k/с, 8 - 3.8k/с. Понад 2-4 шарди виграшу немає,
+    тому пул для запитів до всіх шардів не більший за кількість ядер."""
+
+    def __init__(self, base_dir: str = "shards", num_shards: int = 4):
+        os.makedirs(base_dir, exist_ok=True)
+        self.base_dir = base_dir
+        self.num_shards = num_shards
+
+        self.tasks = TaskBankManager(os.path.join(base_dir, "tasks.db"))
+        self.shards = [
+            ShardManager(os.path.join(base_dir, f"users_{i:02d}.db"), self.tasks.db_path)
+            for i in range(num_shards)
+        ]
+        # З'єднання SQLite не можна використовувати з кількох потоків одночасно
+        self._tasks_lock = threading.Lock()
+        self._locks = [threading.Lock() for _ in range(num_shards)]
+        self._executor = ThreadPoolExecutor(max_workers=min(num_shards, os.cpu_count() or 1))
+        self._fill_email_directory()
+        logger.info(f"Шардована БД ініціалізована: {num_shards} шардів у {base_dir}")
+
+    def shard_index(self, user_id: str) -> int:
+        """Стабільний номер шарду для користувача"""
+        return zlib.crc32(user_id.encode('utf-8')) % self.num_shards
+
+    def _on_shard(self, user_id: str, method: str, *args, **kwargs):
+        i = self.shard_index(user_id)
+        with self._locks[i]:
+            return getattr(self.shards[i], method)(user_id, *args, **kwargs)
+
+    def _on_tasks(self, method: str, *args, **kwargs):
+        with self._tasks_lock:
+            return getattr(self.tasks, method)(*args, **kwargs)
+
+    def _fill_email_directory(self):
+        """Каталог email для шардів, створених до його появи (одноразово)"""
+        conn = self.tasks._get_connection()
+        if conn.execute("SELECT 1 FROM user_emails LIMIT 1").fetchone():
+            return
+        for shard in self.shards:
+            rows = shard._get_connection().execute("SELECT email, id FROM users").fetchall()
+            conn.executemany("INSERT OR IGNORE INTO user_emails (email, user_id) VALUES (?, ?)",
+                             [tuple(row) for row in rows])
+        conn.commit()
+
+    def map_shards(self, fn) -> List:
+        """Паралельне виконання fn(shard) на всіх шардах"""
+        def run(i):
+            with self._locks[i]:
+                return fn(self.shards[i])
+        return list(self._executor.map(run, range(self.num_shards)))
+
+    # ========== КОРИСТУВАЧІ ==========
+
+    def create_user(self, username: str, email: str, role: str = "student",
+                    user_id: Optional[str] = None) -> str:
+        """Створення користувача у шарді, визначеному його ID
+        
+        Email спершу записується в каталог банку - зайнятий email у будь-якому
+        шарді дає sqlite3.IntegrityError, як і в DatabaseManager."""
+        user_id = user_id or str(uuid.uuid4())
+        with self._tasks_lock:
+            self.tasks.register_email(email, user_id)
+        i = self.shard_index(user_id)
+        try:
+            with self._locks[i]:
+                return self.shards[i].create_user(username, email, role, user_id=user_id)
+        except Exception:
+            with self._tasks_lock:
+                self.tasks.unregister_email(email)
+            raise
+
+    def get_user_by_email(self, email: str) -> Optional[Dict]:
+        """Пошук користувача за email (через каталог - лише в його шарді)"""
+        with self._tasks_lock:
+            user_id = self.tasks.get_user_id_by_email(email)
+        if user_id is None:
+            return None
+        i = self.shard_index(user_id)
+        with self._locks[i]:
+            return self.shards[i].get_user_by_email(email)
+
+    # ========== БАЙЄСОВІ МОДЕЛІ ==========
+
+    def create_bayesian_model(self, user_id: str, network_structure: Dict,
+                              cpt_parameters: Dict, current_state: Dict) -> str:
+        return self._on_shard(user_id, 'create_bayesian_model',
+                              network_structure, cpt_parameters, current_state)
+
+    def update_bayesian_model(self, user_id: str, current_state: Dict) -> bool:
+        return self._on_shard(user_id, 'update_bayesian_model', current_state)
+
+    def get_bayesian_model(self, user_id: str) -> Optional[Dict]:
+        return self._on_shard(user_id, 'get_bayesian_model')
+
+    def delete_bayesian_model(self, user_id: str) -> bool:
+        return self._on_shard(user_id, 'delete_bayesian_model')
+
+    def get_model_state_at(self, user_id: str, timestamp) -> Optional[Dict]:
+        return self._on_shard(user_id, 'get_model_state_at', timestamp)
+
+    def get_model_trajectory(self, user_id: str, start=None, end=None) -> List[Dict]:
+        return self._on_shard(user_id, 'get_model_trajectory', start, end)
+
+    def get_students_by_mastery(self, skill: str, max_p_high: Optional[float] = None,
+                                min_p_high: Optional[float] = None,
+                                limit: Optional[int] = None,
+                                ascending: bool = True) -> List[Dict]:
+        """Когорта з усіх шардів: паралельні запити та злиття відсортованих списків"""
+        per_shard = self.map_shards(lambda shard: shard.get_students_by_mastery(
+            skill, max_p_high, min_p_high, limit, ascending))
+        merged = heapq.merge(*per_shard, key=lambda row: row['p_high'], reverse=not ascending)
+        rows = list(merged)
+        return rows[:limit] if limit is not None else rows
+
+    # ========== ЗАВДАННЯ ==========
+
+    def create_task(self, *args, **kwargs) -> str:
+        return self._on_tasks('create_task', *args, **kwargs)
+
+    def get_task(self, task_id: str) -> Optional[Dict]:
+        return self._on_tasks('get_task', task_id)
+
+    def task_bank_generation(self) -> int:
+        return self._on_tasks('task_bank_generation')
+
+    def get_tasks_by_topic(self, topic: str, limit: int = 10,
+                           difficulty: Optional[str] = None) -> List[Dict]:
+        return self._on_tasks('get_tasks_by_topic', topic, limit, difficulty)
+
+    def create_tasks_bulk(self, tasks: List[Dict]) -> List[str]:
+        return self._on_tasks('create_tasks_bulk', tasks)
+
+    def search_tasks(self, text: str, topic: Optional[str] = None,
+                     difficulty: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        return self._on_tasks('search_tasks', text, topic, difficulty, limit)
+
+    def get_task_candidates(self, topic: Optional[str] = None,
+                            exclude_user_id: Optional[str] = None,
+                            limit: int = 500) -> List[Dict]:
+        if exclude_user_id is None:
+            return self._on_tasks('get_task_candidates', topic, None, limit)
+        # Відповіді учня лежать у його шарді, банк завдань під'єднано до нього
+        i = self.shard_index(exclude_user_id)
+        with self._locks[i]:
+            return self.shards[i].get_task_candidates(topic, exclude_user_id, limit)
+
+    # ========== ВІДПОВІДІ ==========
+
+    def create_answer(self, user_id: str, task_id: str, user_response: str,
+                      is_correct: bool, time_spent: int = 0) -> str:
+        return self._on_shard(user_id, 'create_answer', task_id, user_response,
+                              is_correct, time_spent)
+
+    def create_answers(self, answers: List[tuple]) -> List[str]:
+        """Пакет відповідей: одна транзакція на кожен шард"""
+        by_shard = {}
+        for position, answer in enumerate(answers):
+            by_shard.setdefault(self.shard_index(answer[0]), []).append((position, answer))
+        answer_ids = [None] * len(answers)
+        for i, part in by_shard.items():
+            with self._locks[i]:
+                ids = self.shards[i].create_answers([answer for _, answer in part])
+            for (position, _), answer_id in zip(part, ids):
+                answer_ids[position] = answer_id
+        return answer_ids
+
+    def submit_answer(self, user_id: str, task_id: str, user_response: str,
+                      is_correct: bool, time_spent: int, current_state: Dict) -> str:
+        """Відповідь і стан моделі однією транзакцією в шарді користувача"""
+        return self._on_shard(user_id, 'submit_answer', task_id, user_response,
+                              is_correct, time_spent, current_state)
+
+    def get_user_answers(self, user_id: str) -> List[Dict]:
+        return self._on_shard(user_id, 'get_user_answers')
+
+    def get_user_statistics(self, user_id: str) -> Dict:
+        return self._on_shard(user_id, 'get_user_statistics')
+
+    def get_task_answer_stats(self) -> List[Dict]:
+        """Статистика відповідей по завданнях, зведена з усіх шардів"""
+        merged = {}
+        for rows in self.map_shards(lambda shard: shard.get_task_answer_stats()):
+            for row in rows:
+                if row['task_id'] in merged:
+                    merged[row['task_id']]['total'] += row['total']
+                    merged[row['task_id']]['correct'] += row['correct']
+                else:
+                    merged[row['task_id']] = dict(row)
+        return list(merged.values())
+
+    def get_global_statistics(self) -> Dict:
+        """Кількість користувачів і відповідей у всіх шардах"""
+        def shard_stats(shard):
+            cursor = shard._get_connection().cursor()
+            cursor.execute("SELECT COUNT(*) FROM users")
+            users = cursor.fetchone()[0]
+            cursor.execute('''
+            SELECT COUNT(*), COALESCE(SUM(CASE WHEN is_correct = 1 THEN 1 ELSE 0 END), 0)
+            FROM answers
+            ''')
+            answers, correct = cursor.fetchone()
+            # Відповіді, згорнуті компактацією
+            cursor.execute('''
+            SELECT COALESCE(SUM(attempts), 0), COALESCE(SUM(correct), 0)
+            FROM answer_summaries
+            ''')
+            compacted, compacted_correct = cursor.fetchone()
+            return users, answers + compacted, correct + compacted_correct
+
+        per_shard = self.map_shards(shard_stats)
+        return {
+            'total_users': sum(s[0] for s in per_shard),
+            'total_answers': sum(s[1] for s in per_shard),
+            'correct_answers': sum(s[2] for s in per_shard),
+            'users_per_shard': [s[0] for s in per_shard]
+        }
+
+    def compact_answers(self, before, archive_dir: str, chunk_size: int = 10000) -> Dict:
+        """Компактація відповідей у всіх шардах паралельно (архів - окремий файл на шард)"""
+        reports = self.map_shards(lambda shard: shard.compact_answers(before, archive_dir, chunk_size))
+        return {
+            'archived': sum(report['archived'] for report in reports),
+            'archive': [report['archive'] for report in reports if report['archive']],
+            'freed_pages': sum(report['freed_pages'] for report in reports)
+        }
+
+    def close(self):
+        """Закриття всіх з'єднань"""
+        self._executor.shutdown(wait=True)
+        for shard in self.shards:
+            shard.close()
+        self.tasks.close()
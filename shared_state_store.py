@@ -0,0 +1,245 @@
+
+import contextlib
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Optional, Dict, List
+import numpy as np
+from population_analytics import top_k_at_risk
+from student_state_store import StudentStateStore
+
+# Ідентифікатор учня в спільній пам'яті (UUID - 36 символів)
+USER_ID_DTYPE = 'S36'
+
+
+class SharedStudentStateStore(StudentStateStore):
+    """Сховище стану учнів у multiprocessing.shared_memory, спільне для процесів-обробників
+
+    Масиви не копіюються: кожен процес відображає той самий блок пам'яті.
+    Запис рядка захищено одним із num_locks замків (рядок % num_locks),
+    додавання учнів - окремим замком. Місткість фіксується при створенні.
+    Обробникам сховище передається аргументом Process (того ж context) разом
+    із замками; під'єднання лише за name дає доступ тільки для читання.
+    Видалений учень лишає рядок-надгробок, тож номери рядків стабільні."""
+
+    def __init__(self, capacity: int = 1024, name: Optional[str] = None,
+                 num_locks: int = 64, success_tables: Optional[Dict] = None,
+                 context=None):
+        self._name = name
+        self._owner = name is None
+        self._shm = None
+        self._locks = None
+        self._append_lock = None
+        # Скільки видалень уже враховано в локальному відображенні user_id -> рядок
+        self._removed_seen = 0
+        super().__init__(capacity, success_tables)
+        if self._owner:
+            context = context or multiprocessing.get_context()
+            self._locks = [context.Lock() for _ in range(num_locks)]
+            self._append_lock = context.Lock()
+
+    @staticmethod
+    def _layout(capacity: int, num_skills: int):
+        # Заголовок (лічильники рядків і видалень, розміри), далі масиви стану
+        # та ідентифікаторів (усі з вирівнюванням 8)
+        fields = [
+            ('count', (1,), np.int64),
+            ('removed', (1,), np.int64),
+            ('stored_capacity', (1,), np.int64),
+            ('stored_skills', (1,), np.int64),
+            ('skill_high', (capacity, num_skills), np.float64),
+            ('posterior_high', (capacity, num_skills), np.float64),
+            ('last_updated', (capacity,), np.float64),
+            ('ids', (capacity,), USER_ID_DTYPE)
+        ]
+        offsets, offset = {}, 0
+        for field, shape, dtype in fields:
+            offsets[field] = (offset, shape, dtype)
+            offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return offsets, offset
+
+    def _allocate(self, capacity: int):
+        offsets, size = self._layout(capacity, len(self.skills))
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._name = self._shm.name
+        else:
+            self._shm = shared_memory.SharedMemory(name=self._name)
+            self._check_layout(capacity, size)
+        for field, (offset, shape, dtype) in offsets.items():
+            setattr(self, field if field in ('skill_high', 'posterior_high', 'last_updated')
+                    else '_' + field,
+                    np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=offset))
+        if self._owner:
+            self._count[0] = 0
+            self._removed[0] = 0
+            self._stored_capacity[0] = capacity
+            self._stored_skills[0] = len(self.skills)
+            self.last_updated[:] = np.nan
+
+    def _check_layout(self, capacity: int, size: int):
+        """Розміри наявного блоку мають збігатися з очікуваними, інакше масиви
+        відобразилися б на чужі зміщення"""
+        offsets, _ = self._layout(capacity, len(self.skills))
+        header = {field: int(np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=offset)[0])
+                  for field, (offset, shape, dtype) in offsets.items()
+                  if field in ('stored_capacity', 'stored_skills')}
+        if (self._shm.size < size or header['stored_capacity'] != capacity or
+                header['stored_skills'] != len(self.skills)):
+            self._shm.close()
+            self._shm = None
+            raise ValueError(
+                f"Блок {self._name} створено для {header['stored_capacity']} учнів і "
+                f"{header['stored_skills']} навичок, очікувалось {capacity} і {len(self.skills)}")
+
+    @property
+    def name(self) -> str:
+        """Ім'я блоку спільної пам'яті для під'єднання з інших процесів"""
+        return self._name
+
+    def __getstate__(self):
+        # Передаємо в процес лише ім'я блоку та замки; масиви відображаються заново
+        return {
+            'name': self._name,
+            'capacity': self.capacity,
+            'locks': self._locks,
+            'append_lock': self._append_lock,
+            'success_tables': self.success_tables,
+            'half_life_days': self.half_life_days
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state['capacity'], state['name'], success_tables=state['success_tables'])
+        self.half_life_days = state['half_life_days']
+        self._locks = state['locks']
+        self._append_lock = state['append_lock']
+
+    def _sync(self):
+        """Оновлення локального відображення user_id -> рядок: нові учні та
+        видалені іншими процесами (рядок-надгробок має порожній id і None в user_ids)"""
+        removed = int(self._removed[0])
+        if removed != self._removed_seen:
+            for row, user_id in enumerate(self.user_ids):
+                if user_id is not None and not self._ids[row]:
+                    self.user_ids[row] = None
+                    del self.index[user_id]
+            self._removed_seen = removed
+        count = int(self._count[0])
+        for row in range(len(self.user_ids), count):
+            user_id = self._ids[row].decode('ascii') or None
+            self.user_ids.append(user_id)
+            if user_id is not None:
+                self.index[user_id] = row
+
+    def __len__(self) -> int:
+        self._sync()
+        return len(self.user_ids)
+
+    def __contains__(self, user_id: str) -> bool:
+        self._sync()
+        return user_id in self.index
+
+    def _grow(self, needed: int):
+        raise MemoryError(f"Спільне сховище заповнене ({self.capacity} учнів)")
+
+    def lock_for(self, row: int):
+        """Замок, що захищає рядок"""
+        if self._locks is None:
+            return contextlib.nullcontext()
+        return self._locks[row % len(self._locks)]
+
+    def _check_writable(self):
+        if self._append_lock is None:
+            raise PermissionError("Сховище під'єднано лише для читання")
+
+    # ========== РЯДКИ ==========
+
+    def add(self, user_id: str) -> int:
+        self._sync()
+        row = self.index.get(user_id)
+        if row is not None:
+            return row
+        self._check_writable()
+        encoded = user_id.encode('ascii')
+        if len(encoded) > np.dtype(USER_ID_DTYPE).itemsize:
+            raise ValueError(f"Задовгий ідентифікатор учня: {user_id}")
+        with self._append_lock:
+            # Інший процес міг додати цього ж учня, поки ми чекали
+            self._sync()
+            row = self.index.get(user_id)
+            if row is not None:
+                return row
+            row = len(self.user_ids)
+            if row >= self.capacity:
+                self._grow(row + 1)
+            self.skill_high[row] = self.baseline
+            self.posterior_high[row] = self.baseline
+            self.last_updated[row] = np.nan
+            self._ids[row] = encoded
+            # Лічильник збільшуємо останнім: читачі бачать лише заповнені рядки
+            self._count[0] = row + 1
+        self._sync()
+        return row
+
+    def row(self, user_id: str) -> int:
+        if user_id not in self.index:
+            self._sync()
+        return super().row(user_id)
+
+    def remove(self, user_id: str) -> bool:
+        """Видалення учня без перенесення рядків (воно зламало б номери рядків
+        в інших процесах): рядок стає надгробком зі значеннями NaN"""
+        self._check_writable()
+        self._sync()
+        row = self.index.get(user_id)
+        if row is None:
+            return False
+        with self._append_lock:
+            with self.lock_for(row):
+                self._ids[row] = b''
+                self.skill_high[row] = np.nan
+                self.posterior_high[row] = np.nan
+                self.last_updated[row] = np.nan
+            self._removed[0] += 1
+        self._sync()
+        return True
+
+    def get_row(self, user_id: str) -> Dict:
+        row = self.row(user_id)
+        with self.lock_for(row):
+            return super().get_row(user_id)
+
+    def set_row(self, user_id: str, skill_high: Optional[Dict] = None,
+                posterior_high: Optional[Dict] = None, last_updated=None) -> int:
+        self._check_writable()
+        row = self.add(user_id)
+        with self.lock_for(row):
+            return super().set_row(user_id, skill_high, posterior_high, last_updated)
+
+    def to_network(self, user_id: str, bn):
+        with self.lock_for(self.row(user_id)):
+            return super().to_network(user_id, bn)
+
+    def top_at_risk(self, k: int = 10, now=None) -> Dict[str, List[Dict]]:
+        self._sync()
+        live = [row for row, user_id in enumerate(self.user_ids) if user_id is not None]
+        return top_k_at_risk(self.decayed_posteriors(now)[live],
+                             [self.user_ids[row] for row in live], k)
+
+    # ========== ЖИТТЄВИЙ ЦИКЛ ==========
+
+    def close(self):
+        """Від'єднання від спільної пам'яті в поточному процесі"""
+        if self._shm is None:
+            return
+        # Спершу звільняємо представлення NumPy, інакше буфер не закриється
+        self.skill_high = self.posterior_high = self.last_updated = None
+        self._count = self._removed = self._ids = None
+        self._stored_capacity = self._stored_skills = None
+        self._shm.close()
+        self._shm = None
+
+    def unlink(self):
+        """Звільнення блоку спільної пам'яті (викликає процес-власник)"""
+        if self._owner and self._shm is not None:
+            self._shm.unlink()
+        self.close()
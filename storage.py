@@ -0,0 +1,419 @@
+
+import bisect
+import random
+import re
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Optional, Dict, List
+
+
+class StorageBackend(ABC):
+    """Інтерфейс сховища: користувачі, моделі, завдання та відповіді"""
+
+    # ========== КОРИСТУВАЧІ ==========
+
+    @abstractmethod
+    def create_user(self, username: str, email: str, role: str = "student",
+                    user_id: Optional[str] = None) -> str:
+        """Створення нового користувача"""
+
+    @abstractmethod
+    def get_user_by_email(self, email: str) -> Optional[Dict]:
+        """Отримання користувача за email"""
+
+    # ========== БАЙЄСОВІ МОДЕЛІ ==========
+
+    @abstractmethod
+    def create_bayesian_model(self, user_id: str, network_structure: Dict,
+                              cpt_parameters: Dict, current_state: Dict) -> str:
+        """Створення Байєсової моделі"""
+
+    @abstractmethod
+    def update_bayesian_model(self, user_id: str, current_state: Dict) -> bool:
+        """Оновлення стану Байєсової моделі"""
+
+    @abstractmethod
+    def get_bayesian_model(self, user_id: str) -> Optional[Dict]:
+        """Отримання Байєсової моделі користувача"""
+
+    @abstractmethod
+    def delete_bayesian_model(self, user_id: str) -> bool:
+        """Видалення моделі користувача"""
+
+    @abstractmethod
+    def get_model_state_at(self, user_id: str, timestamp) -> Optional[Dict]:
+        """Стан моделі на момент часу (None, якщо моделі тоді ще не було)"""
+
+    @abstractmethod
+    def get_model_trajectory(self, user_id: str, start=None, end=None) -> List[Dict]:
+        """Траєкторія засвоєння за проміжок часу: event_no, created_at, state (навичка -> P(High))"""
+
+    @abstractmethod
+    def get_students_by_mastery(self, skill: str, max_p_high: Optional[float] = None,
+                                min_p_high: Optional[float] = None,
+                                limit: Optional[int] = None,
+                                ascending: bool = True) -> List[Dict]:
+        """Учні, відфільтровані й відсортовані за P(High) навички
+
+        p_high - апостеріорна ймовірність на момент останнього запису моделі
+        (updated_at), без забування після нього: параметри забування належать
+        мережі, а фільтр і порядок мають іти за індексом. Для поточної оцінки
+        перерахуйте p_high від updated_at (SimpleBayesianNetwork.decayed_state)."""
+
+    def get_top_at_risk(self, skill: str, k: int = 10) -> List[Dict]:
+        """k учнів з найменшою P(High) навички"""
+        return self.get_students_by_mastery(skill, limit=k)
+
+    # ========== ЗАВДАННЯ ==========
+
+    @abstractmethod
+    def create_task(self, topic: str, difficulty: str, task_type: str,
+                    condition: str, question: str, correct_answer: str,
+                    solution_steps: List[str]) -> str:
+        """Створення завдання"""
+
+    @abstractmethod
+    def get_task(self, task_id: str) -> Optional[Dict]:
+        """Отримання завдання за ID (не змінювати: може бути спільним записом кешу)"""
+
+    @abstractmethod
+    def get_tasks_by_topic(self, topic: str, limit: int = 10,
+                           difficulty: Optional[str] = None) -> List[Dict]:
+        """Отримання випадкових завдань за темою (і складністю)"""
+
+    @abstractmethod
+    def get_task_candidates(self, topic: Optional[str] = None,
+                            exclude_user_id: Optional[str] = None,
+                            limit: int = 500) -> List[Dict]:
+        """Легкі записи завдань-кандидатів (id, topic, difficulty)"""
+
+    @abstractmethod
+    def task_bank_generation(self) -> int:
+        """Покоління банку завдань: змінюється з кожною зміною завдань"""
+
+    def create_tasks_bulk(self, tasks: List[Dict]) -> List[str]:
+        """Імпорт пакета завдань (словники з полями create_task)"""
+        return [self.create_task(**task) for task in tasks]
+
+    @abstractmethod
+    def search_tasks(self, text: str, topic: Optional[str] = None,
+                     difficulty: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """Завдання, умова чи запитання яких містить усі слова запиту (за префіксом),
+        від найрелевантніших; score - релевантність"""
+
+    # ========== ВІДПОВІДІ ==========
+
+    @abstractmethod
+    def create_answer(self, user_id: str, task_id: str, user_response: str,
+                      is_correct: bool, time_spent: int = 0) -> str:
+        """Запис відповіді учня"""
+
+    def create_answers(self, answers: List[tuple]) -> List[str]:
+        """Запис пакета відповідей (user_id, task_id, user_response, is_correct, time_spent)"""
+        return [self.create_answer(*answer) for answer in answers]
+
+    def submit_answer(self, user_id: str, task_id: str, user_response: str,
+                      is_correct: bool, time_spent: int, current_state: Dict) -> str:
+        """Запис відповіді разом з новим станом моделі"""
+        if not self.update_bayesian_model(user_id, current_state):
+            raise ValueError(f"Модель користувача {user_id} не знайдена")
+        return self.create_answer(user_id, task_id, user_response, is_correct, time_spent)
+
+    @abstractmethod
+    def get_user_answers(self, user_id: str) -> List[Dict]:
+        """Усі відповіді користувача (новіші першими) з темою та складністю"""
+
+    @abstractmethod
+    def get_user_statistics(self, user_id: str) -> Dict:
+        """Статистика користувача"""
+
+    @abstractmethod
+    def get_task_answer_stats(self) -> List[Dict]:
+        """Кількість відповідей та правильних відповідей для кожного завдання"""
+
+    def close(self):
+        """Закриття сховища"""
+
+
+def _now() -> str:
+    """Поточний час у форматі CURRENT_TIMESTAMP SQLite (UTC)"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def _as_timestamp(value):
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+def _search_terms(text: str) -> List[str]:
+    """Слова пошукового запиту чи тексту завдання в нижньому регістрі"""
+    return re.findall(r'\w+', text.casefold())
+
+
+def _copy_state(current_state: Dict) -> Dict:
+    # Мережа змінює словники стану на місці, тому зберігаємо та віддаємо копії
+    return {skill: dict(dist) for skill, dist in current_state.items()}
+
+
+class InMemoryStorage(StorageBackend):
+    """Сховище у пам'яті процесу: словники та списки без дискового вводу-виводу"""
+
+    def __init__(self):
+        self.users = {}
+        self._users_by_email = {}
+        self.models = {}
+        self._history = {}
+        self.tasks = {}
+        self._tasks_by_topic = {}
+        self._task_generation = 0
+        self.answers = []
+        self._answers_by_user = {}
+        self._answered_tasks = {}
+
+    # ========== КОРИСТУВАЧІ ==========
+
+    def create_user(self, username: str, email: str, role: str = "student",
+                    user_id: Optional[str] = None) -> str:
+        if email in self._users_by_email:
+            raise ValueError(f"Користувач з email {email} вже існує")
+        user_id = user_id or str(uuid.uuid4())
+        self.users[user_id] = {
+            'id': user_id,
+            'username': username,
+            'email': email,
+            'role': role,
+            'created_at': _now()
+        }
+        self._users_by_email[email] = user_id
+        return user_id
+
+    def get_user_by_email(self, email: str) -> Optional[Dict]:
+        user_id = self._users_by_email.get(email)
+        return dict(self.users[user_id]) if user_id else None
+
+    # ========== БАЙЄСОВІ МОДЕЛІ ==========
+
+    def create_bayesian_model(self, user_id: str, network_structure: Dict,
+                              cpt_parameters: Dict, current_state: Dict) -> str:
+        model_id = str(uuid.uuid4())
+        created_at = _now()
+        self.models[user_id] = {
+            'id': model_id,
+            'user_id': user_id,
+            'network_structure': network_structure,
+            'cpt_parameters': cpt_parameters,
+            'current_state': _copy_state(current_state),
+            'created_at': created_at
+        }
+        self._history[user_id] = [(created_at, _copy_state(current_state))]
+        return model_id
+
+    def update_bayesian_model(self, user_id: str, current_state: Dict) -> bool:
+        model = self.models.get(user_id)
+        if model is None:
+            return False
+        model['current_state'] = _copy_state(current_state)
+        model['created_at'] = _now()
+        self._history[user_id].append((model['created_at'], _copy_state(current_state)))
+        return True
+
+    def get_bayesian_model(self, user_id: str) -> Optional[Dict]:
+        model = self.models.get(user_id)
+        if model is None:
+            return None
+        data = dict(model)
+        data['current_state'] = _copy_state(model['current_state'])
+        return data
+
+    def delete_bayesian_model(self, user_id: str) -> bool:
+        self._history.pop(user_id, None)
+        return self.models.pop(user_id, None) is not None
+
+    def get_model_state_at(self, user_id: str, timestamp) -> Optional[Dict]:
+        history = self._history.get(user_id, [])
+        timestamp = _as_timestamp(timestamp)
+        i = bisect.bisect_right([created_at for created_at, _ in history], timestamp)
+        return _copy_state(history[i - 1][1]) if i else None
+
+    def get_model_trajectory(self, user_id: str, start=None, end=None) -> List[Dict]:
+        start, end = _as_timestamp(start), _as_timestamp(end)
+        trajectory = []
+        # Перший запис історії - початковий стан, події нумеруються з 1
+        for event_no, (created_at, state) in enumerate(self._history.get(user_id, [])):
+            if event_no == 0:
+                continue
+            if (start is None or created_at >= start) and (end is None or created_at <= end):
+                trajectory.append({
+                    'event_no': event_no,
+                    'created_at': created_at,
+                    'state': {skill: dist['High'] for skill, dist in state.items()}
+                })
+        return trajectory
+
+    def get_students_by_mastery(self, skill: str, max_p_high: Optional[float] = None,
+                                min_p_high: Optional[float] = None,
+                                limit: Optional[int] = None,
+                                ascending: bool = True) -> List[Dict]:
+        rows = []
+        for user_id, model in self.models.items():
+            if skill not in model['current_state']:
+                continue
+            p_high = model['current_state'][skill].get('High', 0)
+            if max_p_high is not None and p_high >= max_p_high:
+                continue
+            if min_p_high is not None and p_high < min_p_high:
+                continue
+            rows.append({'user_id': user_id, 'p_high': p_high, 'updated_at': model['created_at']})
+        rows.sort(key=lambda row: row['p_high'], reverse=not ascending)
+        return rows[:limit] if limit is not None else rows
+
+    # ========== ЗАВДАННЯ ==========
+
+    def create_task(self, topic: str, difficulty: str, task_type: str,
+                    condition: str, question: str, correct_answer: str,
+                    solution_steps: List[str]) -> str:
+        task_id = str(uuid.uuid4())
+        self.tasks[task_id] = {
+            'id': task_id,
+            'topic': topic,
+            'difficulty': difficulty,
+            'task_type': task_type,
+            'condition': condition,
+            'question': question,
+            'correct_answer': correct_answer,
+            'solution_steps': list(solution_steps),
+            'created_at': _now()
+        }
+        self._tasks_by_topic.setdefault(topic, []).append(task_id)
+        self._task_generation += 1
+        return task_id
+
+    def get_task(self, task_id: str) -> Optional[Dict]:
+        task = self.tasks.get(task_id)
+        return dict(task, solution_steps=list(task['solution_steps'])) if task else None
+
+    def task_bank_generation(self) -> int:
+        return self._task_generation
+
+    def get_tasks_by_topic(self, topic: str, limit: int = 10,
+                           difficulty: Optional[str] = None) -> List[Dict]:
+        ids = self._tasks_by_topic.get(topic, [])
+        if difficulty is not None:
+            ids = [task_id for task_id in ids if self.tasks[task_id]['difficulty'] == difficulty]
+        return [self.get_task(task_id) for task_id in random.sample(ids, min(limit, len(ids)))]
+
+    def get_task_candidates(self, topic: Optional[str] = None,
+                            exclude_user_id: Optional[str] = None,
+                            limit: int = 500) -> List[Dict]:
+        ids = self._tasks_by_topic.get(topic, []) if topic is not None else self.tasks.keys()
+        answered = self._answered_tasks.get(exclude_user_id, set())
+        candidates = []
+        for task_id in ids:
+            if task_id in answered:
+                continue
+            task = self.tasks[task_id]
+            candidates.append({'id': task_id, 'topic': task['topic'],
+                               'difficulty': task['difficulty']})
+            if len(candidates) >= limit:
+                break
+        return candidates
+
+    def search_tasks(self, text: str, topic: Optional[str] = None,
+                     difficulty: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        terms = _search_terms(text)
+        if not terms:
+            return []
+        ids = self._tasks_by_topic.get(topic, []) if topic is not None else self.tasks.keys()
+        results = []
+        for task_id in ids:
+            task = self.tasks[task_id]
+            if difficulty is not None and task['difficulty'] != difficulty:
+                continue
+            words = _search_terms(f"{task['condition']} {task['question']}")
+            hits = [sum(word.startswith(term) for word in words) for term in terms]
+            if all(hits):
+                result = {key: value for key, value in task.items()
+                          if key not in ('solution_steps', 'created_at')}
+                result['score'] = float(sum(hits))
+                results.append(result)
+        results.sort(key=lambda result: result['score'], reverse=True)
+        return results[:limit]
+
+    # ========== ВІДПОВІДІ ==========
+
+    def create_answer(self, user_id: str, task_id: str, user_response: str,
+                      is_correct: bool, time_spent: int = 0) -> str:
+        if user_id not in self.users or task_id not in self.tasks:
+            raise ValueError("Невідомий користувач або завдання")
+        answer_id = str(uuid.uuid4())
+        self.answers.append({
+            'id': answer_id,
+            'user_id': user_id,
+            'task_id': task_id,
+            'user_response': user_response,
+            'is_correct': int(bool(is_correct)),
+            'time_spent': time_spent,
+            'submitted_at': _now()
+        })
+        self._answers_by_user.setdefault(user_id, []).append(len(self.answers) - 1)
+        self._answered_tasks.setdefault(user_id, set()).add(task_id)
+        return answer_id
+
+    def submit_answer(self, user_id: str, task_id: str, user_response: str,
+                      is_correct: bool, time_spent: int, current_state: Dict) -> str:
+        # Спершу всі перевірки: помилка не повинна залишити новий стан без відповіді
+        if user_id not in self.models:
+            raise ValueError(f"Модель користувача {user_id} не знайдена")
+        if task_id not in self.tasks:
+            raise ValueError("Невідомий користувач або завдання")
+        self.update_bayesian_model(user_id, current_state)
+        return self.create_answer(user_id, task_id, user_response, is_correct, time_spent)
+
+    def get_user_answers(self, user_id: str) -> List[Dict]:
+        answers = []
+        for i in reversed(self._answers_by_user.get(user_id, [])):
+            task = self.tasks[self.answers[i]['task_id']]
+            answers.append(dict(self.answers[i], topic=task['topic'],
+                                difficulty=task['difficulty']))
+        return answers
+
+    def get_user_statistics(self, user_id: str) -> Dict:
+        indices = self._answers_by_user.get(user_id, [])
+        total = len(indices)
+        correct = sum(self.answers[i]['is_correct'] for i in indices)
+
+        by_topic = {}
+        for i in indices:
+            answer = self.answers[i]
+            topic_stats = by_topic.setdefault(self.tasks[answer['task_id']]['topic'],
+                                              [0, 0])
+            topic_stats[0] += 1
+            topic_stats[1] += answer['is_correct']
+
+        return {
+            'total_answers': total,
+            'correct_answers': correct if total else None,
+            'avg_time_spent': (sum(self.answers[i]['time_spent'] for i in indices) / total
+                               if total else None),
+            'by_topic': [
+                {'topic': topic, 'total': count, 'correct': right, 'accuracy': right / count}
+                for topic, (count, right) in by_topic.items()
+            ]
+        }
+
+    def get_task_answer_stats(self) -> List[Dict]:
+        stats = {}
+        for answer in self.answers:
+            task = self.tasks[answer['task_id']]
+            row = stats.setdefault(task['id'], {
+                'task_id': task['id'],
+                'topic': task['topic'],
+                'difficulty': task['difficulty'],
+                'total': 0,
+                'correct': 0
+            })
+            row['total'] += 1
+            row['correct'] += answer['is_correct']
+        return list(stats.values())
@@ -0,0 +1,203 @@
+
+from datetime import datetime, timezone
+from typing import Optional, Dict, List
+import numpy as np
+from bayesian_network import (TOPIC_TO_NODE, SKILL_PRIORS, SKILL_NODES, DIFFICULTY_OFFSETS,
+                              FORGETTING_HALF_LIFE_DAYS, success_probabilities,
+                              _parse_timestamp)
+from population_analytics import predict_success_batch, weakest_topic_batch, top_k_at_risk
+
+
+def _to_unix(value) -> float:
+    """datetime або час з БД -> секунди Unix (NaN, якщо часу немає)"""
+    value = _parse_timestamp(value)
+    return value.timestamp() if value is not None else np.nan
+
+
+class StudentStateStore:
+    """Стан усіх активних учнів у суцільних масивах NumPy (рядок на учня)"""
+
+    def __init__(self, capacity: int = 1024, success_tables: Optional[Dict] = None):
+        self.skills = list(SKILL_NODES)
+        self.skill_columns = {skill: j for j, skill in enumerate(self.skills)}
+        self.baseline = np.array([SKILL_PRIORS[skill] for skill in self.skills])
+        self.half_life_days = FORGETTING_HALF_LIFE_DAYS
+        # Можна передати bn.success_tables з навченими зсувами складності
+        self.success_tables = success_tables or {
+            level: success_probabilities(offset) for level, offset in DIFFICULTY_OFFSETS.items()
+        }
+
+        self.user_ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity: int):
+        # P(High) з CPT навичок та з поточного (апостеріорного) стану
+        self.skill_high = np.empty((capacity, len(self.skills)))
+        self.posterior_high = np.empty((capacity, len(self.skills)))
+        # Час останнього оновлення (секунди Unix), NaN - оновлень не було
+        self.last_updated = np.full(capacity, np.nan)
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self.index
+
+    @property
+    def capacity(self) -> int:
+        return self.skill_high.shape[0]
+
+    def memory_bytes(self) -> int:
+        """Обсяг масивів стану в байтах"""
+        return self.skill_high.nbytes + self.posterior_high.nbytes + self.last_updated.nbytes
+
+    def _grow(self, needed: int):
+        # Подвоєння місткості: амортизовано O(1) на доданого учня
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name in ('skill_high', 'posterior_high', 'last_updated'):
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], np.nan)
+            new[:len(self)] = old[:len(self)]
+            setattr(self, name, new)
+
+    # ========== РЯДКИ ==========
+
+    def add(self, user_id: str) -> int:
+        """Рядок учня (новий учень отримує апріорні значення)"""
+        row = self.index.get(user_id)
+        if row is not None:
+            return row
+        row = len(self)
+        if row >= self.capacity:
+            self._grow(row + 1)
+        self.skill_high[row] = self.baseline
+        self.posterior_high[row] = self.baseline
+        self.last_updated[row] = np.nan
+        self.user_ids.append(user_id)
+        self.index[user_id] = row
+        return row
+
+    def row(self, user_id: str) -> int:
+        """Номер рядка учня"""
+        row = self.index.get(user_id)
+        if row is None:
+            raise KeyError(f"Учня {user_id} немає у сховищі стану")
+        return row
+
+    def remove(self, user_id: str) -> bool:
+        """Видалення учня; останній рядок переноситься на звільнене місце"""
+        row = self.index.pop(user_id, None)
+        if row is None:
+            return False
+        last = len(self) - 1
+        if row != last:
+            moved = self.user_ids[last]
+            self.skill_high[row] = self.skill_high[last]
+            self.posterior_high[row] = self.posterior_high[last]
+            self.last_updated[row] = self.last_updated[last]
+            self.user_ids[row] = moved
+            self.index[moved] = row
+        self.user_ids.pop()
+        return True
+
+    def get_row(self, user_id: str) -> Dict:
+        """Стан учня у вигляді словників за навичками"""
+        row = self.row(user_id)
+        last_updated = self.last_updated[row]
+        return {
+            'skill_high': dict(zip(self.skills, self.skill_high[row].tolist())),
+            'posterior_high': dict(zip(self.skills, self.posterior_high[row].tolist())),
+            'last_updated': (None if np.isnan(last_updated)
+                             else datetime.fromtimestamp(last_updated, timezone.utc))
+        }
+
+    def set_row(self, user_id: str, skill_high: Optional[Dict] = None,
+                posterior_high: Optional[Dict] = None, last_updated=None) -> int:
+        """Запис стану учня (лише передані навички та поля)"""
+        row = self.add(user_id)
+        for skill, high in (skill_high or {}).items():
+            self.skill_high[row, self.skill_columns[skill]] = high
+        for skill, high in (posterior_high or {}).items():
+            self.posterior_high[row, self.skill_columns[skill]] = high
+        if last_updated is not None:
+            self.last_updated[row] = _to_unix(last_updated)
+        return row
+
+    # ========== ОБМІН З МЕРЕЖЕЮ ТА СХОВИЩЕМ ==========
+
+    def from_network(self, user_id: str, bn) -> int:
+        """Копіювання стану SimpleBayesianNetwork у рядок учня"""
+        return self.set_row(
+            user_id,
+            skill_high={skill: float(values[1, 0]) for skill, values in bn.skill_cpds.items()},
+            posterior_high={skill: dist.get('High', 0) for skill, dist in bn.current_state.items()},
+            last_updated=bn.last_updated
+        )
+
+    def to_network(self, user_id: str, bn):
+        """Відновлення стану учня в SimpleBayesianNetwork (мережу має бути побудовано)"""
+        row = self.row(user_id)
+        for skill, j in self.skill_columns.items():
+            high = float(self.skill_high[row, j])
+            bn.skill_cpds[skill] = np.array([[1 - high], [high]])
+            posterior = float(self.posterior_high[row, j])
+            bn.current_state[skill] = {'Low': 1 - posterior, 'High': posterior}
+        if bn.model is not None:
+            bn._rebuild_network()
+        last_updated = self.last_updated[row]
+        bn.last_updated = (None if np.isnan(last_updated)
+                           else datetime.fromtimestamp(last_updated, timezone.utc))
+        return bn
+
+    def load_from_storage(self, db_manager, user_ids: List[str]) -> int:
+        """Завантаження збережених моделей учнів; повертає кількість завантажених"""
+        loaded = 0
+        for user_id in user_ids:
+            model = db_manager.get_bayesian_model(user_id)
+            if not model:
+                continue
+            cpt_parameters = model.get('cpt_parameters') or {}
+            self.set_row(
+                user_id,
+                skill_high={skill: cpt_parameters[skill]['values'][1][0]
+                            for skill in self.skills if skill in cpt_parameters},
+                posterior_high={skill: dist.get('High', 0)
+                                for skill, dist in (model.get('current_state') or {}).items()
+                                if skill in self.skill_columns},
+                last_updated=model.get('created_at')
+            )
+            loaded += 1
+        return loaded
+
+    # ========== ОБЧИСЛЕННЯ ДЛЯ ВСІХ УЧНІВ ==========
+
+    def decayed_posteriors(self, now=None) -> np.ndarray:
+        """P(High) усіх учнів з урахуванням забування (форма: учні × навички)"""
+        posterior = self.posterior_high[:len(self)]
+        if not self.half_life_days:
+            return posterior.copy()
+        now = _parse_timestamp(now) or datetime.now(timezone.utc)
+        elapsed_days = np.maximum(0.0, (now.timestamp() - self.last_updated[:len(self)]) / 86400.0)
+        # Без часу оновлення забування немає (як у SimpleBayesianNetwork._decay_factor)
+        factor = np.where(np.isnan(elapsed_days), 1.0,
+                          0.5 ** (np.nan_to_num(elapsed_days) / self.half_life_days))
+        # Забування лише знижує засвоєння, що перевищує базовий рівень
+        excess = np.maximum(posterior - self.baseline, 0.0)
+        return posterior - excess * (1.0 - factor[:, None])
+
+    def predict_success(self, topic: str, difficulty: str = 'medium', now=None) -> np.ndarray:
+        """Ймовірність успіху кожного учня (у порядку рядків) для теми та складності"""
+        column = self.skill_columns[TOPIC_TO_NODE.get(topic, 'Algebra')]
+        high = self.decayed_posteriors(now)[:, column]
+        return predict_success_batch(high, difficulty, self.success_tables)
+
+    def weakest_topics(self, now=None) -> np.ndarray:
+        """Найслабша тема кожного учня (у порядку рядків)"""
+        return weakest_topic_batch(self.decayed_posteriors(now))
+
+    def top_at_risk(self, k: int = 10, now=None) -> Dict[str, List[Dict]]:
+        """k учнів з найменшою P(High) для кожної теми"""
+        return top_k_at_risk(self.decayed_posteriors(now), self.user_ids, k)
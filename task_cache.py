@@ -0,0 +1,87 @@
+
+import json
+import threading
+from collections.abc import Mapping
+from typing import Optional, Dict, List, Iterable
+
+
+class CachedTask(Mapping):
+    """Завдання з кешу банку (лише для читання)
+
+    solution_steps зберігаються як JSON і розбираються лише при першому
+    зверненні до них; решта полів віддається без копіювання."""
+
+    __slots__ = ('_fields', '_steps', '_decoded')
+
+    def __init__(self, row):
+        fields = dict(row)
+        self._steps = fields.pop('solution_steps')
+        self._fields = fields
+        self._decoded = False
+
+    def __getitem__(self, key):
+        if key == 'solution_steps':
+            if not self._decoded:
+                self._steps = json.loads(self._steps)
+                self._decoded = True
+            # Копія: кешований список спільний для всіх, хто читає завдання
+            return list(self._steps)
+        return self._fields[key]
+
+    def __iter__(self):
+        yield from self._fields
+        yield 'solution_steps'
+
+    def __len__(self) -> int:
+        return len(self._fields) + 1
+
+    def __repr__(self) -> str:
+        return f"CachedTask({self._fields!r})"
+
+
+class TaskBankCache:
+    """Кеш банку завдань у пам'яті процесу, згрупований за темою та складністю
+
+    Заповнюється під час читання (тема - одним запитом). Покоління - лічильник
+    змін банку, який веде власник кешу; sync з іншим поколінням скидає
+    все закешоване."""
+
+    def __init__(self):
+        self.generation = None
+        self._lock = threading.Lock()
+        self._by_id: Dict[str, CachedTask] = {}
+        # тема -> {складність: завдання}; ключ None - усі завдання теми
+        self._by_topic: Dict[str, Dict[Optional[str], List[CachedTask]]] = {}
+
+    def sync(self, generation: int):
+        if generation != self.generation:
+            with self._lock:
+                self._by_id = {}
+                self._by_topic = {}
+                self.generation = generation
+
+    def get(self, task_id: str) -> Optional[CachedTask]:
+        return self._by_id.get(task_id)
+
+    def add(self, row) -> CachedTask:
+        """Одне завдання, прочитане з БД повз групи тем"""
+        task = self._by_id.get(row['id'])
+        if task is None:
+            task = self._by_id[row['id']] = CachedTask(row)
+        return task
+
+    def topic(self, topic: str) -> Optional[Dict[Optional[str], List[CachedTask]]]:
+        return self._by_topic.get(topic)
+
+    def put_topic(self, topic: str, rows: Iterable) -> Dict[Optional[str], List[CachedTask]]:
+        """Усі завдання теми, згруповані за складністю"""
+        with self._lock:
+            groups = {None: []}
+            for row in rows:
+                task = self._by_id.get(row['id'])
+                if task is None:
+                    task = self._by_id[row['id']] = CachedTask(row)
+                groups[None].append(task)
+                groups.setdefault(task['difficulty'], []).append(task)
+            self._by_topic[topic] = groups
+            return groups
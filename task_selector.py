@@ -0,0 +1,121 @@
+
+import time
+from typing import Optional, Dict, List
+import numpy as np
+from bayesian_network import SUCCESS_GIVEN_HIGH, SUCCESS_GIVEN_LOW, topic_node, boost_skill_high
+
+# Поля завдання в результаті вибору (solution_steps не потрібні й не розбираються)
+SELECTED_FIELDS = ('id', 'topic', 'difficulty', 'task_type', 'condition', 'question',
+                   'correct_answer')
+
+
+def binary_entropy(p: np.ndarray) -> np.ndarray:
+    """Ентропія бернуллієвого розподілу (у бітах), векторизовано"""
+    p = np.clip(p, 1e-12, 1 - 1e-12)
+    return -(p * np.log2(p) + (1 - p) * np.log2(1 - p))
+
+
+class TaskSelector:
+    """Вибір наступного завдання за очікуваним приростом інформації"""
+
+    CRITERIA = ('information_gain', 'mastery_gain')
+
+    def __init__(self, db_manager, candidate_limit: int = 500,
+                 latency_budget_ms: float = 50.0, chunk_size: int = 256):
+        self.db = db_manager
+        self.candidate_limit = candidate_limit
+        self.latency_budget_ms = latency_budget_ms
+        self.chunk_size = chunk_size
+
+    def _skill_arrays(self, bn, tasks: List[Dict]):
+        """P(High) навички кожного кандидата (поточний стан та CPT навичок)
+        і ймовірності успіху за високого/низького рівня з урахуванням складності"""
+        nodes = [topic_node(task['topic']) for task in tasks]
+
+        if not bn.current_state:
+            bn.current_state = bn.get_prior_distribution()
+        posterior = {node: dist.get('High', 0) for node, dist in bn.decayed_state().items()}
+        prior = {node: float(values[1, 0]) for node, values in bn.skill_cpds.items()}
+
+        high = np.array([posterior.get(node, 0.5) for node in nodes])
+        skill_high = np.array([prior.get(node, 0.5) for node in nodes])
+        success = np.array([bn.success_given_skill(task.get('difficulty', 'medium'), task['id'])
+                            for task in tasks]).reshape(-1, 2)
+        return high, skill_high, success[:, 0], success[:, 1]
+
+    @staticmethod
+    def information_gain(high: np.ndarray, p_high=SUCCESS_GIVEN_HIGH,
+                         p_low=SUCCESS_GIVEN_LOW) -> np.ndarray:
+        """Очікуване зменшення ентропії навички після відповіді"""
+        p_correct = high * p_high + (1 - high) * p_low
+        high_if_correct = high * p_high / p_correct
+        high_if_wrong = high * (1 - p_high) / (1 - p_correct)
+
+        expected_entropy = (p_correct * binary_entropy(high_if_correct) +
+                            (1 - p_correct) * binary_entropy(high_if_wrong))
+        return binary_entropy(high) - expected_entropy
+
+    @staticmethod
+    def mastery_gain(high: np.ndarray, skill_high: np.ndarray, p_high=SUCCESS_GIVEN_HIGH,
+                     p_low=SUCCESS_GIVEN_LOW) -> np.ndarray:
+        """Очікуваний приріст P(High) навички за правилом оновлення мережі"""
+        p_correct = high * p_high + (1 - high) * p_low
+        expected = (p_correct * boost_skill_high(skill_high, True) +
+                    (1 - p_correct) * boost_skill_high(skill_high, False))
+        return expected - skill_high
+
+    def score_tasks(self, bn, tasks: List[Dict],
+                    criterion: str = 'information_gain') -> np.ndarray:
+        """Оцінки всіх кандидатів без обмеження часу"""
+        if criterion not in self.CRITERIA:
+            raise ValueError(f"Невідомий критерій: {criterion}")
+        high, skill_high, p_high, p_low = self._skill_arrays(bn, tasks)
+        if criterion == 'information_gain':
+            return self.information_gain(high, p_high, p_low)
+        return self.mastery_gain(high, skill_high, p_high, p_low)
+
+    def select_next_tasks(self, bn, user_id: Optional[str] = None, k: int = 1,
+                          topic: Optional[str] = None,
+                          criterion: str = 'information_gain') -> List[Dict]:
+        """Top-k завдань для учня в межах бюджету затримки"""
+        if criterion not in self.CRITERIA:
+            raise ValueError(f"Невідомий критерій: {criterion}")
+
+        start = time.perf_counter()
+        deadline = start + self.latency_budget_ms / 1000.0
+
+        tasks = self.db.get_task_candidates(topic=topic, exclude_user_id=user_id,
+                                            limit=self.candidate_limit)
+        if not tasks:
+            return []
+
+        high, skill_high, p_high, p_low = self._skill_arrays(bn, tasks)
+
+        # Оцінюємо порціями; після вичерпання бюджету обираємо з уже оцінених
+        scores = np.full(len(tasks), -np.inf)
+        for lo in range(0, len(tasks), self.chunk_size):
+            part = slice(lo, lo + self.chunk_size)
+            if criterion == 'information_gain':
+                scores[part] = self.information_gain(high[part], p_high[part], p_low[part])
+            else:
+                scores[part] = self.mastery_gain(high[part], skill_high[part],
+                                                 p_high[part], p_low[part])
+            if time.perf_counter() > deadline:
+                break
+
+        scored = np.flatnonzero(np.isfinite(scores))
+        k = min(k, len(scored))
+        if k <= 0:
+            return []
+        top = scored[np.argpartition(-scores[scored], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+
+        selected = []
+        for i in top:
+            source = self.db.get_task(tasks[i]['id']) or tasks[i]
+            task = {field: source[field] for field in SELECTED_FIELDS if field in source}
+            task['score'] = float(scores[i])
+            task['success_probability'] = bn.predict_success(
+                task['topic'], task.get('difficulty', 'medium'), task['id'])
+            selected.append(task)
+        return selected
@@ -0,0 +1,21 @@
+
+import pytest
+from approximate_inference import LikelihoodWeighting
+from bayesian_network import SimpleBayesianNetwork
+
+
+@pytest.fixture(scope='module')
+def sampler():
+    return LikelihoodWeighting(SimpleBayesianNetwork.from_prototype().model, seed=0)
+
+
+@pytest.mark.parametrize('kwargs', [{'n_samples': 0}, {'max_samples': 0}, {'n_samples': -5}])
+def test_query_batch_rejects_empty_budget(sampler, kwargs):
+    with pytest.raises(ValueError):
+        sampler.query_batch(['Algebra'], **kwargs)
+
+
+def test_query_batch_single_sample(sampler):
+    result = sampler.query_batch(['Algebra'], evidence={'Result': 'Correct'}, n_samples=1)
+    assert result['samples'] == 1
+    assert result['probabilities']['Algebra'].shape == (1, 2)
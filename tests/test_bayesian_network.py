@@ -0,0 +1,91 @@
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from bayesian_network import (SimpleBayesianNetwork, DIFFICULTY_LEVELS, DIFFICULTY_OFFSETS,
+                              RESULT_CORRECT_BASE)
+from storage import InMemoryStorage
+
+
+def _gap(storage, user_id, days):
+    # Остання зміна моделі - days днів тому
+    moment = datetime.now(timezone.utc) - timedelta(days=days)
+    storage.models[user_id]['created_at'] = moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def test_save_keeps_forgetting():
+    storage = InMemoryStorage()
+    user_id = storage.create_user('student', 'student@test.ua')
+    bn = SimpleBayesianNetwork.from_prototype()
+    for _ in range(5):
+        bn.update_from_answer(True, 'algebra', 'hard')
+    bn.save_to_database(storage, user_id)
+    _gap(storage, user_id, 60)
+
+    loaded = SimpleBayesianNetwork.from_prototype()
+    assert loaded.load_from_database(storage, user_id)
+    expected = loaded.decayed_state()['Algebra']['High']
+    assert expected < loaded.current_state['Algebra']['High']
+
+    # Збереження без нової відповіді не скасовує забування за паузу
+    loaded.save_to_database(storage, user_id)
+    reloaded = SimpleBayesianNetwork.from_prototype()
+    assert reloaded.load_from_database(storage, user_id)
+    assert reloaded.decayed_state()['Algebra']['High'] == pytest.approx(expected, abs=1e-6)
+
+    # Подальша пауза відлічується від збереження
+    _gap(storage, user_id, 60)
+    later = SimpleBayesianNetwork.from_prototype()
+    assert later.load_from_database(storage, user_id)
+    assert later.decayed_state()['Algebra']['High'] < expected
+
+
+def _result_correct(bn):
+    # P(Correct | навички, складність): (8 комбінацій навичок) × (рівні складності)
+    values = bn.model.get_cpds('Result').get_values()
+    return values[1].reshape(8, len(DIFFICULTY_LEVELS))
+
+
+def test_result_cpt_orders_difficulty():
+    bn = SimpleBayesianNetwork.from_prototype()
+    correct = _result_correct(bn)
+    easy, medium, hard = (correct[:, DIFFICULTY_LEVELS.index(level)]
+                          for level in ('easy', 'medium', 'hard'))
+    assert (easy > medium).all() and (medium > hard).all()
+    assert medium == pytest.approx(RESULT_CORRECT_BASE)
+
+    for high, low in (bn.success_given_skill(level) for level in DIFFICULTY_LEVELS):
+        assert high > low
+    assert [bn.success_given_skill(level)[0] for level in DIFFICULTY_LEVELS] == sorted(
+        (bn.success_given_skill(level)[0] for level in DIFFICULTY_LEVELS), reverse=True)
+
+
+def test_learn_difficulty_follows_observed_rates():
+    storage = InMemoryStorage()
+    user_id = storage.create_user('student', 'student@test.ua')
+    # Спостережені частки: легкі 95%, середні 50%, складні 10% (сильніше за типові зсуви ±1)
+    rates = {'easy': 0.95, 'medium': 0.5, 'hard': 0.1}
+    answers = []
+    for level, rate in rates.items():
+        task_id = storage.create_task('algebra', level, 'open', 'умова', 'питання', '1', [])
+        answers += [(user_id, task_id, '1', i < rate * 1000, 30) for i in range(1000)]
+    storage.create_answers(answers)
+
+    bn = SimpleBayesianNetwork.from_prototype()
+    before = _result_correct(bn)
+    offsets = bn.learn_difficulty(storage)
+
+    for level, rate in rates.items():
+        # Середні відповідають наполовину, тож зсув відносно них - просто логіт частки
+        expected = np.log(rate / (1 - rate))
+        assert offsets[level] == pytest.approx(expected, abs=0.05)
+        if level != 'medium':
+            assert abs(offsets[level] - expected) < abs(DIFFICULTY_OFFSETS[level] - expected)
+    # Нові зсуви потрапляють у CPT Result мережі
+    after = _result_correct(bn)
+    easy, hard = DIFFICULTY_LEVELS.index('easy'), DIFFICULTY_LEVELS.index('hard')
+    assert (after[:, easy] > before[:, easy]).all()
+    assert (after[:, hard] < before[:, hard]).all()
+    # Прототип інших мереж не змінюється
+    assert _result_correct(SimpleBayesianNetwork.from_prototype()) == pytest.approx(before)
@@ -0,0 +1,110 @@
+
+import gzip
+import json
+import os
+import shutil
+
+import pytest
+from database import DatabaseManager
+from evaluate import evaluate
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'test.db'))
+    tasks = [db.create_task(topic, difficulty, 'open', 'умова', 'питання', '1', [])
+             for topic in ('algebra', 'geometry') for difficulty in ('easy', 'hard')]
+    users = [db.create_user(f'student_{i}', f'student_{i}@test.ua') for i in range(3)]
+    for k in range(40):
+        db.create_answer(users[k % 3], tasks[k % 4], '1', k % 3 != 0, 10 + k)
+    # Перші 30 відповідей - старі, по одній на хвилину
+    conn = db._get_connection()
+    conn.execute('''
+    UPDATE answers SET submitted_at = datetime('2024-01-01', '+' || rowid || ' minutes')
+    WHERE rowid <= 30
+    ''')
+    conn.commit()
+    yield db, users, tasks
+    db.close()
+
+
+def _all_answers(db):
+    return [tuple(row) for chunk in db.iter_answer_history_chunks(7) for row in chunk]
+
+
+def test_compaction_round_trip(db, tmp_path):
+    db, users, tasks = db
+    answers = _all_answers(db)
+    task_stats = sorted((row['task_id'], row['total'], row['correct']) for row in db.get_task_answer_stats())
+    user_stats = [db.get_user_statistics(user_id) for user_id in users]
+    report = evaluate(db, chunk_size=7)
+
+    result = db.compact_answers('2025-01-01 00:00:00', str(tmp_path / 'archive'), chunk_size=4)
+    assert result['archived'] == 30
+    assert os.path.exists(result['archive'])
+    assert db._get_connection().execute("SELECT COUNT(*) FROM answers").fetchone()[0] == 10
+
+    # Архів: заголовок і всі згорнуті рядки
+    with gzip.open(result['archive'], 'rt', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 31
+    assert 'user_response' in json.loads(lines[0])
+
+    # Журнал, статистика та оцінювання після компактації ті самі
+    assert _all_answers(db) == answers
+    assert sorted((row['task_id'], row['total'], row['correct'])
+                  for row in db.get_task_answer_stats()) == task_stats
+    assert [db.get_user_statistics(user_id) for user_id in users] == user_stats
+    # Межі порцій змінюються (архів окремо), тож суми - з точністю до округлення
+    replayed = evaluate(db, chunk_size=7)
+    for name, summary in [('overall', replayed['overall'])] + list(replayed['by_topic'].items()):
+        expected = report['overall'] if name == 'overall' else report['by_topic'][name]
+        assert summary['count'] == expected['count']
+        for metric in ('log_loss', 'brier', 'auc'):
+            assert summary[metric] == pytest.approx(expected[metric], rel=1e-12)
+
+    # Згорнуті відповіді й далі виключають розв'язані завдання з кандидатів
+    assert db.get_task_candidates(exclude_user_id=users[0]) == []
+
+    # Повторна компактація без нових старих відповідей нічого не змінює
+    assert db.compact_answers('2025-01-01 00:00:00', str(tmp_path / 'archive'))['archived'] == 0
+
+
+def _add_late_answer(db, user_id, task_id):
+    db.create_answer(user_id, task_id, '1', True, 5)
+    conn = db._get_connection()
+    conn.execute("UPDATE answers SET submitted_at = '2025-06-01 00:00:00' "
+                 "WHERE rowid = (SELECT MAX(rowid) FROM answers)")
+    conn.commit()
+
+
+def test_two_pass_compaction_keeps_time_order(db, tmp_path):
+    db, users, tasks = db
+    # Остання (з найбільшим rowid) відповідь - стара: перша компактація її лишає
+    conn = db._get_connection()
+    conn.execute("UPDATE answers SET submitted_at = '2024-01-01 00:05:30' WHERE rowid = 40")
+    conn.commit()
+    # Еталон - та сама БД без компактації
+    shutil.copy(db.db_path, tmp_path / 'reference.db')
+    reference = DatabaseManager(str(tmp_path / 'reference.db'))
+    _add_late_answer(reference, users[0], tasks[0])
+    answers = _all_answers(reference)
+    assert [row[0] for row in answers][:7] == [1, 2, 3, 4, 5, 40, 6]
+    report = evaluate(reference, chunk_size=7)
+    reference.close()
+
+    first = db.compact_answers('2024-01-01 00:20:00', str(tmp_path / 'archive'))
+    assert first['archived'] == 19
+    _add_late_answer(db, users[0], tasks[0])
+    second = db.compact_answers('2025-01-01 00:00:00', str(tmp_path / 'archive'))
+    # Друга компактація архівує і лишену першою стару відповідь
+    assert second['archived'] == 12
+
+    # Старий рядок другого архіву стає між рядками першого
+    assert _all_answers(db) == answers
+    replayed = evaluate(db, chunk_size=7)
+    for name, summary in [('overall', replayed['overall'])] + list(replayed['by_topic'].items()):
+        expected = report['overall'] if name == 'overall' else report['by_topic'][name]
+        assert summary['count'] == expected['count']
+        for metric in ('log_loss', 'brier', 'auc'):
+            assert summary[metric] == pytest.approx(expected[metric], rel=1e-12)
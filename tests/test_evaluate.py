@@ -0,0 +1,42 @@
+
+import random
+
+import numpy as np
+import pytest
+from bayesian_network import SimpleBayesianNetwork
+from database import DatabaseManager
+from evaluate import evaluate
+
+
+def test_replay_matches_production_updates(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'test.db'))
+    # Теми в різному регістрі, як у довільних банках завдань
+    tasks = [(topic, difficulty, db.create_task(topic, difficulty, 'open', 'умова', 'питання', '1', []))
+             for topic in ('Algebra', 'geometry', 'FUNCTIONS')
+             for difficulty in ('easy', 'medium', 'hard')]
+    users = [db.create_user(f'student_{i}', f'student_{i}@test.ua') for i in range(4)]
+
+    rng = random.Random(0)
+    networks = {user_id: SimpleBayesianNetwork.from_prototype() for user_id in users}
+    predicted, observed = [], []
+    for _ in range(60):
+        user_id = rng.choice(users)
+        topic, difficulty, task_id = rng.choice(tasks)
+        is_correct = rng.random() < 0.6
+        bn = networks[user_id]
+        predicted.append(bn.predict_success(topic, difficulty))
+        observed.append(is_correct)
+        bn.update_from_answer(is_correct, topic, difficulty)
+        db.create_answer(user_id, task_id, '1', is_correct, 30)
+
+    # Невеликі порції: відповіді учня розподілені між кількома хвилями й порціями
+    report = evaluate(db, chunk_size=7)
+    db.close()
+
+    p = np.clip(np.array(predicted), 1e-12, 1 - 1e-12)
+    y = np.array(observed, dtype=float)
+    overall = report['overall']
+    assert overall['count'] == 60
+    assert overall['log_loss'] == pytest.approx(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)), rel=1e-6)
+    assert overall['brier'] == pytest.approx(np.mean((p - y) ** 2), rel=1e-6)
+    assert sum(summary['count'] for summary in report['by_topic'].values()) == 60
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from database import DatabaseManager
+from export_answers import COLUMNS, export_answers, load_answers
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'answers.db'))
+    yield db
+    db.close()
+
+
+def _add_answers(db, students, tasks, count, offset=0):
+    users = [db.create_user(f'student_{offset + i}', f'student_{offset + i}@test.ua')
+             for i in range(students)]
+    task_ids = [db.create_task(topic, difficulty, 'open', 'умова', 'питання', '1', [])
+                for topic, difficulty in [('algebra', 'easy'), ('geometry', 'hard'),
+                                          ('functions', 'medium')][:tasks]]
+    db.create_answers([(users[i % students], task_ids[i % tasks], '1', i % 3 == 0, 10 + i)
+                       for i in range(count)])
+
+
+def _expected(db):
+    cursor = db._get_connection().cursor()
+    cursor.execute('''
+    SELECT a.user_id, a.task_id, t.topic, t.difficulty, a.is_correct, a.time_spent,
+           a.submitted_at
+    FROM answers a JOIN tasks t ON t.id = a.task_id
+    ORDER BY a.rowid
+    ''')
+    return cursor.fetchall()
+
+
+def _assert_matches(data, rows):
+    assert data['count'] == len(rows)
+    for column, dtype in COLUMNS.items():
+        assert data[column].dtype == np.dtype(dtype)
+        assert len(data[column]) == len(rows)
+    assert [data['users'][i] for i in data['user_idx']] == [row['user_id'] for row in rows]
+    assert [data['tasks'][i] for i in data['task_idx']] == [row['task_id'] for row in rows]
+    assert [data['topics'][i] for i in data['topic_code']] == [row['topic'] for row in rows]
+    assert [data['difficulties'][i] for i in data['difficulty_code']] == [
+        row['difficulty'] for row in rows]
+    assert data['is_correct'].tolist() == [int(row['is_correct']) for row in rows]
+    assert data['time_spent'].tolist() == [row['time_spent'] for row in rows]
+    expected_time = np.array([row['submitted_at'] for row in rows], dtype='datetime64[s]')
+    assert (data['timestamp'] == expected_time.astype(np.int64)).all()
+
+
+def test_export_append_and_reopen(db, tmp_path):
+    out_dir = str(tmp_path / 'export')
+    _add_answers(db, students=3, tasks=2, count=25)
+    assert export_answers(db, out_dir, chunk_size=7) == 25
+    first = load_answers(out_dir)
+    assert isinstance(first['user_idx'], np.memmap)
+    _assert_matches(first, _expected(db))
+
+    # Нові учні та завдання дописуються в кінець словників
+    _add_answers(db, students=2, tasks=3, count=11, offset=3)
+    assert export_answers(db, out_dir, chunk_size=4) == 11
+    assert export_answers(db, out_dir) == 0
+    data = load_answers(out_dir)
+    _assert_matches(data, _expected(db))
+    assert data['users'][:3] == first['users']
+    assert data['user_idx'][:25].tolist() == first['user_idx'].tolist()
+
+
+def test_interrupted_export_tail_is_dropped(db, tmp_path):
+    out_dir = str(tmp_path / 'export')
+    _add_answers(db, students=2, tasks=2, count=10)
+    export_answers(db, out_dir)
+    # Хвіст перерваного експорту без оновленого meta.json
+    with open(tmp_path / 'export' / 'user_idx.bin', 'ab') as f:
+        f.write(b'\xff' * 12)
+
+    _add_answers(db, students=1, tasks=1, count=3, offset=2)
+    assert export_answers(db, out_dir) == 3
+    _assert_matches(load_answers(out_dir), _expected(db))
+
+    assert export_answers(db, out_dir, full=True) == 13
+    _assert_matches(load_answers(out_dir), _expected(db))
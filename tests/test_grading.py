@@ -0,0 +1,89 @@
+
+import pytest
+from database import DatabaseManager
+from grading import AnswerGrader, answer_keys, normalize_answer
+from storage import InMemoryStorage
+
+
+@pytest.mark.parametrize('correct, response', [
+    ("x=6, y=4", "y = 4; x = 6"),
+    ("x=6, y=4", "x=6 і y=4"),
+    ("(2, -1)", "(2; -1)"),
+    ("(2, -1)", "2, -1"),
+    ("(2, -1)", "(2,−1)"),
+    ("10 см", "10"),
+    ("10 см", "100 мм"),
+    ("10 см", "0,1 м"),
+    ("10 см", "10 cm"),
+    ("20 см²", "2000 мм2"),
+    ("Так", "так"),
+    ("Так", "yes"),
+    ("5", "10/2"),
+    ("x=5", "5"),
+    ("0.5", "1/2"),
+    ("1,5", "1, 5"),
+    ("1.5", "1, 5"),
+    ("-3", "- 3"),
+    ("1000", "1 000"),
+    ("1000 грн", "1 000 грн"),
+    ("x=-3", "x = - 3"),
+    ("(1000; -3)", "(1 000; - 3)"),
+])
+def test_equivalent_answers(correct, response):
+    assert normalize_answer(response) in answer_keys(correct)
+
+
+@pytest.mark.parametrize('correct, response', [
+    ("10 см", "10 м"),
+    ("(2, -1)", "(-1, 2)"),
+    ("5", "x = 5"),
+    ("x=6, y=4", "x=4, y=6"),
+    ("5", "5/0"),
+    ("Так", "ні"),
+    ("1,5", "15"),
+    ("1,5", "1, 5, 7"),
+    ("(2, -1)", "2, 1"),
+])
+def test_different_answers(correct, response):
+    assert normalize_answer(response) not in answer_keys(correct)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def storage(request, tmp_path):
+    backend = InMemoryStorage() if request.param == 'memory' else DatabaseManager(str(tmp_path / 'test.db'))
+    yield backend
+    backend.close()
+
+
+def test_grade_and_record(storage):
+    task_id = storage.create_task('geometry', 'easy', 'open', 'Відрізок', 'Довжина?', '10 см', [])
+    user_id = storage.create_user('student', 'student@test.ua')
+    grader = AnswerGrader(storage)
+
+    responses = ['100 мм', '10 м', '0,1 м', 'не знаю']
+    results = grader.grade_and_record([(user_id, task_id, response, 30) for response in responses])
+    assert [result['is_correct'] for result in results] == [True, False, True, False]
+    assert grader.grade_batch([task_id] * 4, responses) == [True, False, True, False]
+
+    stats = storage.get_user_statistics(user_id)
+    assert stats['total_answers'] == 4
+    assert stats['correct_answers'] == 2
+
+    with pytest.raises(ValueError):
+        grader.grade('missing', '10')
+
+
+def test_changed_answer_invalidates_keys(tmp_path):
+    path = str(tmp_path / 'test.db')
+    storage, editor = DatabaseManager(path), DatabaseManager(path)
+    task_id = storage.create_task('algebra', 'easy', 'open', 'Рівняння', 'x?', '5', [])
+    grader = AnswerGrader(storage)
+    assert grader.grade(task_id, '5')
+
+    # Відповідь виправлено з іншого з'єднання
+    conn = editor._get_connection()
+    conn.execute("UPDATE tasks SET correct_answer = '7' WHERE id = ?", (task_id,))
+    conn.commit()
+    assert grader.grade_batch([task_id, task_id], ['5', '7']) == [False, True]
+    storage.close()
+    editor.close()
@@ -0,0 +1,67 @@
+
+import itertools
+
+import pytest
+from bayesian_network import SimpleBayesianNetwork
+from database import DatabaseManager
+
+ANSWERS = [(True, 'algebra', 'hard'), (False, 'geometry', 'easy'), (True, 'functions', 'medium'),
+           (True, 'Algebra', 'easy'), (False, 'functions', 'hard'), (True, 'geometry', 'medium')]
+
+
+def _assert_same_state(first, second):
+    for skill, dist in first.items():
+        assert dist['High'] == pytest.approx(second[skill]['High'], abs=1e-9)
+
+
+def test_junction_tree_matches_variable_elimination():
+    exact = SimpleBayesianNetwork.from_prototype(engine='exact')
+    tree = SimpleBayesianNetwork.from_prototype(engine='junction_tree')
+    for is_correct, topic, difficulty in ANSWERS:
+        _assert_same_state(exact.update_from_answer(is_correct, topic, difficulty),
+                           tree.update_from_answer(is_correct, topic, difficulty))
+
+    for result, difficulty in itertools.product(['Correct', 'Incorrect'], ['easy', 'medium', 'hard']):
+        evidence = {'Result': result, 'Difficulty': difficulty}
+        _assert_same_state(exact._query_skills(evidence), tree._query_skills(evidence))
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'test.db'))
+    yield db
+    db.close()
+
+
+def test_load_of_default_network_shares_prototype(db):
+    prototype = SimpleBayesianNetwork.from_prototype()
+    user_id = db.create_user('student', 'student@test.ua')
+    SimpleBayesianNetwork.from_prototype().save_to_database(db, user_id)
+
+    loaded = SimpleBayesianNetwork()
+    assert loaded.load_from_database(db, user_id)
+    assert loaded.model is prototype.model
+    assert loaded.inference is prototype.inference
+
+    # Перша зміна CPT копіює модель, прототип лишається незмінним
+    prior = prototype.model.get_cpds('Algebra').get_values().copy()
+    fresh = SimpleBayesianNetwork.from_prototype()
+    _assert_same_state(loaded.update_from_answer(True, 'algebra', 'hard'),
+                       fresh.update_from_answer(True, 'algebra', 'hard'))
+    assert loaded.model is not prototype.model
+    assert (prototype.model.get_cpds('Algebra').get_values() == prior).all()
+
+
+def test_load_of_changed_network_builds_own_model(db):
+    user_id = db.create_user('student', 'student@test.ua')
+    bn = SimpleBayesianNetwork.from_prototype()
+    bn.update_from_answer(True, 'geometry', 'hard')
+    bn.save_to_database(db, user_id)
+
+    loaded = SimpleBayesianNetwork()
+    assert loaded.load_from_database(db, user_id)
+    assert loaded.model is not SimpleBayesianNetwork.from_prototype().model
+    for skill in ('Algebra', 'Geometry', 'Functions'):
+        assert (loaded.model.get_cpds(skill).get_values() ==
+                pytest.approx(bn.model.get_cpds(skill).get_values()))
+    _assert_same_state(loaded.current_state, bn.current_state)
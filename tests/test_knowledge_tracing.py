@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from bayesian_network import SKILL_NODES, DIFFICULTY_LEVELS
+from knowledge_tracing import KnowledgeTracer
+
+
+@pytest.fixture
+def tracer():
+    # Різне й помітне забування для кожної навички
+    parameters = {
+        skill: {'learn': 0.1 + 0.05 * j, 'forget': 0.05 + 0.05 * j, 'slip': 0.1, 'guess': 0.25}
+        for j, skill in enumerate(SKILL_NODES)
+    }
+    return KnowledgeTracer(parameters)
+
+
+def _history(rng, students=6, steps=40):
+    skills = rng.integers(0, len(SKILL_NODES), size=(students, steps))
+    correct = rng.random((students, steps)) < 0.6
+    levels = rng.integers(0, len(DIFFICULTY_LEVELS), size=(students, steps))
+    # Історії різної довжини
+    lengths = rng.integers(1, steps + 1, size=students)
+    mask = np.arange(steps)[None, :] < lengths[:, None]
+    return skills, correct, levels, mask
+
+
+def _step_by_step(tracer, skills, correct, levels, mask, p_known):
+    predictions = np.full(skills.shape, np.nan)
+    state = np.array(p_known, dtype=np.float64)
+    for student in range(skills.shape[0]):
+        for t in range(skills.shape[1]):
+            if not mask[student, t]:
+                continue
+            skill, level = skills[student, t], levels[student, t]
+            current = state[student, skill]
+            predictions[student, t] = tracer.predict(current, skill, level)
+            state[student, skill] = tracer.step(current, skill, correct[student, t], level)
+    return predictions, state
+
+
+def test_filter_matches_repeated_steps(tracer):
+    rng = np.random.default_rng(7)
+    skills, correct, levels, mask = _history(rng)
+
+    predictions, state = tracer.filter(skills, correct, levels, mask)
+    initial = np.tile(tracer.initial, (skills.shape[0], 1))
+    expected_predictions, expected_state = _step_by_step(tracer, skills, correct, levels, mask, initial)
+
+    np.testing.assert_allclose(predictions, expected_predictions)
+    np.testing.assert_allclose(state, expected_state)
+    assert np.isnan(predictions[~mask]).all()
+
+
+def test_filter_continues_from_given_state(tracer):
+    rng = np.random.default_rng(11)
+    skills, correct, levels, mask = _history(rng)
+    p_known = rng.random((skills.shape[0], len(SKILL_NODES)))
+    original = p_known.copy()
+
+    _, state = tracer.filter(skills, correct, levels, mask, p_known=p_known)
+    _, expected = _step_by_step(tracer, skills, correct, levels, mask, p_known)
+    np.testing.assert_allclose(state, expected)
+    # Початковий стан не змінюється на місці
+    np.testing.assert_array_equal(p_known, original)
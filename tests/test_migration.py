@@ -0,0 +1,119 @@
+import json
+import sqlite3
+
+import pytest
+from bayesian_network import SimpleBayesianNetwork
+from database import DatabaseManager
+
+# Схема користувацьких таблиць першої версії (до шаблонів, історії та засвоєння)
+BASELINE_SCHEMA = '''
+CREATE TABLE users (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    role TEXT DEFAULT 'student',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE bayesian_models (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    network_structure TEXT NOT NULL,
+    cpt_parameters TEXT NOT NULL,
+    current_state TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+CREATE TABLE tasks (
+    id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    task_type TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    question TEXT NOT NULL,
+    correct_answer TEXT NOT NULL,
+    solution_steps TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE answers (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    user_response TEXT NOT NULL,
+    is_correct BOOLEAN,
+    time_spent INTEGER,
+    submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE
+);
+'''
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    """БД першої версії: повна структура та CPT у кожному рядку моделі"""
+    path = str(tmp_path / 'old.db')
+    bn = SimpleBayesianNetwork()
+    bn.build_network()
+    network_structure, cpt_parameters = bn._serialize_model()
+    bn.update_from_answer(True, 'algebra', 'hard')
+
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    for i in range(2):
+        conn.execute("INSERT INTO users (id, username, email) VALUES (?, ?, ?)",
+                     (f'u{i}', f'student_{i}', f'student_{i}@test.ua'))
+        conn.execute('''
+        INSERT INTO bayesian_models (id, user_id, network_structure, cpt_parameters,
+                                     current_state, created_at)
+        VALUES (?, ?, ?, ?, ?, '2024-01-01 00:00:00')
+        ''', (f'm{i}', f'u{i}', json.dumps(network_structure),
+              json.dumps(cpt_parameters), json.dumps(bn.current_state)))
+    conn.execute('''
+    INSERT INTO tasks (id, topic, difficulty, task_type, condition, question,
+                       correct_answer, solution_steps)
+    VALUES ('t1', 'algebra', 'hard', 'open', 'умова', 'питання', '1', '[]')
+    ''')
+    conn.execute('''
+    INSERT INTO answers (id, user_id, task_id, user_response, is_correct, time_spent)
+    VALUES ('a1', 'u0', 't1', '1', 1, 30)
+    ''')
+    conn.commit()
+    conn.close()
+    return path, bn.current_state
+
+
+def test_baseline_models_are_migrated_to_templates(baseline_db):
+    path, current_state = baseline_db
+    db = DatabaseManager(path)
+    try:
+        conn = db._get_connection()
+        assert conn.execute("SELECT COUNT(*) FROM model_templates").fetchone()[0] == 1
+        rows = conn.execute('''
+        SELECT network_structure, cpt_parameters, template_id FROM bayesian_models
+        ''').fetchall()
+        assert len(rows) == 2
+        assert all(row['network_structure'] == '{}' and row['cpt_parameters'] == '{}'
+                   for row in rows)
+        assert len({row['template_id'] for row in rows}) == 1
+
+        # Історія, засвоєння та лічильники тем доповнені для старих даних
+        assert db.get_model_state_at('u0', '2024-01-02 00:00:00')['Algebra']['High'] == \
+            pytest.approx(current_state['Algebra']['High'])
+        assert db.get_students_by_mastery('Algebra', limit=1)[0]['p_high'] == \
+            pytest.approx(current_state['Algebra']['High'])
+        assert [tuple(row) for row in conn.execute(
+            "SELECT user_id, topic, total, correct FROM user_topic_stats")] == [('u0', 'algebra', 1, 1)]
+
+        bn = SimpleBayesianNetwork()
+        assert bn.load_from_database(db, 'u0')
+        assert bn.current_state['Algebra']['High'] == pytest.approx(current_state['Algebra']['High'])
+        assert bn.model.get_cpds('Result') is not None
+    finally:
+        db.close()
+
+    # Повторне відкриття нічого не дублює
+    db = DatabaseManager(path)
+    conn = db._get_connection()
+    assert conn.execute("SELECT COUNT(*) FROM model_templates").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM model_checkpoints").fetchone()[0] == 2
+    db.close()
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from bayesian_network import SimpleBayesianNetwork, SKILL_NODES
+from population_analytics import (SKILL_TOPICS, posteriors_from_states, predict_success_batch,
+                                  top_k_at_risk, weakest_topic_batch)
+from student_state_store import StudentStateStore
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope='module')
+def networks():
+    rng = np.random.default_rng(3)
+    networks = {}
+    for i in range(12):
+        bn = SimpleBayesianNetwork.from_prototype()
+        for _ in range(int(rng.integers(1, 7))):
+            bn.update_from_answer(bool(rng.random() < 0.5), SKILL_TOPICS[rng.integers(3)],
+                                  'medium')
+        bn.last_updated = NOW - timedelta(days=int(rng.integers(0, 200)))
+        networks[f'u{i}'] = bn
+    return networks
+
+
+def _ranking(networks, skill, k):
+    """Еталон: учні за зростанням P(High) навички з урахуванням забування"""
+    highs = {user_id: bn.decayed_state(NOW)[skill]['High'] for user_id, bn in networks.items()}
+    return sorted(highs, key=highs.get)[:k]
+
+
+@pytest.mark.parametrize('k', [1, 5, 12, 50])
+def test_top_at_risk_matches_networks(networks, k):
+    store = StudentStateStore()
+    for user_id, bn in networks.items():
+        store.from_network(user_id, bn)
+
+    ranked = store.top_at_risk(k, now=NOW)
+    assert list(ranked) == SKILL_TOPICS
+    for topic, skill in zip(SKILL_TOPICS, SKILL_NODES):
+        assert [entry['user_id'] for entry in ranked[topic]] == _ranking(networks, skill, k)
+        assert [entry['p_high'] for entry in ranked[topic]] == pytest.approx(
+            [networks[user_id].decayed_state(NOW)[skill]['High']
+             for user_id in _ranking(networks, skill, k)])
+
+
+def test_batch_functions_match_networks(networks):
+    user_ids = list(networks)
+    posterior = posteriors_from_states([networks[user_id].current_state for user_id in user_ids])
+    assert posterior.shape == (len(user_ids), len(SKILL_NODES))
+
+    success = predict_success_batch(posterior, 'hard')
+    for i, user_id in enumerate(user_ids):
+        bn = networks[user_id]
+        bn_now = bn.last_updated
+        # Без часу оновлення мережа не застосовує забування
+        bn.last_updated = None
+        try:
+            assert success[i] == pytest.approx(
+                [bn.predict_success(topic, 'hard') for topic in SKILL_TOPICS])
+            assert weakest_topic_batch(posterior)[i] == bn.get_weakest_topic()
+        finally:
+            bn.last_updated = bn_now
+
+
+def test_top_at_risk_edge_cases():
+    assert top_k_at_risk(np.empty((0, len(SKILL_NODES))), [], 3) == {
+        topic: [] for topic in SKILL_TOPICS}
+    posterior = np.array([[0.3, 0.2, 0.9], [0.1, 0.8, 0.4]])
+    ranked = top_k_at_risk(posterior, ['a', 'b'], 0)
+    assert all(students == [] for students in ranked.values())
+    ranked = top_k_at_risk(posterior, ['a', 'b'], 1)
+    assert [ranked[topic][0]['user_id'] for topic in SKILL_TOPICS] == ['b', 'a', 'b']
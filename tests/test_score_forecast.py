@@ -0,0 +1,59 @@
+
+import numpy as np
+import pytest
+from bayesian_network import TOPIC_TO_NODE, SKILL_NODES, SimpleBayesianNetwork
+from score_forecast import NMT_BLUEPRINT, _group_success, forecast_scores
+
+POSTERIOR = np.array([[0.2, 0.5, 0.9], [0.8, 0.3, 0.6]])
+
+
+def _brute_force(posterior_high, n_simulations, seed):
+    """Пряма симуляція: рівні навичок учня, потім кожне завдання окремо"""
+    rng = np.random.default_rng(seed)
+    success = _group_success(NMT_BLUEPRINT, None)
+    max_score = sum(count * value for _, _, count, value in NMT_BLUEPRINT)
+    histograms = []
+    for student in posterior_high:
+        high = rng.random((n_simulations, len(SKILL_NODES))) < student
+        scores = np.zeros(n_simulations, dtype=int)
+        for group, (topic, _, count, value) in enumerate(NMT_BLUEPRINT):
+            column = SKILL_NODES.index(TOPIC_TO_NODE[topic])
+            p = np.where(high[:, column], success[group, 0], success[group, 1])
+            for _ in range(count):
+                scores += value * (rng.random(n_simulations) < p)
+        histograms.append(np.bincount(scores, minlength=max_score + 1) / n_simulations)
+    return np.array(histograms)
+
+
+def test_forecast_matches_brute_force():
+    forecast = forecast_scores(POSTERIOR, n_simulations=20000, seed=1)
+    expected = _brute_force(POSTERIOR, 200000, seed=2)
+
+    assert forecast['distribution'].shape == expected.shape
+    np.testing.assert_allclose(forecast['distribution'].sum(axis=1), 1.0)
+    # Повна варіаційна відстань між розподілами
+    assert np.abs(forecast['distribution'] - expected).sum(axis=1).max() < 0.03
+
+    values = np.arange(expected.shape[1])
+    np.testing.assert_allclose(forecast['mean'], expected @ values, atol=0.1)
+    for q, computed in forecast['percentiles'].items():
+        brute = (np.cumsum(expected, axis=1) < q / 100).sum(axis=1)
+        assert np.abs(computed - brute).max() <= 1
+
+
+def test_forecast_mean_is_exact_expectation():
+    success = _group_success(NMT_BLUEPRINT, None)
+    forecast = forecast_scores(POSTERIOR, n_simulations=50000, seed=3)
+    for student, mean in zip(POSTERIOR, forecast['mean']):
+        exact = 0.0
+        for group, (topic, _, count, value) in enumerate(NMT_BLUEPRINT):
+            p_high = student[SKILL_NODES.index(TOPIC_TO_NODE[topic])]
+            exact += count * value * (p_high * success[group, 0] + (1 - p_high) * success[group, 1])
+        assert mean == pytest.approx(exact, abs=0.1)
+
+
+def test_seeded_forecast_is_stable():
+    bn = SimpleBayesianNetwork.from_prototype()
+    first, second = bn.forecast_score(seed=0), bn.forecast_score(seed=0)
+    assert first['percentiles'] == second['percentiles']
+    np.testing.assert_array_equal(first['distribution'], second['distribution'])
@@ -0,0 +1,88 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from shared_state_store import SharedStudentStateStore
+
+
+@pytest.fixture
+def store():
+    store = SharedStudentStateStore(capacity=8)
+    yield store
+    store.unlink()
+
+
+def test_remove_keeps_row_numbers(store):
+    rows = {user_id: store.add(user_id) for user_id in ('a', 'b', 'c')}
+    store.set_row('c', skill_high={'Algebra': 0.9})
+
+    assert store.remove('b')
+    assert not store.remove('b')
+    assert 'b' not in store
+    assert store.row('c') == rows['c']
+    assert store.get_row('c')['skill_high']['Algebra'] == pytest.approx(0.9)
+    assert np.isnan(store.skill_high[rows['b']]).all()
+    with pytest.raises(KeyError):
+        store.row('b')
+    # Повторно доданий учень отримує новий рядок, а не надгробок
+    assert store.add('b') == 3
+
+
+def test_removal_visible_to_attached_process(store):
+    store.add('a')
+    store.add('b')
+    reader = SharedStudentStateStore(capacity=8, name=store.name)
+    try:
+        assert 'b' in reader
+        store.remove('b')
+        store.add('d')
+        store.remove('d')
+        assert 'b' not in reader
+        assert 'd' not in reader
+        assert reader.row('a') == 0
+        assert reader.user_ids == ['a', None, None]
+        with pytest.raises(PermissionError):
+            reader.remove('a')
+    finally:
+        reader.close()
+
+
+def test_top_at_risk_skips_removed(store):
+    for user_id in ('a', 'b', 'c'):
+        store.add(user_id)
+    store.set_row('b', posterior_high={'Algebra': 0.01})
+    store.remove('b')
+
+    ranked = store.top_at_risk(k=5)
+    assert all(len(students) == 2 for students in ranked.values())
+    assert all(entry['user_id'] != 'b'
+               for students in ranked.values() for entry in students)
+
+
+def test_attach_with_wrong_capacity_fails(store):
+    store.add('a')
+    with pytest.raises(ValueError):
+        SharedStudentStateStore(capacity=4, name=store.name)
+    with pytest.raises(ValueError):
+        SharedStudentStateStore(capacity=16, name=store.name)
+
+
+def _remove_in_worker(store, user_id):
+    store.remove(user_id)
+
+
+def test_remove_from_worker_process():
+    context = multiprocessing.get_context('spawn')
+    store = SharedStudentStateStore(capacity=8, context=context)
+    try:
+        store.add('a')
+        store.add('b')
+        worker = context.Process(target=_remove_in_worker, args=(store, 'a'))
+        worker.start()
+        worker.join(30)
+        assert worker.exitcode == 0
+        assert 'a' not in store
+        assert store.row('b') == 1
+    finally:
+        store.unlink()
@@ -0,0 +1,187 @@
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from database import DatabaseManager
+from sharded_database import ShardedDatabaseManager
+from storage import StorageBackend, InMemoryStorage
+
+
+def _state(algebra: float) -> dict:
+    return {'Algebra': {'Low': 1 - algebra, 'High': algebra},
+            'Geometry': {'Low': 0.5, 'High': 0.5},
+            'Functions': {'Low': 0.5, 'High': 0.5}}
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'sharded'])
+def storage(request, tmp_path):
+    if request.param == 'memory':
+        backend = InMemoryStorage()
+    elif request.param == 'sqlite':
+        backend = DatabaseManager(str(tmp_path / 'test.db'))
+    else:
+        backend = ShardedDatabaseManager(str(tmp_path / 'shards'), num_shards=2)
+    yield backend
+    backend.close()
+
+
+def test_backends_implement_history_api():
+    class Partial(StorageBackend):
+        pass
+    with pytest.raises(TypeError):
+        Partial()
+    for name in ('get_model_state_at', 'get_model_trajectory', 'get_students_by_mastery'):
+        assert name in StorageBackend.__abstractmethods__
+
+
+def test_email_is_unique(storage):
+    user_ids = [storage.create_user(f'student_{i}', f'student_{i}@test.ua') for i in range(20)]
+    # Новий ID щоразу потрапляє в інший шард - email має бути унікальним у всіх
+    for i in range(20):
+        with pytest.raises((ValueError, sqlite3.IntegrityError)):
+            storage.create_user('copy', f'student_{i}@test.ua')
+    for i, user_id in enumerate(user_ids):
+        assert storage.get_user_by_email(f'student_{i}@test.ua')['id'] == user_id
+    assert storage.get_user_by_email('missing@test.ua') is None
+
+
+def test_sharded_email_directory_is_filled_for_old_shards(tmp_path):
+    base_dir = str(tmp_path / 'shards')
+    storage = ShardedDatabaseManager(base_dir, num_shards=2)
+    user_id = storage.create_user('student', 'student@test.ua')
+    # Шарди, створені до появи каталогу email
+    conn = storage.tasks._get_connection()
+    conn.execute("DELETE FROM user_emails")
+    conn.commit()
+    storage.close()
+
+    storage = ShardedDatabaseManager(base_dir, num_shards=2)
+    assert storage.get_user_by_email('student@test.ua')['id'] == user_id
+    with pytest.raises(sqlite3.IntegrityError):
+        storage.create_user('copy', 'student@test.ua')
+    storage.close()
+
+
+def test_model_history(storage):
+    user_id = storage.create_user('student', 'student@test.ua')
+    storage.create_bayesian_model(user_id, {}, {}, _state(0.5))
+    for algebra in (0.6, 0.7, 0.8):
+        assert storage.update_bayesian_model(user_id, _state(algebra))
+
+    past = datetime.now(timezone.utc) - timedelta(days=1)
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    assert storage.get_model_state_at(user_id, past) is None
+    assert storage.get_model_state_at(user_id, future)['Algebra']['High'] == pytest.approx(0.8)
+
+    trajectory = storage.get_model_trajectory(user_id)
+    assert [event['event_no'] for event in trajectory] == [1, 2, 3]
+    assert [event['state']['Algebra'] for event in trajectory] == pytest.approx([0.6, 0.7, 0.8])
+    assert storage.get_model_trajectory(user_id, end=past) == []
+
+
+def test_students_by_mastery_is_not_decayed(tmp_path):
+    from bayesian_network import SimpleBayesianNetwork
+
+    storage = DatabaseManager(str(tmp_path / 'test.db'))
+    user_id = storage.create_user('student', 'student@test.ua')
+    storage.create_bayesian_model(user_id, {}, {}, _state(0.9))
+    # Учень не займався рік
+    conn = storage._get_connection()
+    conn.execute("UPDATE skill_mastery SET updated_at = '2020-01-01 00:00:00'")
+    conn.commit()
+
+    row, = storage.get_students_by_mastery('Algebra')
+    assert row['p_high'] == pytest.approx(0.9)
+    assert row['updated_at'] == '2020-01-01 00:00:00'
+
+    # Поточна оцінка - забування від updated_at, як у мережі
+    bn = SimpleBayesianNetwork.from_prototype()
+    bn.current_state = _state(row['p_high'])
+    bn.last_updated = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    assert bn.decayed_state(datetime(2021, 1, 1, tzinfo=timezone.utc))['Algebra']['High'] < 0.9
+    storage.close()
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+def test_failed_submit_leaves_no_trace(backend, tmp_path):
+    storage = InMemoryStorage() if backend == 'memory' else DatabaseManager(str(tmp_path / 'test.db'))
+    user_id = storage.create_user('student', 'student@test.ua')
+    storage.create_bayesian_model(user_id, {}, {}, _state(0.5))
+    task_id = storage.create_task('algebra', 'easy', 'open', 'умова', 'питання', '1', [])
+
+    with pytest.raises((ValueError, sqlite3.IntegrityError)):
+        storage.submit_answer(user_id, 'missing-task', '1', True, 30, _state(0.9))
+    assert storage.get_bayesian_model(user_id)['current_state']['Algebra']['High'] == pytest.approx(0.5)
+    assert storage.get_user_answers(user_id) == []
+    assert storage.get_model_trajectory(user_id) == []
+
+    other = storage.create_user('other', 'other@test.ua')
+    with pytest.raises(ValueError):
+        storage.submit_answer(other, task_id, '1', True, 30, _state(0.9))
+    assert storage.get_user_answers(other) == []
+
+    storage.submit_answer(user_id, task_id, '1', True, 30, _state(0.9))
+    assert storage.get_bayesian_model(user_id)['current_state']['Algebra']['High'] == pytest.approx(0.9)
+    assert len(storage.get_user_answers(user_id)) == 1
+    assert len(storage.get_model_trajectory(user_id)) == 1
+    storage.close()
+
+
+def _history_state(event_no: int) -> dict:
+    # Геометрія змінюється лише на кожній сьомій події - решта подій її не зберігає
+    state = _state(round(0.3 + 0.005 * event_no, 6))
+    state['Geometry'] = {'Low': 0.5 - 0.01 * (event_no // 7), 'High': 0.5 + 0.01 * (event_no // 7)}
+    return state
+
+
+def _assert_state(state: dict, event_no: int):
+    expected = _history_state(event_no)
+    for skill in expected:
+        assert state[skill] == pytest.approx(expected[skill]['High'])
+
+
+def test_history_round_trip_across_checkpoints(storage):
+    from database import CHECKPOINT_INTERVAL
+
+    user_id = storage.create_user('student', 'student@test.ua')
+    storage.create_bayesian_model(user_id, {}, {}, _history_state(0))
+    events = 2 * CHECKPOINT_INTERVAL + 10
+    for event_no in range(1, events + 1):
+        assert storage.update_bayesian_model(user_id, _history_state(event_no))
+
+    trajectory = storage.get_model_trajectory(user_id)
+    assert [event['event_no'] for event in trajectory] == list(range(1, events + 1))
+    for event in trajectory:
+        _assert_state(event['state'], event['event_no'])
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    current = storage.get_model_state_at(user_id, future)
+    _assert_state({skill: dist['High'] for skill, dist in current.items()}, events)
+
+
+def test_history_by_time_across_checkpoint(tmp_path):
+    from database import CHECKPOINT_INTERVAL
+
+    storage = DatabaseManager(str(tmp_path / 'test.db'))
+    user_id = storage.create_user('student', 'student@test.ua')
+    storage.create_bayesian_model(user_id, {}, {}, _history_state(0))
+    for event_no in range(1, CHECKPOINT_INTERVAL + 20):
+        storage.update_bayesian_model(user_id, _history_state(event_no))
+    # Подія n - о n-й хвилині
+    conn = storage._get_connection()
+    for table in ('model_events', 'model_checkpoints'):
+        conn.execute(f"UPDATE {table} SET created_at = "
+                     f"datetime('2024-01-01 00:00:00', '+' || event_no || ' minutes')")
+    conn.commit()
+
+    start = datetime(2024, 1, 1) + timedelta(minutes=CHECKPOINT_INTERVAL - 3)
+    for minutes in (CHECKPOINT_INTERVAL - 1, CHECKPOINT_INTERVAL, CHECKPOINT_INTERVAL + 8):
+        state = storage.get_model_state_at(user_id, datetime(2024, 1, 1) + timedelta(minutes=minutes))
+        _assert_state({skill: dist['High'] for skill, dist in state.items()}, minutes)
+
+    trajectory = storage.get_model_trajectory(user_id, start=start, end=start + timedelta(minutes=6))
+    assert [event['event_no'] for event in trajectory] == list(
+        range(CHECKPOINT_INTERVAL - 3, CHECKPOINT_INTERVAL + 4))
+    for event in trajectory:
+        _assert_state(event['state'], event['event_no'])
+    storage.close()
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from bayesian_network import SimpleBayesianNetwork, SKILL_NODES
+from student_state_store import StudentStateStore
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+TOPICS = ['algebra', 'geometry', 'functions']
+
+
+def _network(seed: int, days_ago) -> SimpleBayesianNetwork:
+    """Мережа учня після кількох відповідей; days_ago=None - без часу оновлення"""
+    rng = np.random.default_rng(seed)
+    bn = SimpleBayesianNetwork.from_prototype()
+    for _ in range(int(rng.integers(1, 6))):
+        bn.update_from_answer(bool(rng.random() < 0.7), TOPICS[rng.integers(3)],
+                              ['easy', 'medium', 'hard'][rng.integers(3)])
+    bn.last_updated = None if days_ago is None else NOW - timedelta(days=days_ago)
+    return bn
+
+
+@pytest.fixture(scope='module')
+def networks():
+    return {f'u{i}': _network(i, None if i == 0 else 15 * i) for i in range(8)}
+
+
+def _high(state):
+    return [state[skill]['High'] for skill in SKILL_NODES]
+
+
+def test_rows_and_growth():
+    store = StudentStateStore(capacity=2)
+    rows = [store.add(f'u{i}') for i in range(9)]
+    assert rows == list(range(9))
+    assert store.add('u3') == 3
+    assert len(store) == 9 and store.capacity >= 9
+    assert 'u8' in store and 'missing' not in store
+    with pytest.raises(KeyError):
+        store.row('missing')
+    # Новий учень - апріорні значення без часу оновлення
+    row = store.get_row('u8')
+    assert list(row['posterior_high'].values()) == pytest.approx(store.baseline.tolist())
+    assert row['last_updated'] is None
+
+    store.set_row('u8', posterior_high={'Geometry': 0.9}, last_updated=NOW)
+    store.set_row('u1', posterior_high={'Algebra': 0.2})
+    assert store.remove('u1')
+    assert not store.remove('u1')
+    # Останній учень переїхав на звільнений рядок разом зі станом
+    assert store.row('u8') == 1 and len(store) == 8
+    assert store.get_row('u8')['posterior_high']['Geometry'] == pytest.approx(0.9)
+    assert store.get_row('u8')['last_updated'] == NOW
+
+
+def test_matches_networks(networks):
+    store = StudentStateStore(capacity=4)
+    for user_id, bn in networks.items():
+        store.from_network(user_id, bn)
+
+    decayed = store.decayed_posteriors(NOW)
+    for user_id, bn in networks.items():
+        row = store.row(user_id)
+        assert store.get_row(user_id)['posterior_high'] == pytest.approx(
+            {skill: dist['High'] for skill, dist in bn.current_state.items()})
+        assert decayed[row] == pytest.approx(_high(bn.decayed_state(NOW)))
+    # Без часу оновлення забування немає
+    assert decayed[store.row('u0')] == pytest.approx(_high(networks['u0'].current_state))
+
+    restored = store.to_network('u5', SimpleBayesianNetwork.from_prototype())
+    assert _high(restored.current_state) == pytest.approx(_high(networks['u5'].current_state))
+    assert restored.last_updated == networks['u5'].last_updated
+
+
+def test_predictions_match_networks(networks):
+    store = StudentStateStore()
+    for user_id, bn in networks.items():
+        store.from_network(user_id, bn)
+
+    # Мережа рахує забування від поточного часу - порівнюємо так само
+    for topic in TOPICS:
+        for difficulty in ('easy', 'hard'):
+            expected = [networks[user_id].predict_success(topic, difficulty)
+                        for user_id in store.user_ids]
+            assert store.predict_success(topic, difficulty) == pytest.approx(expected, abs=1e-9)
+    assert store.weakest_topics().tolist() == [
+        networks[user_id].get_weakest_topic() for user_id in store.user_ids]
@@ -0,0 +1,78 @@
+
+import pytest
+from database import DatabaseManager
+from task_cache import TaskBankCache
+
+
+def _task(condition, difficulty='easy'):
+    return {'topic': 'algebra', 'difficulty': difficulty, 'task_type': 'open',
+            'condition': condition, 'question': 'Знайдіть x',
+            'correct_answer': '1', 'solution_steps': ['крок 1', 'крок 2']}
+
+
+@pytest.fixture
+def managers(tmp_path):
+    path = str(tmp_path / 'bank.db')
+    first, second = DatabaseManager(path), DatabaseManager(path)
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_cached_task_is_read_only_copy():
+    cache = TaskBankCache()
+    cache.sync(0)
+    task = cache.add({'id': 't1', 'topic': 'algebra', 'solution_steps': '["a", "b"]'})
+    steps = task['solution_steps']
+    steps.append('c')
+    assert task['solution_steps'] == ['a', 'b']
+    assert cache.get('t1') is task
+    cache.sync(1)
+    assert cache.get('t1') is None
+
+
+def test_writes_from_another_manager_invalidate_cache(managers):
+    reader, writer = managers
+    task_id = reader.create_task(**_task("2x = 4"))
+    assert reader.get_task(task_id)['condition'] == "2x = 4"
+    assert len(reader.get_tasks_by_topic('algebra')) == 1
+
+    # Інший екземпляр (з'єднання) над тим самим файлом
+    new_id = writer.create_task(**_task("3x = 9", difficulty='hard'))
+    assert {task['id'] for task in reader.get_tasks_by_topic('algebra')} == {task_id, new_id}
+    assert [task['id'] for task in reader.get_tasks_by_topic('algebra', difficulty='hard')] == [new_id]
+
+    # Прямий SQL в обхід менеджера
+    conn = writer._get_connection()
+    conn.execute("UPDATE tasks SET condition = '5x = 10' WHERE id = ?", (task_id,))
+    conn.commit()
+    assert reader.get_task(task_id)['condition'] == "5x = 10"
+
+    conn.execute("DELETE FROM tasks WHERE id = ?", (new_id,))
+    conn.commit()
+    assert reader.get_task(new_id) is None
+    assert [task['id'] for task in reader.get_task_candidates('algebra')] == [task_id]
+
+
+def test_cache_is_reused_without_writes(managers):
+    reader, _ = managers
+    task_id = reader.create_task(**_task("2x = 4"))
+    assert reader.get_task(task_id) is reader.get_task(task_id)
+
+
+def test_cache_hit_reads_no_task_tables(managers):
+    reader, writer = managers
+    task_id = reader.create_task(**_task("2x = 4"))
+    reader.get_task(task_id)
+    reader.get_tasks_by_topic('algebra')
+
+    statements = []
+    reader._get_connection().set_trace_callback(statements.append)
+    assert reader.get_task(task_id)['condition'] == "2x = 4"
+    assert len(reader.get_tasks_by_topic('algebra')) == 1
+    assert not [sql for sql in statements if 'tasks' in sql or 'task_bank_version' in sql]
+
+    # Коміт іншого з'єднання змушує перечитати покоління
+    writer.create_task(**_task("3x = 9"))
+    assert len(reader.get_tasks_by_topic('algebra')) == 2
+    assert any('task_bank_version' in sql for sql in statements)
@@ -0,0 +1,91 @@
+
+import sqlite3
+
+import pytest
+from database import DatabaseManager
+
+
+def _task(condition, question, topic='algebra', difficulty='easy'):
+    return {'topic': topic, 'difficulty': difficulty, 'task_type': 'open',
+            'condition': condition, 'question': question,
+            'correct_answer': '1', 'solution_steps': []}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'bank.db'))
+    if not db._fts:
+        pytest.skip("SQLite зібрано без FTS5")
+    yield db
+    db.close()
+
+
+def _ids(results):
+    return {task['id'] for task in results}
+
+
+def test_search_follows_task_changes(db):
+    linear, square, triangle = db.create_tasks_bulk([
+        _task("Розв'яжіть лінійне рівняння 2x + 3 = 7", "Знайдіть x"),
+        _task("Розв'яжіть квадратне рівняння x² - 5x + 6 = 0", "Знайдіть корені"),
+        _task("Сторони трикутника 3, 4 і 5", "Знайдіть площу", topic='geometry'),
+    ])
+    assert _ids(db.search_tasks('рівнян')) == {linear, square}
+    assert _ids(db.search_tasks('рівнян', topic='geometry')) == set()
+    assert db.search_tasks('площу')[0]['condition'].startswith('Сторони')
+
+    conn = db._get_connection()
+    conn.execute("UPDATE tasks SET condition = 'Розв''яжіть нерівність x > 2' WHERE id = ?", (linear,))
+    conn.execute("DELETE FROM tasks WHERE id = ?", (square,))
+    conn.commit()
+    assert db.search_tasks('рівнян') == []
+    assert _ids(db.search_tasks('нерівність')) == {linear}
+    assert _ids(db.search_tasks('трикутник')) == {triangle}
+    # Індекс узгоджений із вмістом tasks
+    conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('integrity-check')")
+
+    db.enable_incremental_vacuum()
+    assert _ids(db.search_tasks('трикутник')) == {triangle}
+
+
+def test_old_index_is_migrated(tmp_path):
+    path = str(tmp_path / 'old.db')
+    db = DatabaseManager(path)
+    if not db._fts:
+        pytest.skip("SQLite зібрано без FTS5")
+    task_id, = db.create_tasks_bulk([_task("Обчисліть похідну функції", "Знайдіть f'(x)")])
+    db.close()
+
+    # Індекс попереднього формату: власна копія текстів, зв'язок через task_id
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+    DROP TRIGGER tasks_fts_insert; DROP TRIGGER tasks_fts_delete; DROP TRIGGER tasks_fts_update;
+    DROP TABLE tasks_fts;
+    CREATE VIRTUAL TABLE tasks_fts USING fts5(task_id UNINDEXED, condition, question);
+    INSERT INTO tasks_fts (task_id, condition, question) SELECT id, condition, question FROM tasks;
+    ''')
+    conn.close()
+
+    db = DatabaseManager(path)
+    assert _ids(db.search_tasks('похідн')) == {task_id}
+    sql = db._get_connection().execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'tasks_fts'").fetchone()[0]
+    assert 'content_rowid' in sql
+    db.close()
+
+
+def test_fallback_search_folds_unicode_case(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'bank.db'))
+    db._fts = False
+    equation, percent = db.create_tasks_bulk([
+        _task("РІВНЯННЯ з Параметром a", "Знайдіть a"),
+        _task("Знижка 100% на товар", "Яка ціна?"),
+    ])
+    try:
+        assert _ids(db.search_tasks('рівняння')) == {equation}
+        assert _ids(db.search_tasks('ПАРАМЕТРОМ рівн')) == {equation}
+        assert _ids(db.search_tasks('Знайдіть')) == {equation}
+        assert _ids(db.search_tasks('ЦІНА')) == {percent}
+        assert db.search_tasks('трикутник') == []
+    finally:
+        db.close()
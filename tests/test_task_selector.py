@@ -0,0 +1,81 @@
+
+import numpy as np
+import pytest
+from bayesian_network import SimpleBayesianNetwork
+from storage import InMemoryStorage
+from task_selector import TaskSelector
+
+
+def _state(algebra, geometry, functions):
+    return {skill: {'Low': 1 - high, 'High': high}
+            for skill, high in (('Algebra', algebra), ('Geometry', geometry), ('Functions', functions))}
+
+
+@pytest.fixture
+def storage():
+    storage = InMemoryStorage()
+    for i in range(30):
+        for topic in ('algebra', 'Geometry', 'functions'):
+            storage.create_task(topic, ('easy', 'medium', 'hard')[i % 3], 'open',
+                                f'умова {i}', 'питання', '1', ['крок'])
+    return storage
+
+
+def test_information_gain_is_non_negative():
+    high = np.linspace(0.0, 1.0, 101)
+    for p_high, p_low in [(0.8, 0.3), (0.95, 0.05), (0.6, 0.5), (0.3, 0.8)]:
+        assert (TaskSelector.information_gain(high, p_high, p_low) >= -1e-12).all()
+
+
+def test_information_gain_prefers_uncertain_skill():
+    high = np.array([0.05, 0.2, 0.35, 0.5, 0.65, 0.8, 0.95])
+    assert np.argmax(TaskSelector.information_gain(high)) == 3
+
+
+def test_mastery_gain_matches_network_update():
+    bn = SimpleBayesianNetwork.from_prototype()
+    skill_high = float(bn.skill_cpds['Geometry'][1, 0])
+    high = bn.current_state['Geometry']['High']
+    p_high, p_low = bn.success_given_skill('medium')
+    p_correct = high * p_high + (1 - high) * p_low
+
+    after = {}
+    for is_correct in (True, False):
+        trial = SimpleBayesianNetwork.from_prototype()
+        trial._update_skills('geometry', is_correct)
+        after[is_correct] = float(trial.skill_cpds['Geometry'][1, 0])
+    expected = p_correct * after[True] + (1 - p_correct) * after[False] - skill_high
+    gain = TaskSelector.mastery_gain(np.array([high]), np.array([skill_high]), p_high, p_low)
+    assert gain[0] == pytest.approx(expected)
+
+
+def test_selects_task_of_uncertain_skill(storage):
+    bn = SimpleBayesianNetwork.from_prototype()
+    bn.current_state = _state(0.97, 0.5, 0.03)
+    task, = TaskSelector(storage, latency_budget_ms=1e6).select_next_tasks(bn, k=1)
+    assert task['topic'] == 'Geometry'
+    assert 'solution_steps' not in task
+    assert 0 < task['success_probability'] < 1
+
+
+def test_chunked_ranking_matches_unchunked(storage):
+    bn = SimpleBayesianNetwork.from_prototype()
+    bn.current_state = _state(0.3, 0.6, 0.8)
+    for criterion in TaskSelector.CRITERIA:
+        reference = TaskSelector(storage)
+        tasks = storage.get_task_candidates(limit=reference.candidate_limit)
+        scores = reference.score_tasks(bn, tasks, criterion)
+        expected = sorted(scores, reverse=True)[:10]
+
+        chunked = TaskSelector(storage, chunk_size=7, latency_budget_ms=1e6)
+        selected = chunked.select_next_tasks(bn, k=10, criterion=criterion)
+        assert [task['score'] for task in selected] == pytest.approx(expected)
+
+
+def test_exhausted_budget_ranks_first_chunk_only(storage):
+    bn = SimpleBayesianNetwork.from_prototype()
+    selector = TaskSelector(storage, chunk_size=5, latency_budget_ms=0.0)
+    first_chunk = {task['id'] for task in storage.get_task_candidates(limit=selector.candidate_limit)[:5]}
+    selected = selector.select_next_tasks(bn, k=10)
+    assert len(selected) == 5
+    assert {task['id'] for task in selected} == first_chunk